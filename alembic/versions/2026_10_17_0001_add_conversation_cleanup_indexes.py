@@ -0,0 +1,36 @@
+"""Add indexes used by conversation cleanup
+
+Revision ID: 2026_10_17_0001
+Revises: 2026_02_08_0001
+Create Date: 2026-10-17 00:01:00.000000
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '2026_10_17_0001'
+down_revision = '2026_02_08_0001'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """Index conversations by updated_at and ensure messages.conversation_id is indexed."""
+    # CONCURRENTLY cannot run inside a transaction; build without locking writes
+    with op.get_context().autocommit_block():
+        for statement in [
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_conversations_updated_at ON conversations (updated_at)",
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_conversations_user_updated ON conversations (user_id, updated_at)",
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_messages_conversation_id ON messages (conversation_id)",
+        ]:
+            op.execute(statement)
+
+
+def downgrade() -> None:
+    """Drop the conversation cleanup indexes."""
+    # ix_messages_conversation_id is declared on the Message model, so it is kept
+    with op.get_context().autocommit_block():
+        for statement in [
+            "DROP INDEX CONCURRENTLY IF EXISTS ix_conversations_user_updated",
+            "DROP INDEX CONCURRENTLY IF EXISTS ix_conversations_updated_at",
+        ]:
+            op.execute(statement)
@@ -0,0 +1,40 @@
+"""Cascade message deletes from their conversation in the database
+
+Revision ID: 2026_10_17_0002
+Revises: 2026_10_17_0001
+Create Date: 2026-10-17 00:02:00.000000
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '2026_10_17_0002'
+down_revision = '2026_10_17_0001'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """Recreate messages.conversation_id FK with ON DELETE CASCADE."""
+    # NOT VALID skips the full-table check under the ACCESS EXCLUSIVE lock
+    for statement in [
+        "ALTER TABLE messages DROP CONSTRAINT IF EXISTS messages_conversation_id_fkey",
+        "ALTER TABLE messages ADD CONSTRAINT messages_conversation_id_fkey "
+        "FOREIGN KEY (conversation_id) REFERENCES conversations (id) ON DELETE CASCADE NOT VALID",
+    ]:
+        op.execute(statement)
+    # autocommit_block commits the ALTERs first, so VALIDATE scans under its
+    # weaker lock with concurrent writes allowed
+    with op.get_context().autocommit_block():
+        op.execute("ALTER TABLE messages VALIDATE CONSTRAINT messages_conversation_id_fkey")
+
+
+def downgrade() -> None:
+    """Restore messages.conversation_id FK without a delete action."""
+    for statement in [
+        "ALTER TABLE messages DROP CONSTRAINT IF EXISTS messages_conversation_id_fkey",
+        "ALTER TABLE messages ADD CONSTRAINT messages_conversation_id_fkey "
+        "FOREIGN KEY (conversation_id) REFERENCES conversations (id) NOT VALID",
+    ]:
+        op.execute(statement)
+    with op.get_context().autocommit_block():
+        op.execute("ALTER TABLE messages VALIDATE CONSTRAINT messages_conversation_id_fkey")
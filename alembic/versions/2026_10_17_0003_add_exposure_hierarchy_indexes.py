@@ -0,0 +1,36 @@
+"""Add indexes for exposure hierarchy queries
+
+Revision ID: 2026_10_17_0003
+Revises: 2026_10_17_0002
+Create Date: 2026-10-17 00:03:00.000000
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '2026_10_17_0003'
+down_revision = '2026_10_17_0002'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """Index exposure steps by (user, group, status, difficulty) and (user, created_at)."""
+    # CONCURRENTLY cannot run inside a transaction; build without locking writes
+    with op.get_context().autocommit_block():
+        for statement in [
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_exposure_hierarchies_user_group_status_difficulty "
+            "ON exposure_hierarchies (user_id, hierarchy_group, status, difficulty_level)",
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_exposure_hierarchies_user_created "
+            "ON exposure_hierarchies (user_id, created_at)",
+        ]:
+            op.execute(statement)
+
+
+def downgrade() -> None:
+    """Drop the exposure hierarchy indexes."""
+    with op.get_context().autocommit_block():
+        for statement in [
+            "DROP INDEX CONCURRENTLY IF EXISTS ix_exposure_hierarchies_user_created",
+            "DROP INDEX CONCURRENTLY IF EXISTS ix_exposure_hierarchies_user_group_status_difficulty",
+        ]:
+            op.execute(statement)
@@ -0,0 +1,30 @@
+"""Add partial index for the next exposure step lookup
+
+Revision ID: 2026_10_17_0004
+Revises: 2026_10_17_0003
+Create Date: 2026-10-17 00:04:00.000000
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '2026_10_17_0004'
+down_revision = '2026_10_17_0003'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """Index not-started exposure steps by (user, group, difficulty)."""
+    # The enum column stores member names, hence 'NOT_STARTED'
+    with op.get_context().autocommit_block():
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_exposure_hierarchies_next_step "
+            "ON exposure_hierarchies (user_id, hierarchy_group, difficulty_level) "
+            "WHERE status = 'NOT_STARTED'"
+        )
+
+
+def downgrade() -> None:
+    """Drop the next exposure step index."""
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_exposure_hierarchies_next_step")
@@ -13,7 +13,7 @@ from app.database import get_db
 from app.models.user import User
 from app.models.user_note import UserNote
 from app.core.dependencies import get_current_active_user
-from app.services.email_service import EmailService
+from app.services.email_service import get_email_service
 from app.services.user_note_service import UserNoteService
 
 router = APIRouter()
@@ -98,12 +98,12 @@ async def send_internal_message(
     Maps names to email addresses from environment variables.
     """
     try:
-        email_service = EmailService()
+        email_service = get_email_service()
         
         # Add user context if requested
         sender_context = current_user.email if request.include_user_context else None
         
-        result = email_service.send_internal_message(
+        result = await email_service.send_internal_message_async(
             recipient_name=request.recipient_name,
             subject=request.subject,
             message=request.message,
@@ -135,7 +135,7 @@ async def get_available_recipients(
     current_user: User = Depends(get_current_active_user)
 ):
     """Get list of available internal message recipients"""
-    email_service = EmailService()
+    email_service = get_email_service()
     return {
         "recipients": list(email_service.TEAM_MEMBERS.keys()),
         "note": "Use these names in the 'recipient_name' field"
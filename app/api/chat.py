@@ -24,7 +24,7 @@ from app.services.claude import ClaudeService
 from app.services.groq_service import GroqService
 from app.services.memory_service import MemoryService
 from app.prompts.discovery_mode import DISCOVERY_MODE_ID
-from app.services.depth_scorer import DepthScorer
+from app.services.depth_scorer import get_depth_scorer
 from app.services.depth_engine import ConversationDepthEngine
 from app.services.nebp_state_machine import NEBPStateMachine
 from app.config import settings
@@ -96,8 +96,8 @@ router = APIRouter()
 # The homepage quick start always uses the core EPI Brain personality
 HOMEPAGE_DEFAULT_PERSONALITY = "personal_friend"
 
-# Initialize depth scorer
-depth_scorer = DepthScorer()
+# Shared depth scorer (patterns, LLM score cache and batcher are per process)
+depth_scorer = get_depth_scorer()
 
 MAX_DISCOVERY_METADATA_CHARS = 256
 
@@ -1082,20 +1082,16 @@ async def send_message(
                     Message.conversation_id == conversation.id
                 ).count()
                 
-                should_collect = await core_collector.should_ask_for_core_variables(
+                # One assessment covers the decision, the prompt and the next variable
+                _, collection_prompt, _ = await core_collector.evaluate_and_prompt(
                     user_id=str(current_user.id),
+                    personality=chat_request.mode,
                     message_count=message_count,
                     conversation_depth=new_depth if new_depth else 0.0
                 )
                 
-                if should_collect:
-                    collection_prompt = await core_collector.generate_collection_prompt(
-                        user_id=str(current_user.id),
-                        personality=chat_request.mode,
-                        message_count=message_count
-                    )
-                    if collection_prompt:
-                        logger.info(f"Generated core variable collection prompt for user {current_user.id}")
+                if collection_prompt:
+                    logger.info(f"Generated core variable collection prompt for user {current_user.id}")
             except Exception as e:
                 logger.error(f"Phase 2 core collection error: {e}", exc_info=True)
                 # Don't fail the request if Phase 2 has issues
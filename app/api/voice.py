@@ -17,7 +17,7 @@ from app.models.user import User
 from app.models.voice_usage import VoiceUsage
 from app.services.voice_tracking import VoiceUsageTracker
 from app.services.openai_tts_service import OpenAITTSService
-from app.services.elevenlabs_tts_service import ElevenLabsTTSService
+from app.services.elevenlabs_tts_service import get_tts_service
 from app.services.hybrid_tts_service import HybridTTSService
 from app.config import settings
 
@@ -25,7 +25,7 @@ logger = logging.getLogger(__name__)
 
 router = APIRouter()
 # Use ElevenLabs for high-quality voices with free tier
-tts_service = ElevenLabsTTSService()
+tts_service = get_tts_service()
 
 
 class VoiceRequest(BaseModel):
@@ -145,19 +145,24 @@ async def generate_voice(
         
         logger.info(f"Generating TTS for user {current_user.id}: {len(request.text)} chars")
         
-        # Generate speech using OpenAI TTS
-        audio_data = await tts_service.generate_speech_for_personality(
+        voice_model = tts_service.get_voice_for_personality(request.personality, request.gender)
+        
+        # Stream audio from ElevenLabs straight through to the client. The first
+        # chunk is awaited here so API errors still surface as HTTP errors.
+        audio_stream = tts_service.stream_speech(
             text=request.text,
-            personality=request.personality,
-            gender=request.gender,
+            voice=voice_model,
             model=request.model or settings.VOICE_TTS_MODEL,
             output_format=request.output_format or settings.VOICE_TTS_FORMAT,
             instructions=request.instructions,
         )
+        try:
+            first_chunk = await audio_stream.__anext__()
+        except StopAsyncIteration:
+            first_chunk = b""
         
         # Track usage
         tracker = VoiceUsageTracker(db)
-        voice_model = tts_service.get_voice_for_personality(request.personality, request.gender)
         
         # Calculate cost (OpenAI TTS: $0.015 per minute, assume 2.5 chars per second)
         estimated_duration_seconds = len(request.text) / 2.5
@@ -173,19 +178,25 @@ async def generate_voice(
             duration_seconds=estimated_duration_seconds,
         )
         
-        logger.info(f"TTS generated successfully: {len(audio_data)} bytes")
+        logger.info(f"TTS stream started for user {current_user.id}")
+        
+        async def audio_body():
+            yield first_chunk
+            async for chunk in audio_stream:
+                yield chunk
         
         # Return audio as streaming response
         media_type = f"audio/{request.output_format}"
         return StreamingResponse(
-            iter([audio_data]),
+            audio_body(),
             media_type=media_type,
             headers={
-                "Content-Length": str(len(audio_data)),
                 "Cache-Control": "no-cache",
             }
         )
         
+    except HTTPException:
+        raise
     except ValueError as e:
         logger.error(f"Voice limit error: {str(e)}")
         raise HTTPException(status_code=429, detail=str(e))
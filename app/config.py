@@ -39,6 +39,8 @@ class Settings(BaseSettings):
     # Environment
     ENVIRONMENT: str = os.getenv("ENVIRONMENT", "development")
     DEBUG: bool = os.getenv("DEBUG", "True").lower() == "true"
+    # Opt-in: make unplanned relationship lazy loads raise (development only)
+    RAISE_ON_LAZY_LOAD: bool = os.getenv("RAISE_ON_LAZY_LOAD", "false").lower() == "true"
     LOG_LEVEL: str = os.getenv("LOG_LEVEL", "INFO")
     
     # Security
@@ -59,6 +61,8 @@ class Settings(BaseSettings):
     GROQ_API_KEY: str = os.getenv("GROQ_API_KEY", "")
     GROQ_MODEL: str = "llama-3.3-70b-versatile"
     USE_GROQ: bool = True  # Use Groq by default (set to False to use Claude)
+    DISCOVERY_EXTRACTION_MODEL: str = os.getenv("DISCOVERY_EXTRACTION_MODEL", "llama-3.1-8b-instant")  # Short JSON classifications
+    DISCOVERY_LLM_MAX_CONCURRENCY: int = int(os.getenv("DISCOVERY_LLM_MAX_CONCURRENCY", "32"))  # In-flight discovery validations per process
     
     # ─── NEBP (Neural-Electronic Brain Pipeline) Layer Configuration ───
     # Layer 1: Neural Input (STT) — Whisper large-v3-turbo, 400 RPM
@@ -122,6 +126,16 @@ class Settings(BaseSettings):
     CLAUDE_API_KEY: str = os.getenv("CLAUDE_API_KEY", "")  # Alias for ANTHROPIC_API_KEY
     CLAUDE_MODEL: str = "claude-3-5-sonnet-20241022"
     CLAUDE_MAX_TOKENS: int = 4096
+    CLAUDE_MAX_CONCURRENCY: int = int(os.getenv("CLAUDE_MAX_CONCURRENCY", "10"))  # In-flight calls per process
+    CLAUDE_MAX_RETRIES: int = 5  # 429/5xx retries with exponential backoff, honoring Retry-After
+    CLAUDE_TOKENS_PER_MINUTE: int = int(os.getenv("CLAUDE_TOKENS_PER_MINUTE", "0"))  # 0 disables the TPM budget
+    
+    # Claude semantic response cache (near-duplicate, context-free turns only)
+    CLAUDE_RESPONSE_CACHE_ENABLED: bool = True
+    CLAUDE_RESPONSE_CACHE_MODES: list = ["kids_learning", "customer_service", "student_tutor"]
+    CLAUDE_RESPONSE_CACHE_THRESHOLD: float = 0.92  # Minimum cosine similarity for a hit
+    CLAUDE_RESPONSE_CACHE_TTL_SECONDS: int = 3600
+    CLAUDE_RESPONSE_CACHE_MAX_ENTRIES: int = 256  # Per (mode, silo) bucket
     
     # Stripe (optional)
     STRIPE_SECRET_KEY: str = os.getenv("STRIPE_SECRET_KEY", "")
@@ -144,6 +158,8 @@ class Settings(BaseSettings):
     DEPTH_MIN_MESSAGE_LENGTH: int = 20
     DEPTH_LLM_THRESHOLD: float = 0.3
     DEPTH_DECAY_RATE: float = 0.002
+    DEPTH_LLM_BATCH_MAX_SIZE: int = 8  # Scoring prompts coalesced into one LLM call
+    DEPTH_LLM_BATCH_MAX_DELAY_MS: int = 30  # How long the first prompt waits for company
     DEPTH_TRACKED_MODES: list = [
         "personal_friend", 
         "weight_loss_coach", 
@@ -157,6 +173,13 @@ class Settings(BaseSettings):
     VOICE_TTS_ENABLED: bool = True
     VOICE_TTS_MODEL: str = "eleven_multilingual_v2"
     VOICE_TTS_FORMAT: str = "mp3"
+    VOICE_TTS_MAX_RETRIES: int = 3  # 429/5xx retries with jittered backoff, honoring Retry-After
+    VOICE_TTS_MONTHLY_CHAR_LIMIT: int = int(os.getenv("VOICE_TTS_MONTHLY_CHAR_LIMIT", "0"))  # ElevenLabs plan quota, checked locally via Redis (0 = off; free tier is 10000)
+    VOICE_TTS_MAX_CONCURRENCY: int = int(os.getenv("VOICE_TTS_MAX_CONCURRENCY", "5"))  # In-flight ElevenLabs requests per process (plan limit)
+    # Redis cache of synthesized audio for short, repeated lines (needs REDIS_URL)
+    VOICE_TTS_CACHE_ENABLED: bool = os.getenv("VOICE_TTS_CACHE_ENABLED", "False").lower() == "true"
+    VOICE_TTS_CACHE_TTL_SECONDS: int = 30 * 24 * 3600  # 30 days
+    VOICE_TTS_CACHE_MAX_CHARS: int = 500  # Longer texts are one-off replies
     
     # Message Limits
     FREE_TIER_MESSAGE_LIMIT: int = 100  # Daily message limit for free tier
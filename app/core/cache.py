@@ -0,0 +1,73 @@
+"""
+In-process TTL cache
+Short-lived memoization for per-user read paths that are polled frequently
+"""
+
+import threading
+import time
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+# Sentinel distinguishing "not cached" from a cached None
+MISSING = object()
+
+
+class TTLCache:
+    """
+    Small thread-safe cache whose entries expire after a fixed number of seconds.
+
+    In-memory only, so each worker process keeps its own copy.
+    In production, use Redis if entries must be shared across processes.
+    """
+
+    def __init__(self, ttl_seconds: float, maxsize: int = 10_000):
+        self.ttl_seconds = ttl_seconds
+        self.maxsize = maxsize
+        self._entries: Dict[Hashable, Tuple[float, Any]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = MISSING) -> Any:
+        """Return the cached value for key, or default if absent or expired"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return default
+            expires_at, value = entry
+            if expires_at <= now:
+                del self._entries[key]
+                return default
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl_seconds: Optional[float] = None) -> None:
+        """Store value under key for ttl_seconds (defaults to the cache TTL)"""
+        now = time.monotonic()
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        with self._lock:
+            if key in self._entries:
+                # Re-insert so the key moves to the newest position
+                del self._entries[key]
+            elif len(self._entries) >= self.maxsize:
+                self._evict(now)
+            self._entries[key] = (now + ttl, value)
+
+    def pop(self, key: Hashable) -> None:
+        """Invalidate a single key"""
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        """Drop every entry"""
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _evict(self, now: float) -> None:
+        """Drop expired entries, then the oldest ones if still full (lock held)"""
+        expired = [k for k, (expires_at, _) in self._entries.items() if expires_at <= now]
+        for key in expired:
+            del self._entries[key]
+        while len(self._entries) >= self.maxsize:
+            # dicts keep insertion order, so the first key is the oldest write
+            del self._entries[next(iter(self._entries))]
@@ -72,4 +72,14 @@ class ClaudeAPIError(HTTPException):
         super().__init__(
             status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
             detail=detail
+        )
+
+
+class TTSQuotaExhausted(HTTPException):
+    """Exception raised when the monthly ElevenLabs character quota is used up"""
+    
+    def __init__(self):
+        super().__init__(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Voice generation quota for this month has been reached. Please try again next month."
         )
\ No newline at end of file
@@ -0,0 +1,31 @@
+"""
+Shared Redis client
+One async connection pool per process for features that keep state in Redis
+"""
+
+from typing import Optional
+
+import redis.asyncio as redis
+
+from app.config import settings
+
+_redis: Optional["redis.Redis"] = None
+
+
+def get_redis() -> "redis.Redis":
+    """Get the process-wide async Redis client, creating it on first use"""
+    global _redis
+
+    if _redis is None:
+        # Short timeouts: callers treat Redis as best-effort and fall back on errors
+        _redis = redis.from_url(settings.REDIS_URL, socket_connect_timeout=1.0, socket_timeout=1.0)
+    return _redis
+
+
+async def close_redis() -> None:
+    """Close the Redis connection pool (call on app shutdown)"""
+    global _redis
+
+    if _redis is not None:
+        await _redis.aclose()
+    _redis = None
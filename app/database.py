@@ -19,7 +19,9 @@ engine = create_engine(
 )
 
 # Create session factory
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# Objects keep their flushed state after commit: every model default is
+# client-side, so re-reading a row we just wrote would be a wasted SELECT.
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False, bind=engine)
 
 # Base class for all models
 Base = declarative_base()
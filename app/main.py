@@ -249,6 +249,19 @@ async def startup_event():
     asyncio.create_task(rate_limiter_cleanup_task())
     logger.info("✅ Started rate limiter cleanup task")
     
+    # Open connections to Groq and ElevenLabs in the background so the first
+    # real user doesn't pay for DNS and TLS setup
+    from app.services.discovery_extraction_service import get_discovery_service
+    from app.services.elevenlabs_tts_service import get_tts_service
+    
+    async def prewarm_outbound_clients():
+        discovery_service = get_discovery_service()
+        if discovery_service is not None:
+            await discovery_service.prewarm()
+        await get_tts_service().prewarm()
+    
+    asyncio.create_task(prewarm_outbound_clients())
+    
     # Run database migrations
     try:
         with engine.connect() as conn:
@@ -278,6 +291,20 @@ async def startup_event():
 async def shutdown_event():
     """Shutdown event handler"""
     logger.info(f"Shutting down {settings.APP_NAME}")
+    
+    # Release pooled keep-alive connections to the Anthropic API
+    from app.services.claude import close_claude_client
+    await close_claude_client()
+    
+    # Same for the ElevenLabs TTS pool and the shared Redis pool
+    from app.api.voice import tts_service
+    await tts_service.aclose()
+    from app.core.redis_client import close_redis
+    await close_redis()
+    
+    # And the pooled SMTP connections
+    from app.services.email_service import close_email_service
+    close_email_service()
 
 
 if __name__ == "__main__":
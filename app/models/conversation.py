@@ -2,7 +2,7 @@
 Conversation Model
 """
 
-from sqlalchemy import Column, String, DateTime, ForeignKey, Float, Boolean, JSON
+from sqlalchemy import Column, String, DateTime, ForeignKey, Float, Boolean, JSON, Index
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from datetime import datetime
@@ -42,6 +42,12 @@ class Conversation(Base):
     behavioral_activations = relationship("BehavioralActivation", back_populates="conversation", cascade="all, delete-orphan")
     exposure_hierarchies = relationship("ExposureHierarchy", back_populates="conversation", cascade="all, delete-orphan")
     
+    # Indexes for the age-based cleanup scans (messages.conversation_id is indexed on Message)
+    __table_args__ = (
+        Index('ix_conversations_updated_at', 'updated_at'),
+        Index('ix_conversations_user_updated', 'user_id', 'updated_at'),
+    )
+    
     def __repr__(self):
         return f"<Conversation {self.id} - {self.mode}>"
     
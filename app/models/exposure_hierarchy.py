@@ -3,7 +3,7 @@ Exposure Hierarchy Model for CBT (Cognitive Behavioral Therapy)
 Tracks gradual exposure to feared situations to reduce anxiety
 """
 from datetime import datetime
-from sqlalchemy import Column, String, DateTime, Integer, Float, Text, Enum as SQLEnum, ForeignKey
+from sqlalchemy import Column, String, DateTime, Integer, Float, Text, Enum as SQLEnum, ForeignKey, Index
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from app.database import Base
@@ -71,6 +71,18 @@ class ExposureHierarchy(Base):
     user = relationship("User", back_populates="exposure_hierarchies")
     conversation = relationship("Conversation", back_populates="exposure_hierarchies")
     
+    # Service queries filter by user plus group/status and order by difficulty,
+    # or scan a user's steps by creation date for progress windows
+    __table_args__ = (
+        Index('ix_exposure_hierarchies_user_group_status_difficulty', 'user_id', 'hierarchy_group', 'status', 'difficulty_level'),
+        Index('ix_exposure_hierarchies_user_created', 'user_id', 'created_at'),
+        # Partial: only steps still waiting, so the next-step lookup stays small and hot
+        Index(
+            'ix_exposure_hierarchies_next_step', 'user_id', 'hierarchy_group', 'difficulty_level',
+            postgresql_where=(status == ExposureStatus.NOT_STARTED)
+        ),
+    )
+    
     def __repr__(self):
         return f"<ExposureHierarchy(id={self.id}, situation={self.feared_situation[:30]}, level={self.difficulty_level})>"
     
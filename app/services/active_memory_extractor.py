@@ -241,30 +241,13 @@ Extract the relevant information from the conversation above and return it as a
     ) -> int:
         """Update memory with extracted information"""
         updated_count = 0
+        global_updates = {}
         
         for category, data in extracted_data.items():
             try:
-                if category == "user_profile":
-                    # Update global memory
-                    for key, value in data.items():
-                        await self.memory_service.update_global_memory(
-                            user_id=user_id,
-                            category=category,
-                            key=key,
-                            value=value
-                        )
-                        updated_count += 1
-                
-                elif category == "behavioral_patterns":
-                    # Update global memory
-                    for key, value in data.items():
-                        await self.memory_service.update_global_memory(
-                            user_id=user_id,
-                            category=category,
-                            key=key,
-                            value=value
-                        )
-                        updated_count += 1
+                if category in ("user_profile", "behavioral_patterns"):
+                    # Global memory fields are saved together below
+                    global_updates[category] = dict(data)
                 
                 elif category == "personality_contexts":
                     # Update personality-specific context
@@ -280,6 +263,16 @@ Extract the relevant information from the conversation above and return it as a
             except Exception as e:
                 logger.error(f"Error updating memory for {category}: {str(e)}")
         
+        if global_updates:
+            try:
+                await self.memory_service.bulk_update_global_memory(
+                    user_id=user_id,
+                    updates=global_updates
+                )
+                updated_count += sum(len(fields) for fields in global_updates.values())
+            except Exception as e:
+                logger.error(f"Error updating global memory: {str(e)}")
+        
         return updated_count
     
     async def should_extract_from_conversation(
@@ -2,17 +2,74 @@
 Behavioral Activation Service for CBT (Cognitive Behavioral Therapy)
 Tracks activities and their impact on mood to break avoidance cycles
 """
+from collections import Counter
+import heapq
 from datetime import datetime, timedelta
+from types import MappingProxyType
 import uuid
-from sqlalchemy.orm import Session
+from sqlalchemy import delete, update
+from sqlalchemy.orm import Session, load_only
 
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Mapping, Optional
 import logging
 
+from app.core.cache import TTLCache, MISSING
 from app.models.behavioral_activation import BehavioralActivation, ActivityCompletionStatus
 
 logger = logging.getLogger(__name__)
 
+# Static suggestions by mood band, built once at import
+_GENTLE_SUGGESTIONS = tuple(
+    {"activity": a, "reason": "Gentle boost"}
+    for a in (
+        "Take a 5-minute walk outside",
+        "Listen to your favorite song",
+        "Drink a glass of water",
+        "Take 3 deep breaths",
+        "Pet an animal or look at cute animal pictures",
+    )
+)
+_MODERATE_SUGGESTIONS = tuple(
+    {"activity": a, "reason": "Moderate engagement"}
+    for a in (
+        "Go for a 15-minute walk",
+        "Call a friend or family member",
+        "Do a quick stretch routine",
+        "Read a chapter of a book",
+        "Try a new recipe",
+    )
+)
+_ENGAGING_SUGGESTIONS = tuple(
+    {"activity": a, "reason": "Build on positivity"}
+    for a in (
+        "Exercise for 30 minutes",
+        "Work on a hobby project",
+        "Learn something new",
+        "Connect with friends",
+        "Tackle a small task you've been avoiding",
+    )
+)
+
+# Rows fetched per batch when streaming analytics scans
+ANALYTICS_YIELD_PER = 1000
+
+# Shared read-only payload for users with no completed activities in the window
+_EMPTY_MOOD_TRENDS = MappingProxyType({
+    "avg_mood_before": None,
+    "avg_mood_after": None,
+    "avg_improvement": None,
+    "total_activities": 0
+})
+
+# Per-user cache of the 90-day improving-activities scan used by suggestions
+SUGGESTION_HISTORY_TTL_SECONDS = 300
+_suggestion_history_cache = TTLCache(ttl_seconds=SUGGESTION_HISTORY_TTL_SECONDS)
+
+# Columns update_activity may write; ownership and timestamps are managed here
+_UPDATABLE_COLUMNS = frozenset(
+    column.key for column in BehavioralActivation.__table__.columns
+) - {"id", "user_id", "created_at", "updated_at"}
+
 
 class BehavioralActivationService:
     """Service for managing behavioral activation and mood tracking"""
@@ -62,7 +119,6 @@ class BehavioralActivationService:
             
             self.db.add(activity_record)
             self.db.commit()
-            self.db.refresh(activity_record)
             
             logger.info(f"Created activity {activity_record.id} for user {user_id}")
             return activity_record
@@ -115,22 +171,21 @@ class BehavioralActivationService:
         Returns:
             Updated activity
         """
-        activity = self.get_activity(activity_id, user_id)
-        
-        if not activity:
-            return None
+        values = {
+            "mood_after": mood_after,
+            "completion_status": ActivityCompletionStatus.COMPLETED,
+            "completed_at": datetime.utcnow()
+        }
+        if notes:
+            values["notes"] = notes
         
         try:
-            activity.mood_after = mood_after
-            activity.completion_status = ActivityCompletionStatus.COMPLETED
-            activity.completed_at = datetime.utcnow()
-            
-            if notes:
-                activity.notes = notes
+            activity = self._update_owned_activity(activity_id, user_id, values)
             
-            self.db.commit()
-            self.db.refresh(activity)
+            if not activity:
+                return None
             
+            _suggestion_history_cache.pop(user_id)
             logger.info(f"Completed activity {activity_id} for user {user_id}")
             return activity
             
@@ -146,19 +201,15 @@ class BehavioralActivationService:
         notes: Optional[str] = None
     ) -> Optional[BehavioralActivation]:
         """Mark an activity as skipped"""
-        activity = self.get_activity(activity_id, user_id)
-        
-        if not activity:
-            return None
+        values = {"completion_status": ActivityCompletionStatus.SKIPPED}
+        if notes:
+            values["notes"] = notes
         
         try:
-            activity.completion_status = ActivityCompletionStatus.SKIPPED
-            
-            if notes:
-                activity.notes = notes
+            activity = self._update_owned_activity(activity_id, user_id, values)
             
-            self.db.commit()
-            self.db.refresh(activity)
+            if not activity:
+                return None
             
             logger.info(f"Skipped activity {activity_id} for user {user_id}")
             return activity
@@ -175,20 +226,19 @@ class BehavioralActivationService:
         **kwargs
     ) -> Optional[BehavioralActivation]:
         """Update an activity"""
-        activity = self.get_activity(activity_id, user_id)
-        
-        if not activity:
-            return None
+        values = {
+            key: value for key, value in kwargs.items()
+            if key in _UPDATABLE_COLUMNS and value is not None
+        }
+        values["updated_at"] = datetime.utcnow()
         
         try:
-            for key, value in kwargs.items():
-                if hasattr(activity, key) and value is not None:
-                    setattr(activity, key, value)
+            activity = self._update_owned_activity(activity_id, user_id, values)
             
-            activity.updated_at = datetime.utcnow()
-            self.db.commit()
-            self.db.refresh(activity)
+            if not activity:
+                return None
             
+            _suggestion_history_cache.pop(user_id)
             logger.info(f"Updated activity {activity_id}")
             return activity
             
@@ -199,14 +249,20 @@ class BehavioralActivationService:
     
     def delete_activity(self, activity_id: uuid.UUID, user_id: uuid.UUID) -> bool:
         """Delete an activity"""
-        activity = self.get_activity(activity_id, user_id)
-        
-        if not activity:
-            return False
-        
         try:
-            self.db.delete(activity)
+            result = self.db.execute(
+                delete(BehavioralActivation).where(
+                    BehavioralActivation.id == activity_id,
+                    BehavioralActivation.user_id == user_id
+                )
+            )
+            
+            if result.rowcount == 0:
+                self.db.rollback()
+                return False
+            
             self.db.commit()
+            _suggestion_history_cache.pop(user_id)
             logger.info(f"Deleted activity {activity_id}")
             return True
             
@@ -215,11 +271,44 @@ class BehavioralActivationService:
             logger.error(f"Error deleting activity: {e}")
             raise
     
+    def _update_owned_activity(
+        self,
+        activity_id: uuid.UUID,
+        user_id: uuid.UUID,
+        values: Dict[str, Any]
+    ) -> Optional[BehavioralActivation]:
+        """
+        Apply values to a user's activity in a single UPDATE ... RETURNING
+        
+        The user_id predicate doubles as the ownership check, so a missing
+        or foreign activity simply matches no row.
+        
+        Returns:
+            Updated activity, or None if no row matched
+        """
+        activity = self.db.execute(
+            update(BehavioralActivation)
+            .where(
+                BehavioralActivation.id == activity_id,
+                BehavioralActivation.user_id == user_id
+            )
+            .values(**values)
+            .returning(BehavioralActivation)
+            .execution_options(populate_existing=True)
+        ).scalar_one_or_none()
+        
+        if activity is None:
+            self.db.rollback()
+            return None
+        
+        self.db.commit()
+        return activity
+    
     def get_mood_trends(
         self,
         user_id: uuid.UUID,
         days: int = 30
-    ) -> Dict[str, Any]:
+    ) -> Mapping[str, Any]:
         """
         Analyze mood trends from activities
         
@@ -228,33 +317,40 @@ class BehavioralActivationService:
             days: Number of days to analyze
         
         Returns:
-            Dictionary with mood trends
+            Mapping with mood trends (read-only when there is no data)
         """
         since_date = datetime.utcnow() - timedelta(days=days)
         
-        activities = self.db.query(BehavioralActivation).filter(
+        activities = self.db.query(BehavioralActivation).options(
+            load_only(BehavioralActivation.mood_before, BehavioralActivation.mood_after)
+        ).filter(
             BehavioralActivation.user_id == user_id,
             BehavioralActivation.created_at >= since_date,
             BehavioralActivation.completion_status == ActivityCompletionStatus.COMPLETED
-        ).all()
-        
-        if not activities:
-            return {
-                "avg_mood_before": None,
-                "avg_mood_after": None,
-                "avg_improvement": None,
-                "total_activities": 0
-            }
-        
-        avg_before = sum(a.mood_before for a in activities) / len(activities)
-        avg_after = sum(a.mood_after for a in activities if a.mood_after) / len([a for a in activities if a.mood_after])
-        avg_improvement = sum(a.mood_improvement for a in activities if a.mood_improvement) / len([a for a in activities if a.mood_improvement])
+        ).yield_per(ANALYTICS_YIELD_PER)
+        
+        total = before_sum = 0
+        after_sum = after_count = 0
+        improvement_sum = improvement_count = 0
+        for a in activities:
+            total += 1
+            before_sum += a.mood_before
+            if a.mood_after:
+                after_sum += a.mood_after
+                after_count += 1
+            improvement = a.mood_improvement
+            if improvement:
+                improvement_sum += improvement
+                improvement_count += 1
+        
+        if not total:
+            return _EMPTY_MOOD_TRENDS
         
         return {
-            "avg_mood_before": round(avg_before, 2),
-            "avg_mood_after": round(avg_after, 2),
-            "avg_improvement": round(avg_improvement, 2),
-            "total_activities": len(activities)
+            "avg_mood_before": round(before_sum / total, 2),
+            "avg_mood_after": round(after_sum / after_count, 2) if after_count else None,
+            "avg_improvement": round(improvement_sum / improvement_count, 2) if improvement_count else None,
+            "total_activities": total
         }
     
     def get_activity_categories(
@@ -274,18 +370,15 @@ class BehavioralActivationService:
         """
         since_date = datetime.utcnow() - timedelta(days=days)
         
-        activities = self.db.query(BehavioralActivation).filter(
+        activities = self.db.query(BehavioralActivation).options(
+            load_only(BehavioralActivation.activity_category)
+        ).filter(
             BehavioralActivation.user_id == user_id,
             BehavioralActivation.created_at >= since_date,
             BehavioralActivation.completion_status == ActivityCompletionStatus.COMPLETED
-        ).all()
-        
-        categories = {}
-        for activity in activities:
-            category = activity.activity_category or "uncategorized"
-            categories[category] = categories.get(category, 0) + 1
+        ).yield_per(ANALYTICS_YIELD_PER)
         
-        return categories
+        return dict(Counter(a.activity_category or "uncategorized" for a in activities))
     
     def get_most_improving_activities(
         self,
@@ -306,14 +399,22 @@ class BehavioralActivationService:
         """
         since_date = datetime.utcnow() - timedelta(days=days)
         
-        activities = self.db.query(BehavioralActivation).filter(
+        activities = self.db.query(BehavioralActivation).options(
+            load_only(
+                BehavioralActivation.activity,
+                BehavioralActivation.activity_category,
+                BehavioralActivation.mood_before,
+                BehavioralActivation.mood_after,
+                BehavioralActivation.created_at
+            )
+        ).filter(
             BehavioralActivation.user_id == user_id,
             BehavioralActivation.created_at >= since_date,
             BehavioralActivation.completion_status == ActivityCompletionStatus.COMPLETED
-        ).all()
+        ).yield_per(ANALYTICS_YIELD_PER)
         
         # Filter activities with mood improvement
-        improving_activities = [
+        improving_activities = (
             {
                 "activity": a.activity,
                 "activity_category": a.activity_category,
@@ -324,16 +425,10 @@ class BehavioralActivationService:
             }
             for a in activities
             if a.mood_improvement and a.mood_improvement > 0
-        ]
-        
-        # Sort by improvement and return top N
-        sorted_activities = sorted(
-            improving_activities,
-            key=lambda x: x["improvement"],
-            reverse=True
         )
         
-        return sorted_activities[:limit]
+        # Keep only the top N by improvement while streaming
+        return heapq.nlargest(limit, improving_activities, key=lambda x: x["improvement"])
     
     def get_avoidance_patterns(
         self,
@@ -352,31 +447,44 @@ class BehavioralActivationService:
         """
         since_date = datetime.utcnow() - timedelta(days=days)
         
-        all_activities = self.db.query(BehavioralActivation).filter(
+        all_activities = self.db.query(BehavioralActivation).options(
+            load_only(
+                BehavioralActivation.completion_status,
+                BehavioralActivation.difficulty_rating,
+                BehavioralActivation.activity_category
+            )
+        ).filter(
             BehavioralActivation.user_id == user_id,
             BehavioralActivation.created_at >= since_date
-        ).all()
-        
-        skipped = [a for a in all_activities if a.completion_status == ActivityCompletionStatus.SKIPPED]
-        completed = [a for a in all_activities if a.completion_status == ActivityCompletionStatus.COMPLETED]
-        
-        # Analyze difficulty ratings of skipped activities
-        skipped_difficulties = [a.difficulty_rating for a in skipped if a.difficulty_rating]
-        avg_skip_difficulty = sum(skipped_difficulties) / len(skipped_difficulties) if skipped_difficulties else None
-        
-        # Analyze categories of skipped activities
-        skipped_categories = {}
-        for activity in skipped:
-            category = activity.activity_category or "uncategorized"
-            skipped_categories[category] = skipped_categories.get(category, 0) + 1
+        ).yield_per(ANALYTICS_YIELD_PER)
+        
+        # Single pass: status counts, skipped difficulty ratings and skipped categories.
+        # Enum members are singletons, so identity checks skip Enum.__eq__ per row.
+        skipped_status = ActivityCompletionStatus.SKIPPED
+        completed_status = ActivityCompletionStatus.COMPLETED
+        total = skipped = completed = 0
+        difficulty_sum = difficulty_count = 0
+        skipped_categories = Counter()
+        for a in all_activities:
+            total += 1
+            if a.completion_status is skipped_status:
+                skipped += 1
+                if a.difficulty_rating:
+                    difficulty_sum += a.difficulty_rating
+                    difficulty_count += 1
+                skipped_categories[a.activity_category or "uncategorized"] += 1
+            elif a.completion_status is completed_status:
+                completed += 1
+        
+        avg_skip_difficulty = difficulty_sum / difficulty_count if difficulty_count else None
         
         return {
-            "total_activities": len(all_activities),
-            "completed": len(completed),
-            "skipped": len(skipped),
-            "skip_rate": round(len(skipped) / len(all_activities) * 100, 1) if all_activities else 0,
+            "total_activities": total,
+            "completed": completed,
+            "skipped": skipped,
+            "skip_rate": round(skipped / total * 100, 1) if total else 0,
             "avg_skip_difficulty": round(avg_skip_difficulty, 2) if avg_skip_difficulty else None,
-            "skipped_categories": skipped_categories
+            "skipped_categories": dict(skipped_categories)
         }
     
     def suggest_activities(
@@ -396,44 +504,22 @@ class BehavioralActivationService:
         Returns:
             List of activity suggestions
         """
-        # Get past activities that improved mood
-        improving_activities = self.get_most_improving_activities(user_id, days=90, limit=20)
-        
-        # Suggest based on mood level
-        suggestions = []
+        # Get past activities that improved mood (cached per user)
+        improving_activities = _suggestion_history_cache.get(user_id)
+        if improving_activities is MISSING:
+            improving_activities = self.get_most_improving_activities(user_id, days=90, limit=20)
+            _suggestion_history_cache.set(user_id, improving_activities)
         
+        # Suggest based on mood level; copy the shared dicts so callers can't mutate them
         if mood <= 3:
             # Low mood - suggest gentle activities
-            gentle_activities = [
-                "Take a 5-minute walk outside",
-                "Listen to your favorite song",
-                "Drink a glass of water",
-                "Take 3 deep breaths",
-                "Pet an animal or look at cute animal pictures"
-            ]
-            suggestions.extend([{"activity": a, "reason": "Gentle boost"} for a in gentle_activities[:limit]])
-        
+            suggestions = [dict(s) for s in _GENTLE_SUGGESTIONS[:limit]]
         elif mood <= 6:
             # Medium mood - suggest moderate activities
-            moderate_activities = [
-                "Go for a 15-minute walk",
-                "Call a friend or family member",
-                "Do a quick stretch routine",
-                "Read a chapter of a book",
-                "Try a new recipe"
-            ]
-            suggestions.extend([{"activity": a, "reason": "Moderate engagement"} for a in moderate_activities[:limit]])
-        
+            suggestions = [dict(s) for s in _MODERATE_SUGGESTIONS[:limit]]
         else:
             # Good mood - suggest engaging activities
-            engaging_activities = [
-                "Exercise for 30 minutes",
-                "Work on a hobby project",
-                "Learn something new",
-                "Connect with friends",
-                "Tackle a small task you've been avoiding"
-            ]
-            suggestions.extend([{"activity": a, "reason": "Build on positivity"} for a in engaging_activities[:limit]])
+            suggestions = [dict(s) for s in _ENGAGING_SUGGESTIONS[:limit]]
         
         # Add personalized suggestions from past successful activities
         for activity in improving_activities[:limit]:
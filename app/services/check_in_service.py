@@ -5,16 +5,33 @@ Handles scheduled check-ins, progress collection, and mood/energy tracking.
 """
 
 import logging
+from collections import Counter
 from typing import List, Optional, Dict, Any
 from datetime import datetime, timedelta, date
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_, desc, func
+from sqlalchemy import and_, or_, desc, func, literal, select, union_all
 
+from app.core.cache import TTLCache, MISSING
 from app.models.goal import Goal, CheckIn
 from app.models.habit import Habit, HabitCompletion
+from app.services.goal_service import CHECK_IN_INTERVALS
 
 logger = logging.getLogger(__name__)
 
+# Goals don't store a check-in frequency yet, so most fall back to weekly
+DEFAULT_CHECK_IN_INTERVAL = CHECK_IN_INTERVALS['weekly']
+
+# Pending check-ins are polled by the dashboard, notifications and mobile app.
+# Only the ids of due items are cached (never ORM rows, which belong to the
+# session that loaded them); goal, habit and check-in writes invalidate it.
+PENDING_CHECK_INS_TTL_SECONDS = 30
+_pending_check_ins_cache = TTLCache(ttl_seconds=PENDING_CHECK_INS_TTL_SECONDS)
+
+
+def invalidate_pending_check_ins(user_id: str) -> None:
+    """Drop the cached pending check-ins after the user's goals, habits or check-ins change"""
+    _pending_check_ins_cache.pop(str(user_id))
+
 
 class CheckInService:
     """Service for managing scheduled check-ins and progress tracking"""
@@ -44,6 +61,17 @@ class CheckInService:
         Returns:
             Dictionary with due goals and habits
         """
+        cached = _pending_check_ins_cache.get(str(user_id))
+        if cached is not MISSING:
+            # Reload the due rows by primary key in this request's session
+            due_goals = self._load_by_ids(Goal, cached['due_goal_ids'], user_id)
+            due_habits = self._load_by_ids(Habit, cached['due_habit_ids'], user_id)
+            return {
+                'due_goals': due_goals,
+                'due_habits': due_habits,
+                'total_due': len(due_goals) + len(due_habits)
+            }
+        
         from app.services.goal_service import GoalService
         from app.services.habit_service import HabitService
         
@@ -59,20 +87,43 @@ class CheckInService:
         )
         
         # Filter goals that need check-in
+        now = datetime.utcnow()
+        last_check_ins = self._get_last_check_in_times(goals)
         due_goals = []
         for goal in goals:
-            if self._is_goal_due_for_check_in(goal):
+            interval = self._check_in_interval(goal)
+            if self._is_goal_due_for_check_in(goal, interval, now, last_check_ins.get(goal.id)):
                 due_goals.append(goal)
         
         # Get habits due today
         due_habits = self.habit_service.get_due_habits(user_id)
         
+        _pending_check_ins_cache.set(str(user_id), {
+            'due_goal_ids': tuple(g.id for g in due_goals),
+            'due_habit_ids': tuple(h.id for h in due_habits)
+        })
         return {
             'due_goals': due_goals,
             'due_habits': due_habits,
             'total_due': len(due_goals) + len(due_habits)
         }
     
+    def _load_by_ids(self, model, ids, user_id: str) -> List[Any]:
+        """Load the user's rows of model with the given ids, keeping the order of ids"""
+        if not ids:
+            return []
+        
+        rows = {
+            row.id: row
+            for row in self.db.query(model).filter(
+                and_(
+                    model.id.in_(ids),
+                    model.user_id == user_id
+                )
+            )
+        }
+        return [rows[i] for i in ids if i in rows]
+    
     def create_check_in(
         self,
         user_id: str,
@@ -174,19 +225,19 @@ class CheckInService:
         # Get completed today
         today_start = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
         
-        completed_habits = self.db.query(HabitCompletion).join(Habit).filter(
+        completed_habits_count = self.db.query(func.count(HabitCompletion.id)).join(Habit).filter(
             and_(
                 Habit.user_id == user_id,
                 HabitCompletion.completed_at >= today_start
             )
-        ).all()
+        ).scalar()
         
-        completed_goals = self.db.query(CheckIn).filter(
+        completed_goals_count = self.db.query(func.count(CheckIn.id)).filter(
             and_(
                 CheckIn.user_id == user_id,
                 CheckIn.created_at >= today_start
             )
-        ).all()
+        ).scalar()
         
         # Calculate overall progress
         all_goals = self.goal_service.get_user_goals(user_id)
@@ -201,17 +252,14 @@ class CheckInService:
             CheckIn.user_id == user_id
         ).order_by(desc(CheckIn.created_at)).limit(7).all()
         
-        mood_counts = {}
-        for ci in recent_moods:
-            if ci.mood:
-                mood_counts[ci.mood] = mood_counts.get(ci.mood, 0) + 1
+        mood_counts = dict(Counter(ci.mood for ci in recent_moods if ci.mood))
         
         return {
             'date': today_start.date().isoformat(),
             'pending_goals': len(pending['due_goals']),
             'pending_habits': len(pending['due_habits']),
-            'completed_goals_today': len(completed_goals),
-            'completed_habits_today': len(completed_habits),
+            'completed_goals_today': completed_goals_count,
+            'completed_habits_today': completed_habits_count,
             'total_active_goals': len(active_goals),
             'average_goal_progress': round(avg_progress, 1),
             'recent_moods': mood_counts,
@@ -228,56 +276,54 @@ class CheckInService:
         Returns:
             Dictionary with weekly trends
         """
-        from app.services.goal_service import GoalService
-        
-        if not self.goal_service:
-            self.goal_service = GoalService(self.db)
-        
         # Get data for last 7 days
-        week_ago = datetime.utcnow() - timedelta(days=7)
-        
-        # Goal check-ins per day
-        goal_check_ins = self.db.query(
-            func.date(CheckIn.created_at).label('date'),
-            func.count(CheckIn.id).label('count')
-        ).filter(
-            and_(
-                CheckIn.user_id == user_id,
-                CheckIn.created_at >= week_ago
-            )
-        ).group_by(func.date(CheckIn.created_at)).all()
-        
-        goal_trends = {str(row.date): row.count for row in goal_check_ins}
-        
-        # Habit completions per day
-        habit_completions = self.db.query(
-            func.date(HabitCompletion.completed_at).label('date'),
-            func.count(HabitCompletion.id).label('count')
-        ).join(Habit).filter(
-            and_(
-                Habit.user_id == user_id,
-                HabitCompletion.completed_at >= week_ago
-            )
-        ).group_by(func.date(HabitCompletion.completed_at)).all()
-        
-        habit_trends = {str(row.date): row.count for row in habit_completions}
-        
-        # Energy level trends
-        energy_data = self.db.query(
-            CheckIn.energy_level,
-            CheckIn.created_at
-        ).filter(
-            and_(
-                CheckIn.user_id == user_id,
-                CheckIn.created_at >= week_ago,
-                CheckIn.energy_level.isnot(None)
-            )
-        ).all()
-        
-        if energy_data:
-            avg_energy = sum(e[0] for e in energy_data) / len(energy_data)
-        else:
-            avg_energy = None
+        now = datetime.utcnow()
+        week_ago = now - timedelta(days=7)
+        
+        # Goal check-ins (with energy totals) and habit completions per day,
+        # fetched together in one round trip
+        goal_day = func.date(CheckIn.created_at)
+        goal_rows = select(
+            literal('goal').label('kind'),
+            goal_day.label('date'),
+            func.count(CheckIn.id).label('count'),
+            func.sum(CheckIn.energy_level).label('energy_sum'),
+            func.count(CheckIn.energy_level).label('energy_count')
+        ).where(
+            CheckIn.user_id == user_id,
+            CheckIn.created_at >= week_ago
+        ).group_by(goal_day)
+        
+        habit_day = func.date(HabitCompletion.completed_at)
+        habit_rows = select(
+            literal('habit').label('kind'),
+            habit_day.label('date'),
+            func.count(HabitCompletion.id).label('count'),
+            literal(None).label('energy_sum'),
+            literal(0).label('energy_count')
+        ).join(Habit).where(
+            Habit.user_id == user_id,
+            HabitCompletion.completed_at >= week_ago
+        ).group_by(habit_day)
+        
+        # Dense series: every day in the window is present, zero if idle
+        days = [
+            (week_ago.date() + timedelta(days=offset)).isoformat()
+            for offset in range((now.date() - week_ago.date()).days + 1)
+        ]
+        goal_trends = dict.fromkeys(days, 0)
+        habit_trends = dict.fromkeys(days, 0)
+        energy_sum = energy_count = 0
+        
+        for row in self.db.execute(union_all(goal_rows, habit_rows)):
+            if row.kind == 'goal':
+                goal_trends[str(row.date)] = row.count
+                energy_sum += row.energy_sum or 0
+                energy_count += row.energy_count
+            else:
+                habit_trends[str(row.date)] = row.count
+        
+        avg_energy = energy_sum / energy_count if energy_count else None
         
         return {
             'goal_check_in_trends': goal_trends,
@@ -307,9 +353,12 @@ class CheckInService:
             status='in_progress'
         )
         
+        now = datetime.utcnow()
+        last_check_ins = self._get_last_check_in_times(goals)
         overdue_goals = []
         for goal in goals:
-            if self._is_goal_overdue(goal):
+            interval = self._check_in_interval(goal)
+            if self._is_goal_overdue(goal, interval, now, last_check_ins.get(goal.id)):
                 overdue_goals.append(goal)
         
         # Get habits that are due today but not completed
@@ -320,7 +369,7 @@ class CheckInService:
         due_habits = self.habit_service.get_due_habits(user_id)
         
         # Filter out habits completed today
-        today_start = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+        today_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
         
         overdue_habits = []
         for habit in due_habits:
@@ -342,7 +391,35 @@ class CheckInService:
     
     # Helper methods
     
-    def _is_goal_due_for_check_in(self, goal: Goal) -> bool:
+    @staticmethod
+    def _check_in_interval(goal: Goal) -> int:
+        """Expected days between check-ins for a goal"""
+        return CHECK_IN_INTERVALS.get(
+            getattr(goal, 'check_in_frequency', None),
+            DEFAULT_CHECK_IN_INTERVAL
+        )
+    
+    def _get_last_check_in_times(self, goals: List[Goal]) -> Dict[Any, datetime]:
+        """Fetch the latest check-in time for each goal in one grouped query"""
+        if not goals:
+            return {}
+        
+        rows = self.db.query(
+            CheckIn.goal_id,
+            func.max(CheckIn.created_at)
+        ).filter(
+            CheckIn.goal_id.in_([goal.id for goal in goals])
+        ).group_by(CheckIn.goal_id).all()
+        
+        return {goal_id: last_at for goal_id, last_at in rows}
+    
+    def _is_goal_due_for_check_in(
+        self,
+        goal: Goal,
+        interval: int,
+        now: datetime,
+        last_check_in_at: Optional[datetime]
+    ) -> bool:
         """Check if a goal is due for check-in based on its frequency"""
         if goal.status == 'completed':
             return False
@@ -350,25 +427,22 @@ class CheckInService:
         if not goal.created_at:
             return True
         
-        # Get last check-in
-        last_check_in = self.db.query(CheckIn).filter(
-            CheckIn.goal_id == goal.id
-        ).order_by(desc(CheckIn.created_at)).first()
-        
-        if not last_check_in:
+        if not last_check_in_at:
             # Goals should have check-in within first day
-            return (datetime.utcnow() - goal.created_at).days >= 1
+            return (now - goal.created_at).days >= 1
         
         # Calculate days since last check-in
-        days_since_last = (datetime.utcnow() - last_check_in.created_at).days
-        
-        # Get expected interval based on check-in frequency
-        from app.services.goal_service import CHECK_IN_INTERVALS
-        interval = CHECK_IN_INTERVALS.get(goal.check_in_frequency, 7)
+        days_since_last = (now - last_check_in_at).days
         
         return days_since_last >= interval
     
-    def _is_goal_overdue(self, goal: Goal) -> bool:
+    def _is_goal_overdue(
+        self,
+        goal: Goal,
+        interval: int,
+        now: datetime,
+        last_check_in_at: Optional[datetime]
+    ) -> bool:
         """Check if a goal is overdue for check-in"""
         if goal.status == 'completed':
             return False
@@ -376,21 +450,12 @@ class CheckInService:
         if not goal.created_at:
             return False
         
-        # Get last check-in
-        last_check_in = self.db.query(CheckIn).filter(
-            CheckIn.goal_id == goal.id
-        ).order_by(desc(CheckIn.created_at)).first()
-        
-        if not last_check_in:
+        if not last_check_in_at:
             # Goals overdue if no check-in in 3 days
-            return (datetime.utcnow() - goal.created_at).days > 3
+            return (now - goal.created_at).days > 3
         
         # Calculate days since last check-in
-        days_since_last = (datetime.utcnow() - last_check_in.created_at).days
-        
-        # Get expected interval
-        from app.services.goal_service import CHECK_IN_INTERVALS
-        interval = CHECK_IN_INTERVALS.get(goal.check_in_frequency, 7)
+        days_since_last = (now - last_check_in_at).days
         
         # Overdue if past interval by more than 1 day
-        return days_since_last > (interval + 1)
\ No newline at end of file
+        return days_since_last > (interval + 1)
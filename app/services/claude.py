@@ -4,37 +4,27 @@ Handles communication with Anthropic's Claude API
 """
 
 import anthropic
+import asyncio
+import httpx
+import json
+import time
+from collections import deque
+from types import MappingProxyType
 from typing import List, Dict, Optional
 import logging
 
 from app.config import settings
 from app.models.message import Message
 from app.prompts.discovery_mode import get_discovery_prompt
+from app.services.semantic_response_cache import SemanticResponseCache, get_response_cache
 
 logger = logging.getLogger(__name__)
 
 
-class ClaudeService:
-    """Service for interacting with Claude API"""
-    
-    def __init__(self):
-        """Initialize Claude client"""
-        self.client = anthropic.Anthropic(api_key=settings.CLAUDE_API_KEY)
-        self.model = settings.CLAUDE_MODEL
-        self.max_tokens = settings.CLAUDE_MAX_TOKENS
-    
-    def _get_system_prompt(self, mode: str, silo_id: Optional[str] = None) -> str:
-        """
-        Get system prompt for specific personality mode
-        
-        Args:
-            mode: Personality mode identifier
-            
-        Returns:
-            System prompt string
-        """
-        prompts = {
-            "personal_friend": """You are a warm, empathetic personal friend. Your role is to:
+# Static personality prompts, built once at import.
+# Discovery mode is silo-specific and resolved per call.
+_PERSONALITY_PROMPTS = MappingProxyType({
+    "personal_friend": """You are a warm, empathetic personal friend. Your role is to:
 - Provide emotional support and companionship
 - Listen without judgment
 - Remember previous conversations and user preferences
@@ -44,8 +34,8 @@ class ClaudeService:
 - Create genuine emotional connections
 
 Tone: Warm, friendly, supportive, and conversational.""",
-            
-            "sales_agent": """You are an expert sales trainer specializing in NEBP (Neuro Emotional Bridge Programming). Your role is to:
+    
+    "sales_agent": """You are an expert sales trainer specializing in NEBP (Neuro Emotional Bridge Programming). Your role is to:
 - Role-play customer conversations
 - Teach NEBP methodology
 - Practice objection handling
@@ -54,8 +44,8 @@ Tone: Warm, friendly, supportive, and conversational.""",
 - Analyze sales scenarios
 
 Tone: Professional, constructive, motivating, and results-oriented.""",
-            
-            "student_tutor": """You are a patient, knowledgeable tutor. Your role is to:
+    
+    "student_tutor": """You are a patient, knowledgeable tutor. Your role is to:
 - Provide structured learning experiences
 - Grade performance on a 1-10 scale
 - Track learning progress
@@ -64,8 +54,8 @@ Tone: Professional, constructive, motivating, and results-oriented.""",
 - Provide encouragement and constructive feedback
 
 Tone: Patient, educational, encouraging, and clear.""",
-            
-            "kids_learning": """You are a fun, engaging teacher for young children. Your role is to:
+    
+    "kids_learning": """You are a fun, engaging teacher for young children. Your role is to:
 - Teach ABCs, numbers, colors, and shapes
 - Make learning fun and interactive
 - Use simple, age-appropriate language
@@ -74,8 +64,8 @@ Tone: Patient, educational, encouraging, and clear.""",
 - Encourage curiosity and exploration
 
 Tone: Enthusiastic, simple, encouraging, and playful.""",
-            
-            "christian_companion": """You are a faithful Christian companion. Your role is to:
+    
+    "christian_companion": """You are a faithful Christian companion. Your role is to:
 - Provide prayer support and guidance
 - Help with Bible study and scripture exploration
 - Assist with sermon preparation
@@ -84,8 +74,8 @@ Tone: Enthusiastic, simple, encouraging, and playful.""",
 - Provide faith-based encouragement
 
 Tone: Respectful, faith-centered, encouraging, and spiritually uplifting.""",
-            
-            "customer_service": """You are a professional customer service trainer. Your role is to:
+    
+    "customer_service": """You are a professional customer service trainer. Your role is to:
 - Practice difficult customer scenarios
 - Teach de-escalation techniques
 - Improve professional communication
@@ -94,8 +84,8 @@ Tone: Respectful, faith-centered, encouraging, and spiritually uplifting.""",
 - Build empathy and patience
 
 Tone: Professional, calm, empathetic, and solution-focused.""",
-            
-            "psychology_expert": """You are an emotionally intelligent psychology expert. Your role is to:
+    
+    "psychology_expert": """You are an emotionally intelligent psychology expert. Your role is to:
 - Practice deep listening and empathy
 - Support emotional processing
 - Teach stress management techniques
@@ -105,8 +95,8 @@ Tone: Professional, calm, empathetic, and solution-focused.""",
 
 Tone: Therapeutic, non-judgmental, empathetic, and supportive.
 Note: You are not a replacement for professional therapy.""",
-            
-            "business_mentor": """You are an experienced business mentor. Your role is to:
+    
+    "business_mentor": """You are an experienced business mentor. Your role is to:
 - Guide business growth and strategy
 - Provide LLC/Corp setup guidance
 - Analyze business financials
@@ -115,8 +105,8 @@ Note: You are not a replacement for professional therapy.""",
 - Connect to RankedCEO services when relevant
 
 Tone: Strategic, analytical, practical, and results-driven.""",
-            
-            "weight_loss_coach": """You are a motivational weight loss coach. Your role is to:
+    
+    "weight_loss_coach": """You are a motivational weight loss coach. Your role is to:
             - Set realistic health goals
             - Create personalized meal plans
             - Design workout routines
@@ -125,11 +115,114 @@ Tone: Strategic, analytical, practical, and results-driven.""",
             - Offer nutritional guidance
             - Maintain motivation
 
-            Tone: Motivational, supportive, health-focused, and encouraging.""",
-            "discovery_mode": get_discovery_prompt(silo_id)
-        }
+            Tone: Motivational, supportive, health-focused, and encouraging."""
+})
+
+
+# Keep-alive pool shared by every ClaudeService so each call reuses an open
+# TLS connection to the API instead of handshaking per request
+CLAUDE_HTTP_LIMITS = httpx.Limits(
+    max_connections=100,
+    max_keepalive_connections=20,
+    keepalive_expiry=85.0
+)
+_http_client: Optional[httpx.AsyncClient] = None
+
+# Caps in-flight Claude calls so a burst of users doesn't trip 429s
+_claude_semaphore = asyncio.Semaphore(settings.CLAUDE_MAX_CONCURRENCY)
+
+
+class TokenBudgetTracker:
+    """
+    Rolling one-minute token budget
+    
+    Records tokens used per call and makes new calls wait while the last
+    minute's usage is at or above the tokens-per-minute limit.
+    """
+    
+    WINDOW_SECONDS = 60.0
+    
+    def __init__(self, tokens_per_minute: int):
+        self.tokens_per_minute = tokens_per_minute
+        self._usage = deque()  # (timestamp, tokens)
+        self._total = 0
+    
+    def _prune(self, now: float) -> None:
+        while self._usage and now - self._usage[0][0] >= self.WINDOW_SECONDS:
+            _, tokens = self._usage.popleft()
+            self._total -= tokens
+    
+    async def wait_for_capacity(self) -> None:
+        """Sleep until the rolling usage drops below the limit"""
+        if self.tokens_per_minute <= 0:
+            return
         
-        return prompts.get(mode, prompts["personal_friend"])
+        while True:
+            now = time.monotonic()
+            self._prune(now)
+            if self._total < self.tokens_per_minute:
+                return
+            await asyncio.sleep(self.WINDOW_SECONDS - (now - self._usage[0][0]))
+    
+    def record(self, tokens: int) -> None:
+        """Record tokens consumed by a completed call"""
+        if self.tokens_per_minute <= 0:
+            return
+        
+        self._usage.append((time.monotonic(), tokens))
+        self._total += tokens
+
+
+_token_budget = TokenBudgetTracker(settings.CLAUDE_TOKENS_PER_MINUTE)
+
+# Batches usually finish well within an hour; no need to poll aggressively
+BATCH_POLL_INTERVAL_SECONDS = 30.0
+
+
+def _get_http_client() -> httpx.AsyncClient:
+    """Get the shared HTTP client, creating it on first use"""
+    global _http_client
+    
+    if _http_client is None or _http_client.is_closed:
+        _http_client = httpx.AsyncClient(limits=CLAUDE_HTTP_LIMITS)
+    return _http_client
+
+
+class ClaudeService:
+    """Service for interacting with Claude API"""
+    
+    def __init__(self, response_cache: Optional[SemanticResponseCache] = None):
+        """
+        Initialize Claude client
+        
+        Args:
+            response_cache: Optional semantic response cache (defaults to the shared one)
+        """
+        # Async client so in-flight requests don't block the event loop
+        # The SDK retries 429/5xx with exponential backoff and honors Retry-After
+        self.client = anthropic.AsyncAnthropic(
+            api_key=settings.CLAUDE_API_KEY,
+            http_client=_get_http_client(),
+            max_retries=settings.CLAUDE_MAX_RETRIES
+        )
+        self.model = settings.CLAUDE_MODEL
+        self.max_tokens = settings.CLAUDE_MAX_TOKENS
+        self.response_cache = response_cache or get_response_cache()
+    
+    def _get_system_prompt(self, mode: str, silo_id: Optional[str] = None) -> str:
+        """
+        Get system prompt for specific personality mode
+        
+        Args:
+            mode: Personality mode identifier
+            
+        Returns:
+            System prompt string
+        """
+        if mode == "discovery_mode":
+            return get_discovery_prompt(silo_id)
+        
+        return _PERSONALITY_PROMPTS.get(mode, _PERSONALITY_PROMPTS["personal_friend"])
     
     def _format_conversation_history(self, messages: List[Message]) -> List[Dict]:
         """
@@ -152,6 +245,82 @@ Tone: Strategic, analytical, practical, and results-driven.""",
         
         return formatted_messages
     
+    def _build_messages(
+        self,
+        message: str,
+        conversation_history: Optional[List[Message]] = None
+    ) -> List[Dict]:
+        """Format conversation history and append the current user message"""
+        messages = []
+        if conversation_history:
+            messages = self._format_conversation_history(conversation_history)
+        
+        messages.append({
+            "role": "user",
+            "content": message
+        })
+        return messages
+    
+    def _build_system_blocks(
+        self,
+        mode: str,
+        silo_id: Optional[str] = None,
+        memory_context: Optional[str] = None,
+        accountability_style: Optional[str] = None,
+        conversation_depth: Optional[float] = None
+    ) -> List[Dict]:
+        """
+        Build the system prompt as content blocks
+        
+        Args:
+            mode: Personality mode
+            silo_id: Optional discovery silo
+            memory_context: User's memory context
+            accountability_style: Accountability style (tactical, grace, analyst, adaptive)
+            conversation_depth: Current conversation depth (0.0-1.0)
+            
+        Returns:
+            System content blocks for the Messages API
+        """
+        # Static personality prompt first so it can be served from the prompt cache
+        system_blocks = [{
+            "type": "text",
+            "text": self._get_system_prompt(mode, silo_id=silo_id),
+            "cache_control": {"type": "ephemeral"}
+        }]
+        
+        # Per-user content goes in a trailing block to keep the cached prefix stable
+        dynamic_sections = []
+        
+        # Inject accountability style (Phase 3)
+        if accountability_style:
+            try:
+                from app.prompts.accountability_styles import get_accountability_prompt
+                accountability_prompt = get_accountability_prompt(accountability_style, conversation_depth)
+                dynamic_sections.append(f"""<accountability_style>
+{accountability_prompt}
+</accountability_style>
+
+Apply the accountability style above when providing support and guidance. Maintain consistency with this style throughout the conversation.""")
+            except Exception as e:
+                logger.error(f"Error loading accountability style: {e}")
+        
+        # Inject memory context
+        if memory_context:
+            dynamic_sections.append(f"""<user_memory>
+{memory_context}
+</user_memory>
+
+Use the user memory above to personalize your responses. Apply preferences naturally without explicitly mentioning them unless relevant to the conversation.""")
+        
+        if dynamic_sections:
+            system_blocks.append({
+                "type": "text",
+                "text": "\n\n".join(dynamic_sections)
+            })
+        
+        return system_blocks
+    
     async def get_response(
         self,
         message: str,
@@ -179,58 +348,58 @@ Tone: Strategic, analytical, practical, and results-driven.""",
             Dictionary with response content and metadata
         """
         try:
-            # Format conversation history
-            messages = []
-            if conversation_history:
-                messages = self._format_conversation_history(conversation_history)
-            
-            # Add current message
-            messages.append({
-                "role": "user",
-                "content": message
-            })
-            
-            # Get system prompt
-            system_prompt = self._get_system_prompt(mode, silo_id=silo_id)
+            # Only context-free turns are safe to answer from the semantic cache
+            cache_embedding = None
+            use_cache = (
+                self.response_cache is not None
+                and mode in settings.CLAUDE_RESPONSE_CACHE_MODES
+                and not conversation_history
+                and not memory_context
+                and not accountability_style
+            )
+            if use_cache:
+                cached_content, cache_embedding = await self.response_cache.lookup(mode, silo_id, message)
+                if cached_content is not None:
+                    return {
+                        "content": cached_content,
+                        "tokens_used": 0,
+                        "model": "cache"
+                    }
             
-            # Inject accountability style into system prompt (Phase 3)
-            if accountability_style:
-                try:
-                    from app.prompts.accountability_styles import get_accountability_prompt
-                    accountability_prompt = get_accountability_prompt(accountability_style, conversation_depth)
-                    system_prompt = f"""{system_prompt}
-
-<accountability_style>
-{accountability_prompt}
-</accountability_style>
-
-Apply the accountability style above when providing support and guidance. Maintain consistency with this style throughout the conversation."""
-                except Exception as e:
-                    logger.error(f"Error loading accountability style: {e}")
+            messages = self._build_messages(message, conversation_history)
             
-            # Inject memory context into system prompt
-            if memory_context:
-                system_prompt = f"""{system_prompt}
-
-<user_memory>
-{memory_context}
-</user_memory>
-
-Use the user memory above to personalize your responses. Apply preferences naturally without explicitly mentioning them unless relevant to the conversation."""
+            system_blocks = self._build_system_blocks(
+                mode,
+                silo_id=silo_id,
+                memory_context=memory_context,
+                accountability_style=accountability_style,
+                conversation_depth=conversation_depth
+            )
             
             # Call Claude API
-            response = self.client.messages.create(
-                model=self.model,
-                max_tokens=self.max_tokens,
-                system=system_prompt,
-                messages=messages
-            )
+            await _token_budget.wait_for_capacity()
+            async with _claude_semaphore:
+                response = await self.client.messages.create(
+                    model=self.model,
+                    max_tokens=self.max_tokens,
+                    system=system_blocks,
+                    messages=messages
+                )
             
             # Extract response
             content = response.content[0].text
             tokens_used = response.usage.input_tokens + response.usage.output_tokens
+            _token_budget.record(tokens_used)
+            
+            cache_read_tokens = getattr(response.usage, "cache_read_input_tokens", None) or 0
+            
+            logger.info(
+                f"Claude API response - Mode: {mode}, Tokens: {tokens_used}, "
+                f"Cache read tokens: {cache_read_tokens}"
+            )
             
-            logger.info(f"Claude API response - Mode: {mode}, Tokens: {tokens_used}")
+            if cache_embedding is not None:
+                self.response_cache.store(mode, silo_id, cache_embedding, content)
             
             return {
                 "content": content,
@@ -244,4 +413,128 @@ Use the user memory above to personalize your responses. Apply preferences natur
         
         except Exception as e:
             logger.error(f"Unexpected error in Claude service: {e}")
-            raise Exception(f"Error getting AI response: {str(e)}")
\ No newline at end of file
+            raise Exception(f"Error getting AI response: {str(e)}")
+
+    
+    # Message Batches (deferred, non-interactive work at half the token price)
+    
+    async def submit_batch(self, items: List[Dict]) -> str:
+        """
+        Submit non-urgent requests to the Message Batches API
+        
+        Args:
+            items: One dict per request with "custom_id", "message" and "mode",
+                plus any optional get_response keyword (conversation_history,
+                memory_context, accountability_style, conversation_depth, silo_id)
+            
+        Returns:
+            Batch ID to pass to poll_batch
+        """
+        requests = []
+        for item in items:
+            requests.append({
+                "custom_id": item["custom_id"],
+                "params": {
+                    "model": self.model,
+                    "max_tokens": self.max_tokens,
+                    "system": self._build_system_blocks(
+                        item["mode"],
+                        silo_id=item.get("silo_id"),
+                        memory_context=item.get("memory_context"),
+                        accountability_style=item.get("accountability_style"),
+                        conversation_depth=item.get("conversation_depth")
+                    ),
+                    "messages": self._build_messages(
+                        item["message"],
+                        item.get("conversation_history")
+                    )
+                }
+            })
+        
+        try:
+            batch = await self.client.post(
+                "/v1/messages/batches",
+                body={"requests": requests},
+                cast_to=object
+            )
+        except anthropic.APIError as e:
+            logger.error(f"Claude batch submit error: {e}")
+            raise Exception(f"Claude API error: {str(e)}")
+        
+        logger.info(f"Submitted Claude batch {batch['id']} with {len(requests)} requests")
+        return batch["id"]
+    
+    async def poll_batch(
+        self,
+        batch_id: str,
+        poll_interval: float = BATCH_POLL_INTERVAL_SECONDS
+    ) -> Dict[str, Dict]:
+        """
+        Wait for a batch to finish and collect its results
+        
+        Args:
+            batch_id: ID returned by submit_batch
+            poll_interval: Seconds between status checks
+            
+        Returns:
+            Mapping of custom_id to a get_response-style result dict,
+            or {"error": ...} for requests that did not succeed
+        """
+        try:
+            while True:
+                batch = await self.client.get(f"/v1/messages/batches/{batch_id}", cast_to=object)
+                if batch["processing_status"] == "ended":
+                    break
+                await asyncio.sleep(poll_interval)
+            
+            raw = await self.client.get(
+                f"/v1/messages/batches/{batch_id}/results",
+                cast_to=httpx.Response
+            )
+        except anthropic.APIError as e:
+            logger.error(f"Claude batch poll error: {e}")
+            raise Exception(f"Claude API error: {str(e)}")
+        
+        results = {}
+        for line in raw.text.splitlines():
+            if not line.strip():
+                continue
+            entry = json.loads(line)
+            result = entry["result"]
+            if result["type"] == "succeeded":
+                response = result["message"]
+                results[entry["custom_id"]] = {
+                    "content": response["content"][0]["text"],
+                    "tokens_used": response["usage"]["input_tokens"] + response["usage"]["output_tokens"],
+                    "model": response["model"]
+                }
+            else:
+                results[entry["custom_id"]] = {"error": result.get("error") or result["type"]}
+        
+        logger.info(f"Collected {len(results)} results from Claude batch {batch_id}")
+        return results
+
+_claude_service: Optional[ClaudeService] = None
+
+
+def get_claude_service() -> ClaudeService:
+    """
+    Get the process-wide ClaudeService
+    
+    Usable directly or as a FastAPI dependency.
+    """
+    global _claude_service
+    
+    if _claude_service is None:
+        _claude_service = ClaudeService()
+    return _claude_service
+
+
+async def close_claude_client() -> None:
+    """Close the shared HTTP connection pool (call on app shutdown)"""
+    global _http_client, _claude_service
+    
+    if _http_client is not None and not _http_client.is_closed:
+        await _http_client.aclose()
+    _http_client = None
+    _claude_service = None
@@ -7,7 +7,7 @@ that are older than a specified number of days.
 from datetime import datetime, timedelta
 from typing import Optional, Dict, Any
 from sqlalchemy.orm import Session
-from sqlalchemy import func, delete
+from sqlalchemy import func, delete, select
 import logging
 
 from app.models.conversation import Conversation
@@ -49,9 +49,11 @@ class ConversationCleanupService:
         """
         cutoff_date = self.get_cutoff_date()
         
-        count = db.query(Conversation).filter(
-            Conversation.updated_at < cutoff_date
-        ).count()
+        count = db.scalar(
+            select(func.count()).select_from(Conversation).where(
+                Conversation.updated_at < cutoff_date
+            )
+        )
         
         logger.info(f"Found {count} conversations older than {self.days_threshold} days")
         return count
@@ -75,6 +77,24 @@ class ConversationCleanupService:
         
         return conversations
     
+    @staticmethod
+    def _message_count_column():
+        """
+        Correlated count of a conversation's messages
+        
+        Conversation.message_count is a Python property that lazy-loads every
+        message, so the count is computed in SQL instead. In a DELETE ... RETURNING
+        it still sees the messages, because the cascade runs after the statement.
+        """
+        return select(func.count(Message.id)).where(
+            Message.conversation_id == Conversation.id
+        ).scalar_subquery().label("message_count")
+    
+    @classmethod
+    def _conversation_message_counts(cls, *criteria):
+        """Build a column-only query of (id, message_count) for matching conversations"""
+        return select(Conversation.id, cls._message_count_column()).where(*criteria)
+    
     def cleanup_old_conversations(
         self, 
         db: Session, 
@@ -105,49 +125,55 @@ class ConversationCleanupService:
         logger.info(f"Dry run: {dry_run}")
         
         while True:
-            # Get a batch of old conversations
-            old_conversations = db.query(Conversation).filter(
-                Conversation.updated_at < cutoff_date
-            ).limit(batch_size).all()
-            
-            if not old_conversations:
-                break
-            
-            # Count messages in this batch
-            batch_messages = sum(conv.message_count for conv in old_conversations)
-            
             if dry_run:
-                logger.info(f"Would delete {len(old_conversations)} conversations with {batch_messages} messages")
-                stats["total_deleted"] += len(old_conversations)
-                stats["total_messages_deleted"] += batch_messages
-                stats["batches_processed"] += 1
+                # Get ids and message counts for a batch of old conversations
+                old_conversations = db.execute(
+                    self._conversation_message_counts(
+                        Conversation.updated_at < cutoff_date
+                    ).limit(batch_size)
+                ).all()
                 
-                # In dry run, we break after first batch to avoid too much output
-                break
-            else:
-                # Delete conversations (cascade will handle messages)
-                conversation_ids = [conv.id for conv in old_conversations]
+                if not old_conversations:
+                    break
                 
-                # First delete messages manually to ensure proper cascade
-                db.query(Message).filter(
-                    Message.conversation_id.in_(conversation_ids)
-                ).delete(synchronize_session=False)
-                
-                # Then delete conversations
-                db.query(Conversation).filter(
-                    Conversation.id.in_(conversation_ids)
-                ).delete(synchronize_session=False)
-                
-                db.commit()
+                # Count messages in this batch
+                batch_messages = sum(row.message_count for row in old_conversations)
                 
+                logger.info(f"Would delete {len(old_conversations)} conversations with {batch_messages} messages")
                 stats["total_deleted"] += len(old_conversations)
                 stats["total_messages_deleted"] += batch_messages
                 stats["batches_processed"] += 1
                 
-                logger.info(
-                    f"Deleted batch {stats['batches_processed']}: "
-                    f"{len(old_conversations)} conversations, {batch_messages} messages"
-                )
+                # In dry run, we break after first batch to avoid too much output
+                break
+            
+            # Select the batch server-side and delete it in one statement;
+            # messages go with it through the ON DELETE CASCADE foreign key
+            batch_ids = select(Conversation.id).where(
+                Conversation.updated_at < cutoff_date
+            ).limit(batch_size)
+            
+            deleted = db.execute(
+                delete(Conversation).where(
+                    Conversation.id.in_(batch_ids)
+                ).returning(Conversation.id, self._message_count_column()),
+                execution_options={"synchronize_session": False}
+            ).all()
+            
+            db.commit()
+            
+            if not deleted:
+                break
+            
+            batch_messages = sum(row.message_count for row in deleted)
+            stats["total_deleted"] += len(deleted)
+            stats["total_messages_deleted"] += batch_messages
+            stats["batches_processed"] += 1
+            
+            logger.info(
+                f"Deleted batch {stats['batches_processed']}: "
+                f"{len(deleted)} conversations, {batch_messages} messages"
+            )
         
         logger.info(
             f"Cleanup complete. Total: {stats['total_deleted']} conversations, "
@@ -175,15 +201,17 @@ class ConversationCleanupService:
         """
         cutoff_date = self.get_cutoff_date()
         
-        old_conversations = db.query(Conversation).filter(
-            Conversation.user_id == user_id,
-            Conversation.updated_at < cutoff_date
+        old_conversations = db.execute(
+            self._conversation_message_counts(
+                Conversation.user_id == user_id,
+                Conversation.updated_at < cutoff_date
+            )
         ).all()
         
         stats = {
             "user_id": user_id,
             "total_deleted": len(old_conversations),
-            "total_messages_deleted": sum(conv.message_count for conv in old_conversations),
+            "total_messages_deleted": sum(row.message_count for row in old_conversations),
             "cutoff_date": cutoff_date.isoformat(),
             "dry_run": dry_run
         }
@@ -195,17 +223,13 @@ class ConversationCleanupService:
             )
         else:
             if old_conversations:
-                conversation_ids = [conv.id for conv in old_conversations]
+                conversation_ids = [row.id for row in old_conversations]
                 
-                # Delete messages first
-                db.query(Message).filter(
-                    Message.conversation_id.in_(conversation_ids)
-                ).delete(synchronize_session=False)
-                
-                # Delete conversations
-                db.query(Conversation).filter(
-                    Conversation.id.in_(conversation_ids)
-                ).delete(synchronize_session=False)
+                # Messages are removed by the ON DELETE CASCADE foreign key
+                db.execute(
+                    delete(Conversation).where(Conversation.id.in_(conversation_ids)),
+                    execution_options={"synchronize_session": False}
+                )
                 
                 db.commit()
                 
@@ -3,7 +3,10 @@ Core Variable Collection Service - Phase 2
 Guides AI in collecting core variables from users naturally
 """
 
-from typing import List, Dict, Optional
+import asyncio
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Any, List, Dict, Optional, Tuple
 from app.memory_config import (
     get_variable_config,
     get_core_variables,
@@ -11,10 +14,64 @@ from app.memory_config import (
     get_collection_questions_for_missing
 )
 from app.services.memory_service import MemoryService
+from app.core.cache import MISSING, TTLCache
 import logging
 
 logger = logging.getLogger(__name__)
 
+# A chat turn asks for the completion status several times; keep it briefly
+COMPLETION_STATUS_TTL_SECONDS = 30
+_completion_status_cache = TTLCache(COMPLETION_STATUS_TTL_SECONDS)
+
+
+def invalidate_completion_status(user_id: str) -> None:
+    """Drop the cached completion status (MemoryService calls this on every global memory write)"""
+    _completion_status_cache.pop(str(user_id))
+
+
+@lru_cache(maxsize=1)
+def _required_core_variable_count() -> int:
+    """Number of required core variables (static config; cache_clear() after reloading it)"""
+    return sum(1 for v in get_core_variables().values() if v.required)
+
+
+def _merge_nested(base: Any, overlay: Any) -> Any:
+    """Merge overlay into base where both are dicts; otherwise overlay wins"""
+    if not isinstance(base, dict) or not isinstance(overlay, dict):
+        return overlay
+    merged = dict(base)
+    for key, value in overlay.items():
+        merged[key] = _merge_nested(merged.get(key), value)
+    return merged
+
+
+# Order in which missing core variables are asked for
+_PRIORITY_ORDER = (
+    "user_profile.name",
+    "user_profile.preferred_name",
+    "user_profile.location",
+    "user_profile.timezone",
+    "communication_preferences.preferred_tone",
+    "communication_preferences.communication_style",
+    "communication_preferences.response_length_preference"
+)
+
+# Name-collection prompt per personality, built once at import.
+# The prompt never varies per call, so each entry is the finished string.
+_COLLECTION_PROMPTS = MappingProxyType({
+    "personal_friend": "By the way, what should I call you?",
+    "sales_agent": "Quick question - what name should I use for you?",
+    "student_tutor": "Before we continue, what should I call you?",
+    "kids_learning": "Hey, what's your name?",
+    "christian_companion": "I'd love to know your name so I can address you properly.",
+    "customer_service": "May I have your name for our conversation?",
+    "psychology_expert": "What would you like me to call you?",
+    "business_mentor": "What should I call you?",
+    "weight_loss_coach": "What's your name?"
+})
+_DEFAULT_COLLECTION_PROMPT = _COLLECTION_PROMPTS["personal_friend"]
+
+
 class CoreVariableCollector:
     """Service for collecting core variables from users"""
     
@@ -26,26 +83,45 @@ class CoreVariableCollector:
         Assess how complete the user's core variables are
         Returns completion percentage and missing variables
         """
+        cached = _completion_status_cache.get(str(user_id))
+        if cached is not MISSING:
+            return cached
+        
         global_memory = await self.memory_service.get_global_memory(user_id)
         missing_variables = get_missing_core_variables(global_memory)
         
-        total_core_vars = len([v for v in get_core_variables().values() if v.required])
+        total_core_vars = _required_core_variable_count()
         completed_vars = total_core_vars - len(missing_variables)
         completion_percentage = (completed_vars / total_core_vars * 100) if total_core_vars > 0 else 100
         
-        return {
+        status = {
             "completion_percentage": round(completion_percentage, 2),
             "completed_variables": completed_vars,
             "total_required_variables": total_core_vars,
             "missing_variables": missing_variables,
+            # Same variables as a set for membership checks; the list keeps JSON order
+            "missing_variables_set": frozenset(missing_variables),
             "is_complete": len(missing_variables) == 0
         }
+        _completion_status_cache.set(str(user_id), status)
+        return status
+    
+    def prefetch_status(self, user_id: str) -> "asyncio.Task[Dict]":
+        """
+        Start assessing completion status in the background
+        
+        Lets a caller overlap the memory read with other awaits (e.g. LLM depth
+        scoring) and pass the result on as status=await task. Only reuse the
+        result if nothing has written the user's global memory in between.
+        """
+        return asyncio.create_task(self.assess_completion_status(user_id))
     
     async def should_ask_for_core_variables(
         self, 
         user_id: str,
         message_count: int,
-        conversation_depth: float = 0.0
+        conversation_depth: float = 0.0,
+        status: Optional[Dict] = None
     ) -> bool:
         """
         Determine if we should ask for core variables
@@ -54,8 +130,11 @@ class CoreVariableCollector:
         - Don't ask if conversation is deep (user is engaged in serious topic)
         - Don't ask if completion > 50% (we have the basics)
         - Be very conservative to avoid feeling transactional
+        
+        Pass status from assess_completion_status to skip re-assessing.
         """
-        status = await self.assess_completion_status(user_id)
+        if status is None:
+            status = await self.assess_completion_status(user_id)
         
         # If we have at least 50% of info, don't ask
         if status["completion_percentage"] >= 50:
@@ -68,23 +147,65 @@ class CoreVariableCollector:
         # Only ask on message 2 or 3, and only if we're missing name
         if message_count in [2, 3]:
             # Check if name is missing
-            missing_name = "user_profile.name" in status["missing_variables"]
+            missing_name = "user_profile.name" in status["missing_variables_set"]
             if missing_name:
                 return True
         
         return False
     
+    async def evaluate_and_prompt(
+        self,
+        user_id: str,
+        personality: str,
+        message_count: int,
+        conversation_depth: float = 0.0,
+        status: Optional[Dict] = None
+    ) -> Tuple[bool, Optional[str], Optional[str]]:
+        """
+        Decide whether to ask, build the prompt, and pick the next variable
+        from a single completion assessment
+        
+        Pass status (e.g. from prefetch_status) to skip the assessment.
+        
+        Returns:
+            Tuple of (should_ask, collection prompt or None, next priority variable or None)
+        """
+        if status is None:
+            status = await self.assess_completion_status(user_id)
+        next_variable = await self.get_next_priority_variable(user_id, status=status)
+        
+        should_ask = await self.should_ask_for_core_variables(
+            user_id,
+            message_count,
+            conversation_depth,
+            status=status
+        )
+        if not should_ask:
+            return False, None, next_variable
+        
+        prompt = await self.generate_collection_prompt(
+            user_id,
+            personality,
+            message_count,
+            status=status
+        )
+        return True, prompt, next_variable
+    
     async def generate_collection_prompt(
         self, 
         user_id: str,
         personality: str,
-        message_count: int = 0
+        message_count: int = 0,
+        status: Optional[Dict] = None
     ) -> Optional[str]:
         """
         Generate a natural prompt to collect missing core variables
         Returns None if we shouldn't ask
+        
+        Pass status from assess_completion_status to skip re-assessing.
         """
-        status = await self.assess_completion_status(user_id)
+        if status is None:
+            status = await self.assess_completion_status(user_id)
         
         if not status["missing_variables"]:
             return None
@@ -96,118 +217,70 @@ class CoreVariableCollector:
             return None
         
         # Generate personality-appropriate collection prompt
-        prompt = self._generate_personality_prompt(
-            personality,
-            missing_questions,
-            message_count
-        )
-        
-        return prompt
+        return self._generate_personality_prompt(personality)
     
-    def _generate_personality_prompt(
-        self,
-        personality: str,
-        questions: List[str],
-        message_count: int
-    ) -> str:
+    def _generate_personality_prompt(self, personality: str) -> str:
         """
         Generate a personality-appropriate prompt for collecting variables
         Keep it natural and conversational, not like a form
         """
-        personality_prompts = {
-            "personal_friend": {
-                "casual": "By the way, what should I call you?"
-            },
-            "sales_agent": {
-                "casual": "Quick question - what name should I use for you?"
-            },
-            "student_tutor": {
-                "casual": "Before we continue, what should I call you?"
-            },
-            "kids_learning": {
-                "casual": "Hey, what's your name?"
-            },
-            "christian_companion": {
-                "casual": "I'd love to know your name so I can address you properly."
-            },
-            "customer_service": {
-                "casual": "May I have your name for our conversation?"
-            },
-            "psychology_expert": {
-                "casual": "What would you like me to call you?"
-            },
-            "business_mentor": {
-                "casual": "What should I call you?"
-            },
-            "weight_loss_coach": {
-                "casual": "What's your name?"
-            }
-        }
-        
-        # Get personality-specific prompt
-        persona = personality_prompts.get(personality, personality_prompts["personal_friend"])
-        
         # Just ask for name in a natural way
         # Don't ask multiple questions at once - it's overwhelming
-        return persona["casual"]
+        return _COLLECTION_PROMPTS.get(personality, _DEFAULT_COLLECTION_PROMPT)
     
     async def mark_as_collected(self, user_id: str, variable_path: str, value: any):
         """
         Mark a core variable as collected and store its value
         """
-        parts = variable_path.split('.')
-        category = parts[0]
-        
-        # Build nested structure
-        if len(parts) == 2:
-            key = parts[1]
-            await self.memory_service.update_global_memory(
-                user_id=user_id,
-                category=category,
-                key=key,
-                value=value
-            )
-        elif len(parts) == 3:
-            key = parts[1]
-            subkey = parts[2]
-            await self.memory_service.update_global_memory(
-                user_id=user_id,
-                category=category,
-                key=key,
-                value={subkey: value}
-            )
-        elif len(parts) == 4:
-            key = parts[1]
-            subkey = parts[2]
-            subsubkey = parts[3]
-            await self.memory_service.update_global_memory(
-                user_id=user_id,
-                category=category,
-                key=key,
-                value={subkey: {subsubkey: value}}
-            )
-        
-        logger.info(f"Core variable collected: {variable_path} = {value} for user {user_id}")
+        await self.mark_many_as_collected(user_id, [(variable_path, value)])
     
-    async def get_next_priority_variable(self, user_id: str) -> Optional[str]:
+    async def mark_many_as_collected(self, user_id: str, updates: List[Tuple[str, Any]]):
+        """
+        Mark several core variables as collected with a single memory write
+        
+        Args:
+            user_id: User ID
+            updates: (variable_path, value) pairs, e.g. ("user_profile.name", "Sam")
+        """
+        merged: Dict[str, Dict[str, Any]] = {}
+        for variable_path, value in updates:
+            parts = variable_path.split('.')
+            if len(parts) < 2:
+                continue
+            
+            # Fold the path tail into a nested payload, e.g. a.b.c.d -> {c: {d: value}}
+            category, key, *rest = parts
+            payload = value
+            for part in reversed(rest):
+                payload = {part: payload}
+            
+            fields = merged.setdefault(category, {})
+            fields[key] = _merge_nested(fields.get(key), payload)
+        
+        if not merged:
+            return
+        
+        await self.memory_service.bulk_update_global_memory(user_id=user_id, updates=merged)
+        for variable_path, value in updates:
+            logger.info(f"Core variable collected: {variable_path} = {value} for user {user_id}")
+    
+    async def get_next_priority_variable(
+        self,
+        user_id: str,
+        status: Optional[Dict] = None
+    ) -> Optional[str]:
         """
         Get the next highest-priority variable to collect
         Priority: name > preferred_name > location > timezone > communication preferences
-        """
-        status = await self.assess_completion_status(user_id)
         
-        priority_order = [
-            "user_profile.name",
-            "user_profile.preferred_name",
-            "user_profile.location",
-            "user_profile.timezone",
-            "communication_preferences.preferred_tone",
-            "communication_preferences.communication_style",
-            "communication_preferences.response_length_preference"
-        ]
+        Pass status from assess_completion_status to skip re-assessing.
+        """
+        if status is None:
+            status = await self.assess_completion_status(user_id)
         
-        for var_path in priority_order:
-            if var_path in status["missing_variables"]:
+        missing = status["missing_variables_set"]
+        for var_path in _PRIORITY_ORDER:
+            if var_path in missing:
                 return var_path
         
         return None
\ No newline at end of file
@@ -2,8 +2,9 @@
 Conversation depth state manager with inertia and decay
 """
 
-from datetime import datetime
+from datetime import datetime, timedelta
 import logging
+import time
 from app.config import settings
 
 logger = logging.getLogger(__name__)
@@ -28,9 +29,31 @@ class ConversationDepthEngine:
             last_updated_at: When depth was last updated (defaults to now)
         """
         self.depth = max(0.0, min(1.0, initial_depth))
-        self.last_updated_at = last_updated_at or datetime.utcnow()
         
-        logger.debug(f"Initialized DepthEngine with depth={self.depth:.2f}")
+        # Read the wall clock once; elapsed time afterwards is monotonic float math
+        self._anchor_wall = datetime.utcnow()
+        self._anchor_monotonic = time.monotonic()
+        self._last_updated_monotonic = self._anchor_monotonic
+        if last_updated_at is not None:
+            self._last_updated_monotonic -= (self._anchor_wall - last_updated_at).total_seconds()
+        
+        logger.debug("Initialized DepthEngine with depth=%.2f", self.depth)
+    
+    @property
+    def last_updated_at(self) -> datetime:
+        """When depth was last updated (wall clock)"""
+        return self._anchor_wall + timedelta(
+            seconds=self._last_updated_monotonic - self._anchor_monotonic
+        )
+    
+    def _decayed_at(self, now: float) -> float:
+        """Stored depth with decay applied up to monotonic time now (no writes)"""
+        return max(0.0, self.depth - settings.DEPTH_DECAY_RATE * (now - self._last_updated_monotonic))
+    
+    def _set(self, depth: float, now: float) -> None:
+        """Store a new depth together with the monotonic time it was taken"""
+        self.depth = depth
+        self._last_updated_monotonic = now
     
     def update(self, turn_score: float) -> float:
         """
@@ -42,49 +65,37 @@ class ConversationDepthEngine:
         Returns:
             New depth value after update
         """
-        now = datetime.utcnow()
-        elapsed_seconds = (now - self.last_updated_at).total_seconds()
-        
-        old_depth = self.depth
+        now = time.monotonic()
         
         # Apply temporal decay first
-        decay_amount = settings.DEPTH_DECAY_RATE * elapsed_seconds
-        self.depth = max(0.0, self.depth - decay_amount)
-        
-        if decay_amount > 0:
-            logger.debug(f"Applied decay: {old_depth:.2f} -> {self.depth:.2f} ({elapsed_seconds:.1f}s elapsed)")
+        decayed = self._decayed_at(now)
         
-        # Asymmetric inertia - different speeds for going up vs down
-        if turn_score > self.depth:
-            # Going deeper - use faster alpha
-            alpha = settings.DEPTH_UP_ALPHA
-            direction = "deeper"
-        else:
-            # Coming back up - use slower alpha
-            alpha = settings.DEPTH_DOWN_ALPHA
-            direction = "lighter"
+        # Asymmetric inertia - faster going deeper, slower coming back up
+        going_deeper = turn_score > decayed
+        alpha = settings.DEPTH_UP_ALPHA if going_deeper else settings.DEPTH_DOWN_ALPHA
+        new_depth = decayed + alpha * (turn_score - decayed)
         
-        # Update depth with inertia
-        old_depth_before_update = self.depth
-        self.depth += alpha * (turn_score - self.depth)
+        # %-style arguments: logging only formats them when the level is enabled
+        if decayed != self.depth:
+            logger.debug(
+                "Applied decay: %.2f -> %.2f (%.1fs elapsed)",
+                self.depth, decayed, now - self._last_updated_monotonic
+            )
         
         # Clamp to valid range
-        self.depth = max(0.0, min(1.0, self.depth))
-        
-        self.last_updated_at = now
+        self._set(0.0 if new_depth < 0.0 else (1.0 if new_depth > 1.0 else new_depth), now)
         
         logger.info(
-            f"Depth update: {old_depth_before_update:.2f} -> {self.depth:.2f} "
-            f"(turn_score={turn_score:.2f}, direction={direction}, alpha={alpha})"
+            "Depth update: %.2f -> %.2f (turn_score=%.2f, direction=%s, alpha=%s)",
+            decayed, self.depth, turn_score, "deeper" if going_deeper else "lighter", alpha
         )
         
         return self.depth
     
     def reset(self):
         """Reset depth to 0"""
-        logger.info(f"Resetting depth from {self.depth:.2f} to 0.0")
-        self.depth = 0.0
-        self.last_updated_at = datetime.utcnow()
+        logger.info("Resetting depth from %.2f to 0.0", self.depth)
+        self._set(0.0, time.monotonic())
     
     def get_depth(self) -> float:
         """
@@ -93,14 +104,7 @@ class ConversationDepthEngine:
         Returns:
             Current depth value with decay
         """
-        now = datetime.utcnow()
-        elapsed_seconds = (now - self.last_updated_at).total_seconds()
-        
-        # Apply decay without updating state
-        decay_amount = settings.DEPTH_DECAY_RATE * elapsed_seconds
-        decayed_depth = max(0.0, self.depth - decay_amount)
-        
-        return decayed_depth
+        return self._decayed_at(time.monotonic())
     
     def get_state(self) -> dict:
         """
@@ -109,9 +113,10 @@ class ConversationDepthEngine:
         Returns:
             Dictionary with depth, last_updated, and decay info
         """
-        now = datetime.utcnow()
-        elapsed_seconds = (now - self.last_updated_at).total_seconds()
-        current_depth = self.get_depth()
+        # One clock read so elapsed time and decay agree
+        now = time.monotonic()
+        elapsed_seconds = now - self._last_updated_monotonic
+        current_depth = self._decayed_at(now)
         
         return {
             'stored_depth': self.depth,
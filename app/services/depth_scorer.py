@@ -2,14 +2,133 @@
 Hybrid depth scoring service using heuristics + LLM
 """
 
-from typing import Dict, Optional
+import asyncio
+from collections import Counter, namedtuple
+from typing import Awaitable, Callable, Dict, List, Optional, Set, Tuple
+import hashlib
+import json
 import re
 import logging
+from app.core.cache import MISSING, TTLCache
 from app.services.groq_service import GroqService
 from app.config import settings
 
 logger = logging.getLogger(__name__)
 
+# Repeated phrases ("thanks, that helps") skip the LLM for an hour
+LLM_SCORE_CACHE_TTL_SECONDS = 3600
+LLM_SCORE_CACHE_MAX_ENTRIES = 10_000
+
+# Heuristic weight per match and cap for each signal category
+_Bucket = namedtuple("_Bucket", "per_match cap")
+_SCORE_BUCKETS = {
+    'first_person': _Bucket(0.05, 0.3),  # First-person reflection density
+    'emotion': _Bucket(0.1, 0.3),  # Emotion vocabulary
+    'introspective': _Bucket(0.1, 0.3),  # Introspective language
+    'question': _Bucket(0.1, 0.1)  # Question depth (any match)
+}
+
+# Fallback parsers for LLM replies that wrap the score(s) in prose
+_NUMBER_RE = re.compile(r'\d+\.?\d*')
+_JSON_LIST_RE = re.compile(r'\[.*\]', re.DOTALL)
+
+
+def _trie_pattern(words) -> str:
+    """
+    Build a regex for a set of literals shaped like a prefix trie
+    
+    re tries alternatives one by one, so a flat 'anxious|afraid|...' re-reads
+    the same prefix for every word; factoring shared prefixes means each
+    character is examined once per position, close to a compiled automaton.
+    """
+    trie: Dict[str, dict] = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[''] = {}
+    
+    def render(node: Dict[str, dict]) -> str:
+        ends_here = '' in node
+        branches = [re.escape(char) + render(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ''
+        body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+        if ends_here:
+            # Longest match first: the optional tail is greedy
+            body = body + '?' if len(branches) == 1 and len(body) == 1 else '(?:' + body + ')?'
+        return body
+    
+    return render(trie)
+
+
+def _compile_word_list(words) -> re.Pattern:
+    """Compile a word list into one whole-word, prefix-factored alternation"""
+    return re.compile(r'\b(?:' + _trie_pattern(words) + r')\b')
+
+
+class _ScoringBatcher:
+    """
+    Coalesces concurrent LLM scoring requests into batched calls
+    
+    Messages submitted within max_delay of each other (up to max_batch)
+    are scored together; each caller awaits only its own result.
+    Batches are kept per user tier because the tier selects the model.
+    """
+    
+    def __init__(
+        self,
+        score_batch: Callable[[List[str], Optional[str]], Awaitable[List[Optional[float]]]],
+        max_batch: int = 8,
+        max_delay: float = 0.03
+    ):
+        self.score_batch = score_batch
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self._pending: Dict[Optional[str], List[Tuple[str, asyncio.Future]]] = {}
+        self._timers: Dict[Optional[str], asyncio.TimerHandle] = {}
+        # The loop only holds weak references to tasks; keep in-flight batches alive
+        self._tasks: Set[asyncio.Task] = set()
+    
+    async def submit(self, message: str, user_tier: Optional[str] = None) -> Optional[float]:
+        """Queue a message for scoring and wait for its score"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        pending = self._pending.setdefault(user_tier, [])
+        pending.append((message, future))
+        
+        if len(pending) >= self.max_batch:
+            self._flush(user_tier)
+        elif user_tier not in self._timers:
+            self._timers[user_tier] = loop.call_later(self.max_delay, self._flush, user_tier)
+        
+        return await future
+    
+    def _flush(self, user_tier: Optional[str]) -> None:
+        """Send everything pending for a tier as one batch"""
+        timer = self._timers.pop(user_tier, None)
+        if timer is not None:
+            timer.cancel()
+        batch = self._pending.pop(user_tier, [])
+        if batch:
+            task = asyncio.get_running_loop().create_task(self._run(batch, user_tier))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+    
+    async def _run(self, batch: List[Tuple[str, asyncio.Future]], user_tier: Optional[str]) -> None:
+        """Score a batch and hand each caller its result"""
+        try:
+            scores = await self.score_batch([message for message, _ in batch], user_tier)
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        
+        for (_, future), score in zip(batch, scores):
+            if not future.done():
+                future.set_result(score)
+
 
 class DepthScorer:
     """Scores conversation turns for emotional/introspective depth"""
@@ -23,6 +142,10 @@ class DepthScorer:
             r'\bI\'m\b', r'\bI am\b', r'\bmy\b', r'\bme\b',
             r'\bI\'ve\b', r'\bI have\b', r'\bI\'d\b', r'\bI would\b'
         ]
+        # One alternation so a message is scanned once instead of once per pattern
+        self._first_person_re = re.compile(
+            '|'.join(self.first_person_patterns), re.IGNORECASE
+        )
         
         # Emotion vocabulary
         self.emotion_words = [
@@ -41,6 +164,33 @@ class DepthScorer:
             'journey', 'growth', 'change', 'transform', 'heal',
             'understand', 'realize', 'discover', 'learn', 'reflect'
         ]
+        
+        # Question openers that signal depth
+        self.deep_questions = ['why', 'how do i', 'what should i', 'how can i']
+        
+        # All three lists share one scan; each term maps back to its categories
+        self._term_categories = {}
+        for category, words in (
+            ('emotion', self.emotion_words),
+            ('introspective', self.introspective_words),
+            ('question', self.deep_questions)
+        ):
+            for word in words:
+                self._term_categories.setdefault(word, []).append(category)
+        self._vocabulary_re = _compile_word_list(self._term_categories)
+        
+        # Cheap gate for whether a long message says anything about the user
+        self._personal_signal_re = re.compile(r"\b(?:i|i'm|my|me|why|how)\b|\?", re.IGNORECASE)
+        
+        # LLM scores keyed by message digest, so raw messages are not retained
+        self._llm_cache = TTLCache(LLM_SCORE_CACHE_TTL_SECONDS, maxsize=LLM_SCORE_CACHE_MAX_ENTRIES)
+        
+        # Concurrent LLM scoring requests share calls
+        self._batcher = _ScoringBatcher(
+            self._llm_score_batch,
+            max_batch=settings.DEPTH_LLM_BATCH_MAX_SIZE,
+            max_delay=settings.DEPTH_LLM_BATCH_MAX_DELAY_MS / 1000
+        )
     
     async def score_turn(
         self,
@@ -65,7 +215,7 @@ class DepthScorer:
         """
         # Skip very short messages
         if len(user_message) < settings.DEPTH_MIN_MESSAGE_LENGTH:
-            logger.debug(f"Message too short ({len(user_message)} chars), skipping depth scoring")
+            logger.debug("Message too short (%d chars), skipping depth scoring", len(user_message))
             return {
                 'score': 0.0,
                 'source': 'heuristic',
@@ -75,25 +225,33 @@ class DepthScorer:
         
         # Calculate heuristic score
         heuristic_score = self._heuristic_score(user_message)
-        logger.debug(f"Heuristic score: {heuristic_score:.2f}")
+        logger.debug("Heuristic score: %.2f", heuristic_score)
         
         # Decide if we need LLM refinement
-        use_llm = (
+        # Near-zero scores on shorter messages and near-max scores are settled;
+        # the LLM is only worth its round trip in the ambiguous middle
+        saturated = (
+            heuristic_score >= 0.9 or
+            (heuristic_score <= 0.05 and len(user_message) < 200)
+        )
+        # Long messages only go to the LLM when they carry some personal signal;
+        # long impersonal requests ("summarize the history of...") stay heuristic
+        use_llm = not saturated and (
             heuristic_score > settings.DEPTH_LLM_THRESHOLD or
-            len(user_message) > 120
+            (len(user_message) > 120 and self._personal_signal_re.search(user_message) is not None)
         )
         
         if use_llm:
-            logger.info(f"Using LLM scorer (heuristic={heuristic_score:.2f}, length={len(user_message)})")
+            logger.info("Using LLM scorer (heuristic=%.2f, length=%d)", heuristic_score, len(user_message))
             llm_score = await self._llm_score(user_message, user_tier=user_tier)
             final_score = 0.6 * heuristic_score + 0.4 * llm_score
             source = 'llm'
-            logger.info(f"LLM score: {llm_score:.2f}, Final: {final_score:.2f}")
+            logger.info("LLM score: %.2f, Final: %.2f", llm_score, final_score)
         else:
             llm_score = None
             final_score = heuristic_score
             source = 'heuristic'
-            logger.debug(f"Using heuristic only: {final_score:.2f}")
+            logger.debug("Using heuristic only: %.2f", final_score)
         
         return {
             'score': max(0.0, min(1.0, final_score)),
@@ -112,41 +270,23 @@ class DepthScorer:
         Returns:
             Score from 0.0 to 1.0
         """
-        message_lower = message.lower()
-        score = 0.0
+        # Whole words only ('hard' no longer matches 'hardly'); each word counts once
+        counts = Counter()
+        for term in set(self._vocabulary_re.findall(message.lower())):
+            counts.update(self._term_categories[term])
         
-        # 1. First-person reflection density (0-0.3)
-        first_person_count = sum(
-            len(re.findall(pattern, message_lower, re.IGNORECASE))
-            for pattern in self.first_person_patterns
-        )
-        first_person_score = min(0.3, first_person_count * 0.05)
-        score += first_person_score
-        
-        # 2. Emotion vocabulary (0-0.3)
-        emotion_count = sum(
-            1 for word in self.emotion_words
-            if word in message_lower
-        )
-        emotion_score = min(0.3, emotion_count * 0.1)
-        score += emotion_score
-        
-        # 3. Introspective language (0-0.3)
-        introspective_count = sum(
-            1 for word in self.introspective_words
-            if word in message_lower
-        )
-        introspective_score = min(0.3, introspective_count * 0.1)
-        score += introspective_score
+        # First-person phrases count every occurrence
+        counts['first_person'] = len(self._first_person_re.findall(message))
         
-        # 4. Question depth (0-0.1)
-        deep_questions = ['why', 'how do i', 'what should i', 'how can i']
-        if any(q in message_lower for q in deep_questions):
-            score += 0.1
+        contributions = {
+            category: min(bucket.cap, counts[category] * bucket.per_match)
+            for category, bucket in _SCORE_BUCKETS.items()
+        }
+        score = sum(contributions.values())
         
         logger.debug(
-            f"Heuristic breakdown - First-person: {first_person_score:.2f}, "
-            f"Emotion: {emotion_score:.2f}, Introspective: {introspective_score:.2f}"
+            "Heuristic breakdown - First-person: %.2f, Emotion: %.2f, Introspective: %.2f",
+            contributions['first_person'], contributions['emotion'], contributions['introspective']
         )
         
         return min(1.0, score)
@@ -155,20 +295,59 @@ class DepthScorer:
         """
         Use LLM to score message depth
         
+        Scores are cached per message; concurrent misses are batched
+        into a single LLM request.
+        
         Args:
             message: User message to score
             
         Returns:
             Score from 0.0 to 1.0
         """
-        prompt = f"""Rate the emotional or introspective depth of the following user message.
+        key = (user_tier, hashlib.blake2b(message.encode(), digest_size=16).digest())
+        score = self._llm_cache.get(key)
+        if score is not MISSING:
+            return score
+        
+        score = await self._batcher.submit(message, user_tier)
+        if score is None:
+            # Fail closed - return conservative score (not cached)
+            return 0.5
+        
+        self._llm_cache.set(key, score)
+        return score
+    
+    async def _llm_score_batch(self, messages: List[str], user_tier: Optional[str] = None) -> List[Optional[float]]:
+        """
+        Score one or more messages with a single LLM call
+        
+        Args:
+            messages: User messages to score
+            
+        Returns:
+            One score from 0.0 to 1.0 per message, in order (None if scoring failed)
+        """
+        if len(messages) == 1:
+            prompt = f"""Rate the emotional or introspective depth of the following user message.
 0.0 = casual or transactional
 1.0 = deeply introspective or vulnerable
 
 User message:
-"{message}"
+"{messages[0]}"
 
 Respond with only a number between 0.0 and 1.0."""
+        else:
+            numbered = "\n".join(
+                f"{i}. {json.dumps(message)}" for i, message in enumerate(messages, 1)
+            )
+            prompt = f"""Rate the emotional or introspective depth of each numbered user message.
+0.0 = casual or transactional
+1.0 = deeply introspective or vulnerable
+
+User messages:
+{numbered}
+
+Respond with only a JSON list of {len(messages)} numbers between 0.0 and 1.0, in the same order."""
 
         try:
             response = await self.groq.get_response(
@@ -181,21 +360,45 @@ Respond with only a number between 0.0 and 1.0."""
             # Extract number from response
             content = response['content'].strip()
             
-            # Try to extract just the number
-            # Handle responses like "0.75" or "The depth is 0.75"
-            import re
-            number_match = re.search(r'(\d+\.?\d*)', content)
-            if number_match:
-                score = float(number_match.group(1))
+            if len(messages) == 1:
+                # The prompt asks for just the number, so try that first
+                # and only search responses like "The depth is 0.75"
+                try:
+                    scores = [float(content)]
+                except ValueError:
+                    number_match = _NUMBER_RE.search(content)
+                    if number_match is None:
+                        raise ValueError(f"no score in LLM response: {content[:50]!r}")
+                    scores = [float(number_match.group(0))]
             else:
-                score = float(content)
+                # Handle responses with text around the list
+                list_match = _JSON_LIST_RE.search(content)
+                scores = [float(score) for score in json.loads(list_match.group(0) if list_match else content)]
+                if len(scores) != len(messages):
+                    raise ValueError(f"expected {len(messages)} scores, got {len(scores)}")
             
             # Clamp to valid range
-            score = max(0.0, min(1.0, score))
-            logger.info(f"LLM scored message as {score:.2f}")
-            return score
+            scores = [max(0.0, min(1.0, score)) for score in scores]
+            logger.info("LLM scored %d message(s): %s", len(messages), scores)
+            return scores
             
         except Exception as e:
-            # Fail closed - return conservative score
             logger.error(f"LLM scoring failed: {e}, using fallback score 0.5")
-            return 0.5
\ No newline at end of file
+            return [None] * len(messages)
+
+
+_depth_scorer: Optional[DepthScorer] = None
+
+
+def get_depth_scorer() -> DepthScorer:
+    """
+    Get the process-wide DepthScorer
+    
+    Compiles the heuristic patterns once and shares the LLM score cache and
+    batcher across requests. Usable directly or as a FastAPI dependency.
+    """
+    global _depth_scorer
+    
+    if _depth_scorer is None:
+        _depth_scorer = DepthScorer()
+    return _depth_scorer
@@ -4,13 +4,174 @@ Implements LLM-first validation and contextual understanding for name and intent
 Replaces simple regex matching with AI-driven extraction and engagement assessment.
 """
 
-import json
+import asyncio
 import logging
-from typing import Dict, Optional, Tuple
-from groq import Groq
+import math
+import threading
+import time
+from collections import deque
+from functools import partial
+from operator import mul
+from typing import Any, Awaitable, Callable, Deque, Dict, Hashable, List, Optional, Tuple
+import orjson
+from groq import AsyncGroq
+
+from app.config import settings
+from app.core.cache import MISSING, TTLCache
 
 logger = logging.getLogger(__name__)
 
+# Each single-check JSON schema fits in ~100 output tokens; the fused one in ~300
+DISCOVERY_SINGLE_CHECK_MAX_TOKENS = 150
+DISCOVERY_TURN_ANALYSIS_MAX_TOKENS = 400
+
+# Caps in-flight Groq validations so a burst of sessions stays below the
+# concurrency where throughput collapses and 429s start
+_discovery_semaphore = asyncio.Semaphore(settings.DISCOVERY_LLM_MAX_CONCURRENCY)
+
+# Heuristic fallbacks cost ~6.5us per KB of input; a thread hop costs ~90us.
+# Only inputs past this size are worth moving off the event loop.
+FALLBACK_OFFLOAD_MIN_CHARS = 16_384
+
+# Discovery inputs repeat a lot ("hi", "idk", common first names); parsed
+# LLM verdicts for an identical input and context are reused for an hour
+VALIDATION_CACHE_TTL_SECONDS = 3600
+VALIDATION_CACHE_MAX_ENTRIES = 10_000
+
+# Near-duplicate inputs ("I need help with anxiety" / "struggling with anxiety")
+# reuse a verdict when their embeddings are at least this similar
+SEMANTIC_CACHE_THRESHOLD = 0.92
+SEMANTIC_CACHE_MAX_ENTRIES = 256
+
+# Async callable returning the embedding of a text
+EmbeddingFn = Callable[[str], Awaitable[List[float]]]
+
+# (expires_at, unit-length embedding, parsed verdict)
+_SemanticEntry = Tuple[float, List[float], Dict[str, any]]
+
+# Parses raw model output into a verdict, or None if it holds no valid JSON
+_VerdictParser = Callable[[str], Optional[Dict[str, any]]]
+
+# Sent ahead of every validation prompt; with JSON mode on, Groq guarantees
+# the reply is one syntactically valid JSON object
+JSON_ONLY_SYSTEM_PROMPT = "Respond ONLY with a single JSON object. No prose, no markdown."
+
+# Static instructions for each validation, sent as the system message. Only the
+# user input and its context vary per call and go last, in the user message,
+# so every call shares an identical prefix that Groq's prompt cache can reuse.
+NAME_VALIDATION_SYSTEM_PROMPT = JSON_ONLY_SYSTEM_PROMPT + """
+
+You are an expert at understanding human communication.
+Your task: Determine if the user's input is a plausible name.
+
+Analyze the input and respond with a JSON object:
+{
+  "is_name": <true if plausible name, false if greeting/nonsense/sentence>,
+  "extracted_name": "<the name if is_name is true, otherwise null>",
+  "is_correction": <true if correcting previous name>,
+  "input_type": "<one of: name | greeting | nonsense | sentence | playful_nonsense>",
+  "confidence": <0.0 to 1.0>,
+  "contextual_response": "<how to respond if NOT a name - warm, conversational, no length validation mentioned>"
+}
+
+Examples of contextual responses:
+- For "Skinna marinka...": "That's a catchy tune! But I'd love to know what to actually call you. What's your name?"
+- For "Hey there": "Hey! Great to connect. What's your name?"
+- For "ABC": "Got it - those are your initials. What's your full first name I can use?"
+
+DO NOT focus on length. Focus on: Is this person actually giving me their name?"""
+
+INTENT_VALIDATION_SYSTEM_PROMPT = JSON_ONLY_SYSTEM_PROMPT + """
+
+You are an expert at understanding human needs and intentions.
+Your task: Determine if the user's input reveals their intent/reason for seeking help.
+
+Respond with a JSON object:
+{
+  "is_intent": <true if valid intent detected>,
+  "extracted_intent": "<specific reason they're here, or null>",
+  "intent_category": "<one of: emotional_health | productivity | relationships | health_fitness | learning | career | other>",
+  "confidence": <0.0 to 1.0>,
+  "contextual_response": "<how to respond if NOT a clear intent - warm follow-up>"
+}
+
+A valid intent is when the user indicates WHY they're here:
+- "I need help with anxiety"
+- "I want to improve my confidence"
+- "I'm struggling with stress management"
+
+An invalid intent is:
+- Generic responses that don't indicate need: "I don't know" "Maybe?" "Whatever"
+- Deflections: "Ask me later" "Not sure yet"
+- Nonsense: "Purple elephants" "The moon is round"
+
+Be conversational in contextual_response - no templates."""
+
+ENGAGEMENT_ASSESSMENT_SYSTEM_PROMPT = JSON_ONLY_SYSTEM_PROMPT + """
+
+You are an expert at assessing genuine user engagement vs. time-wasting behavior.
+Your task: Determine if this user is honestly trying, playfully engaging, or clearly not trying.
+
+Respond with a JSON object:
+{
+  "is_engaged": <true if user is making genuine attempt>,
+  "is_honest_attempt": <true if struggling but genuinely trying>,
+  "is_non_engagement": <true if clearly wasting time>,
+  "strike_weight": <1-3: 1=minor/playful, 2=dismissive but recoverable, 3=severe/clear time-wasting>,
+  "engagement_pattern": "<one of: genuine | playful | dismissive | clearly_not_trying | spam>",
+  "recommendation": "<specific instruction for the AI on how to respond>"
+}
+
+Guidance:
+- "Skinna marinka..." on turn 1 = playful (weight: 1, honest_attempt: true)
+- "lol" "idk" "whatever" = dismissive (weight: 2, honest_attempt: false)
+- Completely random strings or clear spam = not trying (weight: 3)
+- But if they tried in previous turns and now playing = weight: 1
+- Consistent nonsense after 2+ turns = weight: 3
+
+DO NOT be rigid. Context matters. A joke on turn 1 might be fine,
+but the same pattern on turn 3 suggests they're not engaging."""
+
+TURN_ANALYSIS_SYSTEM_PROMPT = JSON_ONLY_SYSTEM_PROMPT + """
+
+You are an expert at understanding human communication, needs and engagement.
+Your task: Analyze one user message in three ways at once.
+
+Respond with a single JSON object with exactly these three keys:
+{
+  "name": {
+    "is_name": <true if plausible name, false if greeting/nonsense/sentence>,
+    "extracted_name": "<the name if is_name is true, otherwise null>",
+    "is_correction": <true if correcting the previously captured name>,
+    "input_type": "<one of: name | greeting | nonsense | sentence | playful_nonsense>",
+    "confidence": <0.0 to 1.0>,
+    "contextual_response": "<how to respond if NOT a name - warm, conversational, no length validation mentioned>"
+  },
+  "intent": {
+    "is_intent": <true if the user indicates WHY they're here>,
+    "extracted_intent": "<specific reason they're here, or null>",
+    "intent_category": "<one of: emotional_health | productivity | relationships | health_fitness | learning | career | other>",
+    "confidence": <0.0 to 1.0>,
+    "contextual_response": "<how to respond if NOT a clear intent - warm follow-up>"
+  },
+  "engagement": {
+    "is_engaged": <true if user is making genuine attempt>,
+    "is_honest_attempt": <true if struggling but genuinely trying>,
+    "is_non_engagement": <true if clearly wasting time>,
+    "strike_weight": <1-3: 1=minor/playful, 2=dismissive but recoverable, 3=severe/clear time-wasting>,
+    "engagement_pattern": "<one of: genuine | playful | dismissive | clearly_not_trying | spam>",
+    "recommendation": "<specific instruction for the AI on how to respond>"
+  }
+}
+
+Guidance:
+- Names: DO NOT focus on length. Is this person actually giving me their name?
+- Intent: generic replies ("I don't know", "Maybe?"), deflections and nonsense are not intents.
+- Engagement: "lol" "idk" "whatever" = dismissive (weight 2); random strings or spam = weight 3;
+  a joke on turn 1 might be fine, but the same pattern on turn 3 suggests they're not engaging.
+
+Be conversational in contextual responses - no templates."""
+
 
 class DiscoveryExtractionService:
     """
@@ -23,18 +184,235 @@ class DiscoveryExtractionService:
     - Dynamic persona-driven responses
     """
     
-    def __init__(self, groq_api_key: Optional[str] = None):
+    # Heuristic fallback vocabularies, built once. Matched as plain substrings
+    # of the lowercased input: on long inputs a few str.__contains__ scans beat
+    # a regex alternation, which has no literal prefix to skip ahead with.
+    _NOT_A_NAME_KEYWORDS = ("help", "need", "want", "struggling")
+    _INTENT_KEYWORDS = ("help", "need", "want", "struggling", "working on", "interested in", "dealing")
+    _NONSENSE_REPLIES = frozenset({"lol", "idk", "whatever", "bye"})
+    _NONSENSE_MAX_CHARS = max(map(len, _NONSENSE_REPLIES))
+    
+    # Groq clients shared by every instance, keyed by API key and created on
+    # first use, so extra instances (tests, alt config) don't each build an
+    # HTTP client and TLS context
+    _clients: Dict[str, AsyncGroq] = {}
+    _clients_lock = threading.Lock()
+    
+    def __init__(
+        self,
+        groq_api_key: Optional[str] = None,
+        embedding_fn: Optional[EmbeddingFn] = None
+    ):
         """
         Initialize the extraction service.
         
         Args:
             groq_api_key: API key for Groq. If None, will attempt to use environment variable.
+            embedding_fn: Optional async text -> embedding callable. When set, intent and
+                engagement checks reuse verdicts for semantically similar inputs.
         """
         import os
         key = groq_api_key or os.getenv("GROQ_API_KEY")
         if not key:
             raise ValueError("GROQ_API_KEY not provided and not in environment")
-        self.client = Groq(api_key=key)
+        self._api_key = key
+        self._validation_cache = TTLCache(VALIDATION_CACHE_TTL_SECONDS, VALIDATION_CACHE_MAX_ENTRIES)
+        self.cache_hits = 0
+        self.cache_misses = 0
+        # Groq prompt-cache totals, to confirm the static system prompts are reused
+        self.prompt_tokens = 0
+        self.cached_prompt_tokens = 0
+        self.embedding_fn = embedding_fn
+        self._semantic_buckets: Dict[Hashable, Deque[_SemanticEntry]] = {}
+        # Validations currently awaiting Groq, keyed like the exact cache
+        self._inflight: Dict[Hashable, "asyncio.Future[Optional[Dict[str, any]]]"] = {}
+    
+    @property
+    def client(self) -> AsyncGroq:
+        """Shared async Groq client for this API key (async so a round-trip doesn't block the loop)"""
+        client = self._clients.get(self._api_key)
+        if client is None:
+            with self._clients_lock:
+                client = self._clients.get(self._api_key)
+                if client is None:
+                    client = AsyncGroq(api_key=self._api_key)
+                    self._clients[self._api_key] = client
+        return client
+    
+    def _cache_get(self, key: Hashable) -> Optional[Dict[str, any]]:
+        """Return a copy of the cached verdict for key, or None on a miss"""
+        cached = self._validation_cache.get(key)
+        if cached is MISSING:
+            self.cache_misses += 1
+            return None
+        self.cache_hits += 1
+        logger.debug(
+            "Discovery validation cache hit (%s) - Hits: %d, Misses: %d",
+            key[0], self.cache_hits, self.cache_misses
+        )
+        # Callers may mutate the result, so hand out a copy
+        return dict(cached)
+    
+    async def _semantic_lookup(
+        self,
+        bucket_key: Hashable,
+        user_input: str
+    ) -> Tuple[Optional[Dict[str, any]], Optional[List[float]]]:
+        """
+        Find a verdict stored for a semantically similar input
+        
+        Returns:
+            Tuple of (copy of the cached verdict or None, input embedding or None).
+            Pass the embedding to _semantic_store() on a miss to avoid re-embedding.
+        """
+        if self.embedding_fn is None:
+            return None, None
+        
+        try:
+            vector = await self.embedding_fn(user_input)
+        except Exception as e:
+            logger.warning(f"Error embedding discovery input: {e}")
+            return None, None
+        
+        norm = math.sqrt(sum(map(mul, vector, vector)))
+        if not norm:
+            return None, None
+        embedding = [v / norm for v in vector]
+        
+        bucket = self._semantic_buckets.get(bucket_key)
+        best_score = 0.0
+        best_verdict = None
+        if bucket:
+            now = time.monotonic()
+            # Entries are appended in expiry order, so expired ones are at the left
+            while bucket and bucket[0][0] <= now:
+                bucket.popleft()
+            for _, cached_embedding, verdict in bucket:
+                score = sum(map(mul, embedding, cached_embedding))
+                if score > best_score:
+                    best_score, best_verdict = score, verdict
+        
+        if best_verdict is not None and best_score >= SEMANTIC_CACHE_THRESHOLD:
+            logger.debug("Discovery semantic cache hit (%s) - Similarity: %.3f", bucket_key[0], best_score)
+            return dict(best_verdict), embedding
+        return None, embedding
+    
+    def _semantic_store(
+        self,
+        bucket_key: Hashable,
+        embedding: Optional[List[float]],
+        verdict: Dict[str, any]
+    ) -> None:
+        """Store a verdict under the embedding of the input that produced it"""
+        if embedding is None:
+            return
+        bucket = self._semantic_buckets.setdefault(bucket_key, deque(maxlen=SEMANTIC_CACHE_MAX_ENTRIES))
+        bucket.append((time.monotonic() + VALIDATION_CACHE_TTL_SECONDS, embedding, verdict))
+    
+    async def _request_verdict(
+        self,
+        system_prompt: str,
+        prompt: str,
+        max_tokens: int,
+        parse: _VerdictParser
+    ) -> Optional[Dict[str, any]]:
+        """Send static instructions plus the per-call prompt to Groq and parse the reply"""
+        async with _discovery_semaphore:
+            response = await self.client.chat.completions.create(
+                model=settings.DISCOVERY_EXTRACTION_MODEL,
+                messages=[
+                    {
+                        "role": "system",
+                        "content": system_prompt
+                    },
+                    {
+                        "role": "user",
+                        "content": prompt
+                    }
+                ],
+                # Deterministic classifications, so cached verdicts match fresh ones
+                temperature=0.0,
+                max_tokens=max_tokens,
+                response_format={"type": "json_object"}
+            )
+        self._record_prompt_cache_usage(getattr(response, "usage", None))
+        return parse(response.choices[0].message.content)
+    
+    def _record_prompt_cache_usage(self, usage: Optional[Any]) -> None:
+        """Accumulate prompt and prefix-cached token counts from a Groq response"""
+        if usage is None:
+            return
+        prompt = getattr(usage, "prompt_tokens", 0) or 0
+        details = getattr(usage, "prompt_tokens_details", None)
+        cached = (getattr(details, "cached_tokens", 0) or 0) if details is not None else 0
+        
+        self.prompt_tokens += prompt
+        self.cached_prompt_tokens += cached
+        logger.debug(
+            "Groq prompt cache: %d/%d tokens cached this call, %.1f%% overall",
+            cached, prompt,
+            100.0 * self.cached_prompt_tokens / self.prompt_tokens if self.prompt_tokens else 0.0
+        )
+    
+    async def _single_flight(
+        self,
+        key: Hashable,
+        request: Callable[[], Awaitable[Optional[Dict[str, any]]]]
+    ) -> Optional[Dict[str, any]]:
+        """
+        Run request() unless an identical validation is already in flight
+        
+        Concurrent sessions sending the same input in the same context (e.g. a
+        burst of "hi") share one Groq round-trip. If the shared request raises,
+        waiters get the same exception, so every caller takes its error path.
+        None means the reply was unparseable (or the owner was cancelled).
+        """
+        pending = self._inflight.get(key)
+        if pending is not None:
+            # shield: a cancelled waiter must not cancel the shared request
+            verdict = await asyncio.shield(pending)
+            return dict(verdict) if verdict is not None else None
+        
+        pending = asyncio.get_running_loop().create_future()
+        self._inflight[key] = pending
+        try:
+            verdict = await request()
+        except Exception as e:
+            pending.set_exception(e)
+            # Mark it retrieved so asyncio doesn't log it when nobody was waiting
+            pending.exception()
+            raise
+        except BaseException:
+            pending.set_result(None)
+            raise
+        else:
+            pending.set_result(verdict)
+            return verdict
+        finally:
+            del self._inflight[key]
+    
+    async def _run_fallback(
+        self,
+        fallback: Callable[..., Dict[str, any]],
+        user_input: str,
+        *args
+    ) -> Dict[str, any]:
+        """Run a heuristic fallback inline, or in a worker thread for very long inputs"""
+        if len(user_input) < FALLBACK_OFFLOAD_MIN_CHARS:
+            return fallback(user_input, *args)
+        return await asyncio.to_thread(fallback, user_input, *args)
+    
+    @staticmethod
+    def _normalize_input(user_input: str) -> str:
+        """Cache-key form of a user input"""
+        return user_input.strip().lower()
+    
+    async def prewarm(self) -> None:
+        """Open a pooled connection to Groq ahead of the first real validation."""
+        try:
+            await self.client.models.list()
+        except Exception as e:
+            logger.warning(f"Discovery extraction prewarm failed: {e}")
     
     async def validate_and_extract_name(
         self,
@@ -58,31 +436,33 @@ class DiscoveryExtractionService:
             - contextual_response: str - how to respond (if not a name)
             - confidence: float - confidence score (0.0-1.0)
         """
+        cache_key = ("name", self._normalize_input(user_input), previous_name)
+        cached = self._cache_get(cache_key)
+        if cached is not None:
+            return cached
+        
         prompt = self._build_name_validation_prompt(user_input, previous_name)
         
         try:
-            response = self.client.messages.create(
-                model="mixtral-8x7b-32768",  # Using Groq's fast model
-                messages=[
-                    {
-                        "role": "user",
-                        "content": prompt
-                    }
-                ],
-                temperature=0.7,
-                max_tokens=300
+            parsed = await self._single_flight(
+                cache_key,
+                partial(
+                    self._request_verdict,
+                    NAME_VALIDATION_SYSTEM_PROMPT,
+                    prompt,
+                    DISCOVERY_SINGLE_CHECK_MAX_TOKENS,
+                    self._parse_name_validation_response
+                )
             )
-            
-            result_text = response.choices[0].message.content.strip()
-            
-            # Parse LLM response
-            parsed = self._parse_name_validation_response(result_text, user_input)
-            return parsed
+            if parsed is None:
+                return await self._run_fallback(self._fallback_name_validation, user_input, previous_name)
+            self._validation_cache.set(cache_key, parsed)
+            return dict(parsed)
             
         except Exception as e:
             logger.error(f"Error in name validation: {e}")
             # Fallback: basic validation
-            return self._fallback_name_validation(user_input, previous_name)
+            return await self._run_fallback(self._fallback_name_validation, user_input, previous_name)
     
     async def validate_and_extract_intent(
         self,
@@ -105,28 +485,39 @@ class DiscoveryExtractionService:
             - contextual_response: str - how to respond
             - confidence: float - confidence score (0.0-1.0)
         """
+        cache_key = ("intent", self._normalize_input(user_input), captured_name)
+        cached = self._cache_get(cache_key)
+        if cached is not None:
+            return cached
+        
+        semantic_key = ("intent", captured_name)
+        cached, embedding = await self._semantic_lookup(semantic_key, user_input)
+        if cached is not None:
+            self._validation_cache.set(cache_key, cached)
+            return cached
+        
         prompt = self._build_intent_validation_prompt(user_input, captured_name)
         
         try:
-            response = self.client.messages.create(
-                model="mixtral-8x7b-32768",
-                messages=[
-                    {
-                        "role": "user",
-                        "content": prompt
-                    }
-                ],
-                temperature=0.7,
-                max_tokens=300
+            parsed = await self._single_flight(
+                cache_key,
+                partial(
+                    self._request_verdict,
+                    INTENT_VALIDATION_SYSTEM_PROMPT,
+                    prompt,
+                    DISCOVERY_SINGLE_CHECK_MAX_TOKENS,
+                    self._parse_intent_validation_response
+                )
             )
-            
-            result_text = response.choices[0].message.content.strip()
-            parsed = self._parse_intent_validation_response(result_text, user_input)
-            return parsed
+            if parsed is None:
+                return await self._run_fallback(self._fallback_intent_validation, user_input)
+            self._validation_cache.set(cache_key, parsed)
+            self._semantic_store(semantic_key, embedding, parsed)
+            return dict(parsed)
             
         except Exception as e:
             logger.error(f"Error in intent validation: {e}")
-            return self._fallback_intent_validation(user_input)
+            return await self._run_fallback(self._fallback_intent_validation, user_input)
     
     async def assess_engagement_quality(
         self,
@@ -153,6 +544,24 @@ class DiscoveryExtractionService:
                 - 3 = severe (user is clearly wasting time)
             - recommendation: str - how to respond
         """
+        # The prompt only shows the last 3 previous inputs, so only they key the cache
+        cache_key = (
+            "engagement",
+            self._normalize_input(user_input),
+            conversation_turn,
+            tuple(previous_inputs[-3:]) if previous_inputs else ()
+        )
+        cached = self._cache_get(cache_key)
+        if cached is not None:
+            return cached
+        
+        # Same context as the exact key, minus the input itself
+        semantic_key = ("engagement", conversation_turn, cache_key[3])
+        cached, embedding = await self._semantic_lookup(semantic_key, user_input)
+        if cached is not None:
+            self._validation_cache.set(cache_key, cached)
+            return cached
+        
         prompt = self._build_engagement_assessment_prompt(
             user_input,
             conversation_turn,
@@ -160,91 +569,121 @@ class DiscoveryExtractionService:
         )
         
         try:
-            response = self.client.messages.create(
-                model="mixtral-8x7b-32768",
-                messages=[
-                    {
-                        "role": "user",
-                        "content": prompt
-                    }
-                ],
-                temperature=0.5,  # Lower temp for more consistent assessment
-                max_tokens=400
+            parsed = await self._single_flight(
+                cache_key,
+                partial(
+                    self._request_verdict,
+                    ENGAGEMENT_ASSESSMENT_SYSTEM_PROMPT,
+                    prompt,
+                    DISCOVERY_SINGLE_CHECK_MAX_TOKENS,
+                    self._parse_engagement_response
+                )
             )
-            
-            result_text = response.choices[0].message.content.strip()
-            parsed = self._parse_engagement_response(result_text)
-            return parsed
+            if parsed is None:
+                return await self._run_fallback(self._fallback_engagement_assessment, user_input)
+            self._validation_cache.set(cache_key, parsed)
+            self._semantic_store(semantic_key, embedding, parsed)
+            return dict(parsed)
             
         except Exception as e:
             logger.error(f"Error in engagement assessment: {e}")
-            return self._fallback_engagement_assessment(user_input)
+            return await self._run_fallback(self._fallback_engagement_assessment, user_input)
+    
+    async def analyze_turn(
+        self,
+        user_input: str,
+        previous_name: Optional[str] = None,
+        conversation_turn: int = 1,
+        previous_inputs: Optional[list] = None
+    ) -> Dict[str, Dict[str, any]]:
+        """
+        Run name, intent and engagement checks for one user turn in a single LLM call.
+        
+        Equivalent to awaiting validate_and_extract_name, validate_and_extract_intent
+        and assess_engagement_quality back-to-back, but with one Groq round-trip
+        instead of three. Each section also fills the matching single-check cache.
+        
+        Args:
+            user_input: Current user message
+            previous_name: Name captured so far (correction and intent context)
+            conversation_turn: Which turn of conversation (1, 2, 3...)
+            previous_inputs: List of previous user inputs
+            
+        Returns:
+            Dictionary with "name", "intent" and "engagement" keys, each holding
+            the dict the corresponding single-check method returns
+        """
+        normalized = self._normalize_input(user_input)
+        recent_inputs = tuple(previous_inputs[-3:]) if previous_inputs else ()
+        cache_keys = {
+            "name": ("name", normalized, previous_name),
+            "intent": ("intent", normalized, previous_name),
+            "engagement": ("engagement", normalized, conversation_turn, recent_inputs)
+        }
+        fallbacks = {
+            "name": (self._fallback_name_validation, previous_name),
+            "intent": (self._fallback_intent_validation,),
+            "engagement": (self._fallback_engagement_assessment,)
+        }
+        
+        cached = {section: self._cache_get(key) for section, key in cache_keys.items()}
+        if all(verdict is not None for verdict in cached.values()):
+            return cached
+        
+        prompt = self._build_turn_analysis_prompt(
+            user_input,
+            previous_name,
+            conversation_turn,
+            previous_inputs
+        )
+        
+        try:
+            parsed = await self._single_flight(
+                ("turn", normalized, previous_name, conversation_turn, recent_inputs),
+                partial(
+                    self._request_verdict,
+                    TURN_ANALYSIS_SYSTEM_PROMPT,
+                    prompt,
+                    DISCOVERY_TURN_ANALYSIS_MAX_TOKENS,
+                    self._parse_turn_analysis_response
+                )
+            )
+        except Exception as e:
+            logger.error(f"Error in turn analysis: {e}")
+            parsed = None
+        
+        result = {}
+        for section, key in cache_keys.items():
+            verdict = cached[section] or (parsed or {}).get(section)
+            if verdict is None:
+                fallback, *args = fallbacks[section]
+                result[section] = await self._run_fallback(fallback, user_input, *args)
+                continue
+            self._validation_cache.set(key, verdict)
+            result[section] = dict(verdict)
+        return result
     
     def _build_name_validation_prompt(
         self,
         user_input: str,
         previous_name: Optional[str] = None
     ) -> str:
-        """Build prompt for name validation."""
+        """Build the per-call part of the name validation prompt."""
         correction_context = ""
         if previous_name:
             correction_context = f"\nPreviously captured name was: '{previous_name}'\nDetermine if user is correcting this."
         
-        return f"""You are an expert at understanding human communication. 
-Your task: Determine if the user's input is a plausible name.
-
-User input: "{user_input}"{correction_context}
-
-Analyze this input and respond with a JSON object:
-{{
-  "is_name": <true if plausible name, false if greeting/nonsense/sentence>,
-  "extracted_name": "<the name if is_name is true, otherwise null>",
-  "is_correction": <true if correcting previous name>,
-  "input_type": "<one of: name | greeting | nonsense | sentence | playful_nonsense>",
-  "confidence": <0.0 to 1.0>,
-  "contextual_response": "<how to respond if NOT a name - warm, conversational, no length validation mentioned>"
-}}
-
-Examples of contextual responses:
-- For "Skinna marinka...": "That's a catchy tune! But I'd love to know what to actually call you. What's your name?"
-- For "Hey there": "Hey! Great to connect. What's your name?"
-- For "ABC": "Got it - those are your initials. What's your full first name I can use?"
-
-DO NOT focus on length. Focus on: Is this person actually giving me their name?"""
+        return f'User input: "{user_input}"{correction_context}'
     
     def _build_intent_validation_prompt(
         self,
         user_input: str,
         captured_name: Optional[str] = None
     ) -> str:
-        """Build prompt for intent validation."""
+        """Build the per-call part of the intent validation prompt."""
         name_context = f" (Name: {captured_name})" if captured_name else ""
         
-        return f"""You are an expert at understanding human needs and intentions.
-Your task: Determine if the user's input reveals their intent/reason for seeking help.
-
-User input: "{user_input}"{name_context}
-
-Respond with a JSON object:
-{{
-  "is_intent": <true if valid intent detected>,
-  "extracted_intent": "<specific reason they're here, or null>",
-  "intent_category": "<one of: emotional_health | productivity | relationships | health_fitness | learning | career | other>",
-  "confidence": <0.0 to 1.0>,
-  "contextual_response": "<how to respond if NOT a clear intent - warm follow-up>"
-}}
-
-A valid intent is when the user indicates WHY they're here:
-- "I need help with anxiety"
-- "I want to improve my confidence"
-- "I'm struggling with stress management"
-
-An invalid intent is:
-- Generic responses that don't indicate need: "I don't know" "Maybe?" "Whatever"
-- Deflections: "Ask me later" "Not sure yet"
-- Nonsense: "Purple elephants" "The moon is round"
-
-Be conversational in contextual_response - no templates."""
+        return f'User input: "{user_input}"{name_context}'
     
     def _build_engagement_assessment_prompt(
         self,
@@ -252,118 +691,155 @@ Be conversational in contextual_response - no templates."""
         conversation_turn: int = 1,
         previous_inputs: Optional[list] = None
     ) -> str:
-        """Build prompt for engagement quality assessment."""
-        history_context = ""
-        if previous_inputs:
-            history_context = "\n\nPrevious user inputs in this conversation:\n"
-            for i, inp in enumerate(previous_inputs[-3:], 1):  # Last 3 inputs
-                history_context += f"{i}. \"{inp}\"\n"
-        
-        return f"""You are an expert at assessing genuine user engagement vs. time-wasting behavior.
-Your task: Determine if this user is honestly trying, playfully engaging, or clearly not trying.
-
-Context: Conversation turn #{conversation_turn}
-Current user input: "{user_input}"{history_context}
-
-Respond with a JSON object:
-{{
-  "is_engaged": <true if user is making genuine attempt>,
-  "is_honest_attempt": <true if struggling but genuinely trying>,
-  "is_non_engagement": <true if clearly wasting time>,
-  "strike_weight": <1-3: 1=minor/playful, 2=dismissive but recoverable, 3=severe/clear time-wasting>,
-  "engagement_pattern": "<one of: genuine | playful | dismissive | clearly_not_trying | spam>",
-  "recommendation": "<specific instruction for the AI on how to respond>"
-}}
-
-Guidance:
-- "Skinna marinka..." on turn 1 = playful (weight: 1, honest_attempt: true)
-- "lol" "idk" "whatever" = dismissive (weight: 2, honest_attempt: false)
-- Completely random strings or clear spam = not trying (weight: 3)
-- But if they tried in previous turns and now playing = weight: 1
-- Consistent nonsense after 2+ turns = weight: 3
-
-DO NOT be rigid. Context matters. A joke on turn 1 might be fine, 
-but the same pattern on turn 3 suggests they're not engaging."""
+        """Build the per-call part of the engagement assessment prompt."""
+        return "".join((
+            f"Context: Conversation turn #{conversation_turn}\n",
+            f'Current user input: "{user_input}"',
+            self._format_previous_inputs(previous_inputs)
+        ))
+    
+    def _build_turn_analysis_prompt(
+        self,
+        user_input: str,
+        previous_name: Optional[str] = None,
+        conversation_turn: int = 1,
+        previous_inputs: Optional[list] = None
+    ) -> str:
+        """Build the per-call part of the fused prompt for analyze_turn."""
+        correction_context = ""
+        if previous_name:
+            correction_context = f"\nPreviously captured name was: '{previous_name}'"
+        
+        return "".join((
+            f"Context: Conversation turn #{conversation_turn}\n",
+            f'User input: "{user_input}"',
+            correction_context,
+            self._format_previous_inputs(previous_inputs)
+        ))
+    
+    @staticmethod
+    def _format_previous_inputs(previous_inputs: Optional[list]) -> str:
+        """Render the last 3 previous inputs as prompt context ("" if none)."""
+        if not previous_inputs:
+            return ""
+        lines = [f'{i}. "{inp}"' for i, inp in enumerate(previous_inputs[-3:], 1)]
+        return "\n\nPrevious user inputs in this conversation:\n" + "\n".join(lines) + "\n"
+    
+    @staticmethod
+    def _load_json_object(response_text: str) -> Optional[Dict[str, any]]:
+        """Decode a JSON-mode LLM reply (None if it is not a JSON object)."""
+        # orjson parses straight from the str, several times faster than json
+        data = orjson.loads(response_text)
+        return data if isinstance(data, dict) else None
+    
+    @staticmethod
+    def _name_verdict(data: Dict[str, any]) -> Dict[str, any]:
+        """Shape decoded name-validation JSON into the returned verdict."""
+        return {
+            "is_name": data.get("is_name", False),
+            "name_value": data.get("extracted_name"),
+            "is_correction": data.get("is_correction", False),
+            "input_type": data.get("input_type", "unknown"),
+            "contextual_response": data.get("contextual_response", "What's your name?"),
+            "confidence": float(data.get("confidence", 0.5))
+        }
+    
+    @staticmethod
+    def _intent_verdict(data: Dict[str, any]) -> Dict[str, any]:
+        """Shape decoded intent-validation JSON into the returned verdict."""
+        return {
+            "is_intent": data.get("is_intent", False),
+            "intent_value": data.get("extracted_intent"),
+            "intent_category": data.get("intent_category", "other"),
+            "contextual_response": data.get("contextual_response", "Tell me more."),
+            "confidence": float(data.get("confidence", 0.5))
+        }
+    
+    @staticmethod
+    def _engagement_verdict(data: Dict[str, any]) -> Dict[str, any]:
+        """Shape decoded engagement-assessment JSON into the returned verdict."""
+        return {
+            "is_engaged": data.get("is_engaged", True),
+            "is_honest_attempt": data.get("is_honest_attempt", True),
+            "is_non_engagement": data.get("is_non_engagement", False),
+            "strike_weight": int(data.get("strike_weight", 1)),
+            "engagement_pattern": data.get("engagement_pattern", "unknown"),
+            "recommendation": data.get("recommendation", "Continue normally.")
+        }
     
     def _parse_name_validation_response(
         self,
-        response_text: str,
-        user_input: str
-    ) -> Dict[str, any]:
-        """Parse name validation LLM response."""
+        response_text: str
+    ) -> Optional[Dict[str, any]]:
+        """Parse name validation LLM response (None if it holds no valid JSON)."""
         try:
-            # Try to extract JSON from response
-            json_start = response_text.find('{')
-            json_end = response_text.rfind('}') + 1
-            
-            if json_start >= 0 and json_end > json_start:
-                json_str = response_text[json_start:json_end]
-                data = json.loads(json_str)
-                
-                return {
-                    "is_name": data.get("is_name", False),
-                    "name_value": data.get("extracted_name"),
-                    "is_correction": data.get("is_correction", False),
-                    "input_type": data.get("input_type", "unknown"),
-                    "contextual_response": data.get("contextual_response", "What's your name?"),
-                    "confidence": float(data.get("confidence", 0.5))
-                }
-        except (json.JSONDecodeError, ValueError) as e:
+            data = self._load_json_object(response_text)
+            if data is not None:
+                return self._name_verdict(data)
+        except (orjson.JSONDecodeError, ValueError) as e:
             logger.warning(f"Failed to parse name validation response: {e}")
         
-        return self._fallback_name_validation(user_input)
+        return None
     
     def _parse_intent_validation_response(
         self,
-        response_text: str,
-        user_input: str
-    ) -> Dict[str, any]:
-        """Parse intent validation LLM response."""
+        response_text: str
+    ) -> Optional[Dict[str, any]]:
+        """Parse intent validation LLM response (None if it holds no valid JSON)."""
         try:
-            json_start = response_text.find('{')
-            json_end = response_text.rfind('}') + 1
-            
-            if json_start >= 0 and json_end > json_start:
-                json_str = response_text[json_start:json_end]
-                data = json.loads(json_str)
-                
-                return {
-                    "is_intent": data.get("is_intent", False),
-                    "intent_value": data.get("extracted_intent"),
-                    "intent_category": data.get("intent_category", "other"),
-                    "contextual_response": data.get("contextual_response", "Tell me more."),
-                    "confidence": float(data.get("confidence", 0.5))
-                }
-        except (json.JSONDecodeError, ValueError) as e:
+            data = self._load_json_object(response_text)
+            if data is not None:
+                return self._intent_verdict(data)
+        except (orjson.JSONDecodeError, ValueError) as e:
             logger.warning(f"Failed to parse intent validation response: {e}")
         
-        return self._fallback_intent_validation(user_input)
+        return None
     
     def _parse_engagement_response(
         self,
         response_text: str
-    ) -> Dict[str, any]:
-        """Parse engagement assessment LLM response."""
+    ) -> Optional[Dict[str, any]]:
+        """Parse engagement assessment LLM response (None if it holds no valid JSON)."""
         try:
-            json_start = response_text.find('{')
-            json_end = response_text.rfind('}') + 1
-            
-            if json_start >= 0 and json_end > json_start:
-                json_str = response_text[json_start:json_end]
-                data = json.loads(json_str)
-                
-                return {
-                    "is_engaged": data.get("is_engaged", True),
-                    "is_honest_attempt": data.get("is_honest_attempt", True),
-                    "is_non_engagement": data.get("is_non_engagement", False),
-                    "strike_weight": int(data.get("strike_weight", 1)),
-                    "engagement_pattern": data.get("engagement_pattern", "unknown"),
-                    "recommendation": data.get("recommendation", "Continue normally.")
-                }
-        except (json.JSONDecodeError, ValueError) as e:
+            data = self._load_json_object(response_text)
+            if data is not None:
+                return self._engagement_verdict(data)
+        except (orjson.JSONDecodeError, ValueError) as e:
             logger.warning(f"Failed to parse engagement response: {e}")
         
-        return self._fallback_engagement_assessment("")
+        return None
+    
+    def _parse_turn_analysis_response(
+        self,
+        response_text: str
+    ) -> Optional[Dict[str, any]]:
+        """
+        Parse a fused turn-analysis LLM response (None if it holds no valid JSON).
+        
+        Sections that are missing or malformed map to None so the caller can
+        fall back for just those.
+        """
+        try:
+            data = self._load_json_object(response_text)
+        except orjson.JSONDecodeError as e:
+            logger.warning(f"Failed to parse turn analysis response: {e}")
+            return None
+        if data is None:
+            return None
+        
+        parsed = {}
+        for section, shape in (
+            ("name", self._name_verdict),
+            ("intent", self._intent_verdict),
+            ("engagement", self._engagement_verdict)
+        ):
+            section_data = data.get(section)
+            try:
+                parsed[section] = shape(section_data) if isinstance(section_data, dict) else None
+            except ValueError as e:
+                logger.warning(f"Failed to parse turn analysis {section} section: {e}")
+                parsed[section] = None
+        return parsed
     
     def _fallback_name_validation(
         self,
@@ -372,11 +848,12 @@ but the same pattern on turn 3 suggests they're not engaging."""
     ) -> Dict[str, any]:
         """Fallback name validation using heuristics."""
         # Very basic heuristics for fallback
+        # Cheapest checks first so long inputs exit before split()
         is_name = (
-            len(user_input.split()) <= 4 and
             len(user_input) <= 40 and
-            user_input[0].isupper() and
-            not any(word in user_input.lower() for word in ["help", "need", "want", "struggling"])
+            len(user_input.split()) <= 4 and
+            user_input[:1].isupper() and
+            not any(word in user_input.lower() for word in self._NOT_A_NAME_KEYWORDS)
         )
         
         return {
@@ -393,8 +870,8 @@ but the same pattern on turn 3 suggests they're not engaging."""
         user_input: str
     ) -> Dict[str, any]:
         """Fallback intent validation using heuristics."""
-        intent_keywords = ["help", "need", "want", "struggling", "working on", "interested in", "dealing"]
-        has_intent = any(kw in user_input.lower() for kw in intent_keywords)
+        lowered = user_input.lower()
+        has_intent = any(kw in lowered for kw in self._INTENT_KEYWORDS)
         
         return {
             "is_intent": has_intent,
@@ -410,7 +887,9 @@ but the same pattern on turn 3 suggests they're not engaging."""
     ) -> Dict[str, any]:
         """Fallback engagement assessment."""
         # Very basic: check for nonsense
-        is_nonsense = len(user_input) < 3 or user_input.lower() in ["lol", "idk", "whatever", "bye"]
+        is_nonsense = len(user_input) < 3 or (
+            len(user_input) <= self._NONSENSE_MAX_CHARS and user_input.lower() in self._NONSENSE_REPLIES
+        )
         
         return {
             "is_engaged": not is_nonsense,
@@ -420,3 +899,27 @@ but the same pattern on turn 3 suggests they're not engaging."""
             "engagement_pattern": "clearly_not_trying" if is_nonsense else "unknown",
             "recommendation": "Please take a moment..." if is_nonsense else "Continue normally."
         }
+
+
+_discovery_service: Optional[DiscoveryExtractionService] = None
+
+
+def get_discovery_service() -> Optional[DiscoveryExtractionService]:
+    """
+    Get the process-wide DiscoveryExtractionService
+    
+    Shares one Groq client, validation cache and in-flight table across
+    requests. Usable directly or as a FastAPI dependency.
+    
+    Returns:
+        Shared DiscoveryExtractionService, or None when GROQ_API_KEY is not set
+    """
+    global _discovery_service
+    
+    if _discovery_service is None:
+        try:
+            _discovery_service = DiscoveryExtractionService()
+        except ValueError as e:
+            logger.warning(f"Discovery extraction service unavailable: {e}")
+            return None
+    return _discovery_service
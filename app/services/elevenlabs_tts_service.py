@@ -3,20 +3,59 @@ ElevenLabs TTS Service - Free Tier Available (10,000 chars/month)
 High quality voices, generous free tier, no rate limits.
 """
 
+import asyncio
 import logging
-from typing import Optional
+import random
+import threading
+from functools import lru_cache
+from types import MappingProxyType
+from typing import AsyncIterator, Dict, Optional, Tuple
 import httpx
+import orjson
 from app.config import settings
+from app.services.tts_audio_cache import get_tts_audio_cache
+from app.services.tts_quota import get_tts_quota
 
 logger = logging.getLogger(__name__)
 
+# httpx only speaks HTTP/2 when the h2 package is installed
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    logger.warning("h2 not installed - ElevenLabs client will use HTTP/1.1")
+    HTTP2_AVAILABLE = False
+
+# Bytes per chunk handed to callers of stream_speech
+TTS_STREAM_CHUNK_BYTES = 8192
+
+# Transient failures retried with jittered exponential backoff. A Retry-After
+# longer than the cap (e.g. monthly quota exhausted) won't clear within one
+# request, so the error surfaces instead.
+TTS_RETRY_STATUS_CODES = frozenset({429, 500, 502, 503, 504})
+TTS_RETRY_MAX_DELAY_SECONDS = 8.0
+
+# Caps in-flight ElevenLabs requests; each plan only generates a few clips at
+# once and rejects the rest with 429. Retry waits happen outside the cap.
+_tts_semaphore = asyncio.Semaphore(settings.VOICE_TTS_MAX_CONCURRENCY)
+
+# Laura - used when a personality/gender pair has no mapping
+DEFAULT_VOICE_ID = "FGY2WhTYpPnrIDTdsKH5"
+
+# Keep-alive pool so consecutive TTS calls reuse an open TLS connection to
+# api.elevenlabs.io instead of handshaking per request
+ELEVENLABS_HTTP_LIMITS = httpx.Limits(
+    max_connections=100,
+    max_keepalive_connections=20
+)
+
 
 class ElevenLabsTTSService:
     """ElevenLabs Text-to-Speech Service"""
     
     # High quality voices with ElevenLabs voice IDs
-    # These are the pre-made voices available to all users
-    VOICES = {
+    # These are the pre-made voices available to all users (read-only)
+    VOICES = MappingProxyType({
         # Main voices (User's preference)
         "FGY2WhTYpPnrIDTdsKH5": {"name": "Laura", "gender": "female", "description": "Main female voice - Warm and friendly"},
         "nPczCjzI2devNBz1zQrb": {"name": "Brian", "gender": "male", "description": "Main male voice - Natural and balanced"},
@@ -32,10 +71,10 @@ class ElevenLabsTTSService:
         "ErXwobaYiN019PkySvjV": {"name": "Antoni", "gender": "male", "description": "Deep and authoritative"},
         "TxGEqnHWrfWFTfGW9XjX": {"name": "Josh", "gender": "male", "description": "Confident and professional"},
         "IKne3meq5aSn9XLyUdCD": {"name": "Charlie", "gender": "male", "description": "Wise and thoughtful"},
-    }
+    })
     
-    # Voice mappings for EPI Brain personalities (using voice IDs)
-    PERSONALITY_VOICES = {
+    # Voice mappings for EPI Brain personalities (using voice IDs, read-only)
+    PERSONALITY_VOICES = MappingProxyType({
         "personal_friend": {
             "male": "nPczCjzI2devNBz1zQrb",  # Brian - Natural and friendly
             "female": "FGY2WhTYpPnrIDTdsKH5",  # Laura - Warm and engaging
@@ -72,16 +111,73 @@ class ElevenLabsTTSService:
             "male": "TxGEqnHWrfWFTfGW9XjX",  # Josh - Encouraging and supportive
             "female": "FGY2WhTYpPnrIDTdsKH5",  # Laura - Warm and motivating
         },
-    }
+    })
+    
+    # Pooled HTTP clients shared by every instance, keyed by API key
+    _clients: Dict[str, httpx.AsyncClient] = {}
+    _clients_lock = threading.Lock()
     
     def __init__(self):
         """Initialize ElevenLabs TTS service"""
         self.api_key = settings.ELEVENLABS_API_KEY
         self.base_url = "https://api.elevenlabs.io/v1"
         
+        self._audio_cache = get_tts_audio_cache()
+        self._quota = get_tts_quota()
+        
+        # (personality, gender) -> (voice_id, voice_name), so selection is one lookup
+        self._voice_selection: Dict[Tuple[str, str], Tuple[str, str]] = {
+            (personality, gender): (voice_id, self.VOICES.get(voice_id, {}).get("name", "Unknown"))
+            for personality, genders in self.PERSONALITY_VOICES.items()
+            for gender, voice_id in genders.items()
+        }
+        self._default_voice = (DEFAULT_VOICE_ID, self.VOICES[DEFAULT_VOICE_ID]["name"])
+        
         if not self.api_key:
             logger.warning("ELEVENLABS_API_KEY not configured - TTS will not work")
     
+    def _get_client(self) -> httpx.AsyncClient:
+        """Get the pooled HTTP client for this API key, creating it on first use"""
+        key = self.api_key or ""
+        client = self._clients.get(key)
+        if client is not None and not client.is_closed:
+            return client
+        
+        with self._clients_lock:
+            client = self._clients.get(key)
+            if client is not None and not client.is_closed:
+                return client
+            # HTTP/2 multiplexes concurrent TTS requests over one TLS connection
+            client = httpx.AsyncClient(
+                base_url=self.base_url,
+                timeout=30.0,
+                limits=ELEVENLABS_HTTP_LIMITS,
+                http2=HTTP2_AVAILABLE,
+                headers={
+                    "xi-api-key": key,
+                    "Content-Type": "application/json",
+                    "Accept": "audio/mpeg",
+                },
+            )
+            self._clients[key] = client
+            return client
+    
+    async def prewarm(self) -> None:
+        """Open a pooled TLS connection to ElevenLabs ahead of the first real request"""
+        if not self.api_key:
+            return
+        try:
+            await self._get_client().get("/voices")
+        except Exception as e:
+            logger.warning(f"ElevenLabs prewarm failed: {e}")
+    
+    async def aclose(self) -> None:
+        """Close the pooled HTTP client for this API key (call on app shutdown)"""
+        with self._clients_lock:
+            client = self._clients.pop(self.api_key or "", None)
+        if client is not None and not client.is_closed:
+            await client.aclose()
+    
     def get_voice_for_personality(self, personality: str, gender: str = "female") -> str:
         """
         Get the appropriate ElevenLabs voice ID for a personality and gender
@@ -93,11 +189,11 @@ class ElevenLabsTTSService:
         Returns:
             ElevenLabs voice ID
         """
-        personality_voices = self.PERSONALITY_VOICES.get(personality, {})
-        voice_id = personality_voices.get(gender, "FGY2WhTYpPnrIDTdsKH5")  # Default to Laura
-        
-        voice_name = self.VOICES.get(voice_id, {}).get("name", "Unknown")
-        logger.info(f"Selected voice '{voice_name}' (ID: {voice_id}) for personality '{personality}' ({gender})")
+        voice_id, voice_name = self._voice_selection.get((personality, gender), self._default_voice)
+        logger.info(
+            "Selected voice '%s' (ID: %s) for personality '%s' (%s)",
+            voice_name, voice_id, personality, gender
+        )
         return voice_id
     
     async def generate_speech(
@@ -122,6 +218,7 @@ class ElevenLabsTTSService:
             Audio data as bytes
             
         Raises:
+            TTSQuotaExhausted: If the monthly character quota would be exceeded
             Exception: If TTS generation fails
         """
         if not self.api_key:
@@ -130,70 +227,237 @@ class ElevenLabsTTSService:
         if not text or len(text.strip()) == 0:
             raise ValueError("Text cannot be empty")
         
+        cache_key = None
+        if self._audio_cache is not None:
+            cache_key = self._audio_cache.make_key(text, voice, model, output_format, instructions)
+            if cache_key is not None:
+                cached = await self._audio_cache.get(cache_key)
+                if cached is not None:
+                    return cached
+        
+        # Cache hits cost nothing, so characters are only counted from here on
+        chars = len(text.strip())
+        quota_key = await self._quota.reserve(chars) if self._quota is not None else None
+        
         logger.info(f"Generating TTS: {len(text)} chars, voice={voice}, model={model}")
         
         try:
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                # Voice parameter is already a voice ID
-                voice_id = voice
-                
-                # Generate speech
-                url = f"{self.base_url}/text-to-speech/{voice_id}"
-                
-                payload = {
-                    "text": text.strip(),
-                    "model_id": model,
-                    "output_format": output_format,
-                }
-                
-                # ElevenLabs voice settings
-                voice_settings = {
-                    "stability": 0.5,
-                    "similarity_boost": 0.75,
-                }
-                
-                if instructions:
-                    voice_settings["style"] = instructions
-                
-                payload["voice_settings"] = voice_settings
-                
-                response = await client.post(
-                    url,
-                    headers={
-                        "xi-api-key": self.api_key,
-                        "Content-Type": "application/json",
-                        "Accept": "audio/mpeg",
-                    },
-                    json=payload,
+            payload = self._build_payload(text, model, output_format, instructions)
+            
+            # Generate speech (auth and content headers are set on the pooled client)
+            # Voice parameter is already a voice ID
+            attempt = 0
+            while True:
+                async with _tts_semaphore:
+                    response = await self._get_client().post(
+                        f"/text-to-speech/{voice}",
+                        content=payload,
+                    )
+                delay = self._retry_delay(response, attempt)
+                if delay is None:
+                    break
+                logger.warning(
+                    f"ElevenLabs TTS returned {response.status_code}, retrying in {delay:.1f}s "
+                    f"(attempt {attempt + 1}/{settings.VOICE_TTS_MAX_RETRIES})"
                 )
+                await asyncio.sleep(delay)
+                attempt += 1
+            self._raise_for_status(response, payload)
+            
+            audio_data = response.content
+            logger.info(f"TTS generated successfully: {len(audio_data)} bytes ({output_format})")
+            
+            if cache_key is not None:
+                await self._audio_cache.set(cache_key, audio_data)
+            
+            return audio_data
+            
+        except httpx.TimeoutException:
+            logger.error("ElevenLabs TTS API timeout")
+            await self._release_quota(quota_key, chars)
+            raise Exception("TTS generation timed out")
+        except Exception as e:
+            logger.error(f"ElevenLabs TTS API error: {str(e)}")
+            await self._release_quota(quota_key, chars)
+            raise
+    
+    async def stream_speech(
+        self,
+        text: str,
+        voice: str = "FGY2WhTYpPnrIDTdsKH5",
+        model: str = "eleven_multilingual_v2",
+        output_format: str = "mp3_44100_128",
+        instructions: Optional[str] = None,
+    ) -> AsyncIterator[bytes]:
+        """
+        Stream speech from text as it is generated
+        
+        Same arguments as generate_speech, but yields audio chunks as they
+        arrive instead of buffering the whole clip. Errors (bad key, rate
+        limit, timeout) are raised when the first chunk is requested.
+        
+        Yields:
+            Audio data chunks
+        """
+        if not self.api_key:
+            raise ValueError("ELEVENLABS_API_KEY not configured")
+        
+        if not text or len(text.strip()) == 0:
+            raise ValueError("Text cannot be empty")
+        
+        cache_key = None
+        if self._audio_cache is not None:
+            cache_key = self._audio_cache.make_key(text, voice, model, output_format, instructions)
+            if cache_key is not None:
+                cached = await self._audio_cache.get(cache_key)
+                if cached is not None:
+                    yield cached
+                    return
+        
+        chars = len(text.strip())
+        quota_key = await self._quota.reserve(chars) if self._quota is not None else None
+        
+        logger.info(f"Streaming TTS: {len(text)} chars, voice={voice}, model={model}")
+        
+        payload = self._build_payload(text, model, output_format, instructions)
+        total_bytes = 0
+        # Only short (cacheable) texts are collected, so long replies stay unbuffered
+        collected = [] if cache_key is not None else None
+        try:
+            attempt = 0
+            while True:
+                delay = None
+                # Held until the stream is fully read: ElevenLabs is still generating
+                async with _tts_semaphore:
+                    async with self._get_client().stream(
+                        "POST",
+                        f"/text-to-speech/{voice}",
+                        content=payload,
+                    ) as response:
+                        if response.status_code != 200:
+                            await response.aread()
+                            delay = self._retry_delay(response, attempt)
+                            if delay is None:
+                                self._raise_for_status(response, payload)
+                        else:
+                            async for chunk in response.aiter_bytes(TTS_STREAM_CHUNK_BYTES):
+                                total_bytes += len(chunk)
+                                if collected is not None:
+                                    collected.append(chunk)
+                                yield chunk
                 
-                if response.status_code == 401:
-                    raise Exception("Invalid ElevenLabs API key")
-                elif response.status_code == 429:
-                    raise Exception("ElevenLabs rate limit exceeded. Free tier: 10,000 chars/month")
-                elif response.status_code == 400:
-                    error_text = response.text
-                    logger.error(f"ElevenLabs TTS API error 400: {error_text}")
-                    logger.error(f"Request payload: {payload}")
-                    raise Exception(f"TTS generation failed: 400 - {error_text}")
-                elif response.status_code != 200:
-                    error_text = response.text
-                    logger.error(f"ElevenLabs TTS API error: {response.status_code} - {error_text}")
-                    raise Exception(f"TTS generation failed: {response.status_code}")
-                
-                audio_data = response.content
-                logger.info(f"TTS generated successfully: {len(audio_data)} bytes ({output_format})")
-                
-                return audio_data
-                
+                if delay is None:
+                    break
+                # Retries only happen before the first byte is yielded
+                logger.warning(
+                    f"ElevenLabs TTS returned {response.status_code}, retrying in {delay:.1f}s "
+                    f"(attempt {attempt + 1}/{settings.VOICE_TTS_MAX_RETRIES})"
+                )
+                await asyncio.sleep(delay)
+                attempt += 1
         except httpx.TimeoutException:
             logger.error("ElevenLabs TTS API timeout")
+            if total_bytes == 0:
+                await self._release_quota(quota_key, chars)
             raise Exception("TTS generation timed out")
         except Exception as e:
             logger.error(f"ElevenLabs TTS API error: {str(e)}")
+            # Once audio has been produced ElevenLabs bills the characters
+            if total_bytes == 0:
+                await self._release_quota(quota_key, chars)
             raise
+        
+        logger.info(f"TTS streamed successfully: {total_bytes} bytes ({output_format})")
+        
+        if collected is not None:
+            await self._audio_cache.set(cache_key, b"".join(collected))
+    
+    async def _release_quota(self, quota_key: Optional[str], chars: int) -> None:
+        """Return reserved characters for a request ElevenLabs did not bill"""
+        if self._quota is not None:
+            await self._quota.release(quota_key, chars)
+    
+    @staticmethod
+    @lru_cache(maxsize=64)
+    def _payload_prefix(
+        model: str,
+        output_format: str,
+        instructions: Optional[str] = None,
+    ) -> bytes:
+        """
+        Serialized request body up to the text field, built once per settings combination
+        
+        Only the text varies between calls, so the rest of the JSON is reused
+        as bytes instead of rebuilding and re-encoding the dicts every time.
+        """
+        # ElevenLabs voice settings
+        voice_settings = {
+            "stability": 0.5,
+            "similarity_boost": 0.75,
+        }
+        
+        if instructions:
+            voice_settings["style"] = instructions
+        
+        body = orjson.dumps({
+            "model_id": model,
+            "output_format": output_format,
+            "voice_settings": voice_settings,
+        })
+        # Drop the closing brace so the text field can be appended
+        return body[:-1] + b',"text":'
+    
+    @classmethod
+    def _build_payload(
+        cls,
+        text: str,
+        model: str,
+        output_format: str,
+        instructions: Optional[str] = None,
+    ) -> bytes:
+        """Build the JSON text-to-speech request body"""
+        return cls._payload_prefix(model, output_format, instructions) + orjson.dumps(text.strip()) + b"}"
     
+    @staticmethod
+    def _retry_delay(response: httpx.Response, attempt: int) -> Optional[float]:
+        """
+        Seconds to wait before retrying a failed request, or None to give up
+        
+        Honors a numeric Retry-After header; otherwise backs off 1s, 2s, 4s...
+        plus up to 1s of jitter, capped at TTS_RETRY_MAX_DELAY_SECONDS.
+        """
+        if response.status_code not in TTS_RETRY_STATUS_CODES:
+            return None
+        if attempt >= settings.VOICE_TTS_MAX_RETRIES:
+            return None
+        
+        retry_after = response.headers.get("retry-after")
+        if retry_after is not None:
+            try:
+                delay = float(retry_after)
+            except ValueError:
+                pass  # HTTP-date form; fall back to backoff
+            else:
+                return delay if delay <= TTS_RETRY_MAX_DELAY_SECONDS else None
+        
+        return min(TTS_RETRY_MAX_DELAY_SECONDS, 2 ** attempt + random.uniform(0, 1))
     
+    @staticmethod
+    def _raise_for_status(response: httpx.Response, payload: bytes) -> None:
+        """Raise a descriptive error for a failed text-to-speech response (body must be read)"""
+        if response.status_code == 401:
+            raise Exception("Invalid ElevenLabs API key")
+        elif response.status_code == 429:
+            raise Exception("ElevenLabs rate limit exceeded. Free tier: 10,000 chars/month")
+        elif response.status_code == 400:
+            error_text = response.text
+            logger.error(f"ElevenLabs TTS API error 400: {error_text}")
+            logger.error(f"Request payload: {payload.decode('utf-8')}")
+            raise Exception(f"TTS generation failed: 400 - {error_text}")
+        elif response.status_code != 200:
+            error_text = response.text
+            logger.error(f"ElevenLabs TTS API error: {response.status_code} - {error_text}")
+            raise Exception(f"TTS generation failed: {response.status_code}")
     
     async def generate_speech_for_personality(
         self,
@@ -246,4 +510,21 @@ class ElevenLabsTTSService:
         Returns:
             Voice information dictionary
         """
-        return self.VOICES.get(voice, {"gender": "unknown", "description": "Unknown voice"})
\ No newline at end of file
+        return self.VOICES.get(voice, {"gender": "unknown", "description": "Unknown voice"})
+
+
+_tts_service: Optional[ElevenLabsTTSService] = None
+
+
+def get_tts_service() -> ElevenLabsTTSService:
+    """
+    Get the process-wide ElevenLabsTTSService
+    
+    Shares one pooled HTTP client and voice table across requests. Usable
+    directly or as a FastAPI dependency.
+    """
+    global _tts_service
+    
+    if _tts_service is None:
+        _tts_service = ElevenLabsTTSService()
+    return _tts_service
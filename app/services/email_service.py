@@ -3,25 +3,156 @@ Email Service
 Send emails to internal team members and external recipients
 """
 
+import asyncio
 import os
+import queue
 import smtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
-from typing import Optional, Dict
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from types import MappingProxyType
+from email.message import EmailMessage
+from email.utils import formataddr
+from typing import Callable, Optional, Dict, List
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Authenticated SMTP connections kept open per process, so concurrent sends
+# don't queue behind a single socket
+SMTP_POOL_SIZE = int(os.getenv("SMTP_POOL_SIZE", "5"))
+SMTP_POOL_ACQUIRE_TIMEOUT_SECONDS = 30.0
+
+# Threads that run blocking SMTP sends for the async API, one per pooled connection
+_smtp_executor = ThreadPoolExecutor(max_workers=SMTP_POOL_SIZE, thread_name_prefix="smtp")
+
+# Providers throttle long-lived sessions, so a connection is replaced after this many messages
+SMTP_MAX_MESSAGES_PER_CONNECTION = 100
+
+# send_many gives up on a batch of at least this size once more than a third
+# of it has failed (bad credentials, provider blocking) instead of hammering on
+SMTP_BATCH_ABORT_MIN_MESSAGES = 30
+SMTP_BATCH_ABORT_FAILURE_RATIO = 1 / 3
+
+# Result for every send while SMTP credentials are missing (read-only, shared)
+_NOT_CONFIGURED_RESULT = MappingProxyType({
+    "success": False,
+    "error": "SMTP not configured",
+    "note": "Set SMTP_USER and SMTP_PASSWORD environment variables"
+})
+
+
+
+def _quit_quietly(server: smtplib.SMTP) -> None:
+    """Say QUIT, or just drop the socket if the server is already gone"""
+    try:
+        server.quit()
+    except (smtplib.SMTPException, OSError):
+        server.close()
+
+
+class _PooledSMTP:
+    """An SMTP connection checked out of an SMTPPool, with its message count"""
+    
+    __slots__ = ("server", "sent")
+    
+    def __init__(self, server: smtplib.SMTP):
+        self.server = server
+        self.sent = 0
+    
+    def send_message(self, msg: EmailMessage) -> None:
+        """Send msg and count it against this connection"""
+        self.server.send_message(msg)
+        self.sent += 1
+
+
+class SMTPPool:
+    """
+    Bounded pool of authenticated SMTP connections
+    
+    At most pool_size connections are checked out at once; further callers
+    wait in acquire(). Connections are opened lazily, checked with NOOP when
+    taken from the pool and replaced after max_messages_per_connection sends.
+    """
+    
+    def __init__(
+        self,
+        connect: Callable[[], smtplib.SMTP],
+        pool_size: int = 5,
+        max_messages_per_connection: int = 100
+    ):
+        """
+        Initialize the pool
+        
+        Args:
+            connect: Opens a new connected, logged-in SMTP session
+            pool_size: Maximum number of open connections
+            max_messages_per_connection: Sends before a connection is replaced
+        """
+        self._connect = connect
+        self.max_messages_per_connection = max_messages_per_connection
+        self._idle: "queue.Queue[_PooledSMTP]" = queue.Queue(maxsize=pool_size)
+        self._slots = threading.BoundedSemaphore(pool_size)
+    
+    def acquire(self, timeout: float = SMTP_POOL_ACQUIRE_TIMEOUT_SECONDS) -> _PooledSMTP:
+        """
+        Check out a live connection, opening one if none is idle
+        
+        Raises:
+            TimeoutError: If every connection stays busy for timeout seconds
+        """
+        if not self._slots.acquire(timeout=timeout):
+            raise TimeoutError("No SMTP connection available")
+        
+        try:
+            while True:
+                try:
+                    conn = self._idle.get_nowait()
+                except queue.Empty:
+                    return _PooledSMTP(self._connect())
+                try:
+                    if conn.server.noop()[0] == 250:
+                        return conn
+                except (smtplib.SMTPException, OSError):
+                    pass
+                _quit_quietly(conn.server)
+        except BaseException:
+            self._slots.release()
+            raise
+    
+    def release(self, conn: _PooledSMTP, discard: bool = False) -> None:
+        """Return a connection to the pool, or close it if it is broken or used up"""
+        try:
+            if discard or conn.sent >= self.max_messages_per_connection:
+                _quit_quietly(conn.server)
+            else:
+                self._idle.put_nowait(conn)
+        finally:
+            self._slots.release()
+    
+    def close(self) -> None:
+        """Quit every idle connection"""
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                return
+            _quit_quietly(conn.server)
+
 
 class EmailService:
     """Service for sending emails"""
     
-    # Internal team member mapping (from environment variables)
-    TEAM_MEMBERS = {
-        "tom": os.getenv("EMAIL_TOM", ""),
-        "darrick": os.getenv("EMAIL_DARRICK", ""),
-        "twinwicks": os.getenv("EMAIL_TWINWICKS", ""),
-    }
+    # Internal team member mapping (from environment variables, read-only).
+    # Members without a configured address are left out.
+    TEAM_MEMBERS = MappingProxyType({
+        name: email
+        for name, email in {
+            "tom": os.getenv("EMAIL_TOM", ""),
+            "darrick": os.getenv("EMAIL_DARRICK", ""),
+            "twinwicks": os.getenv("EMAIL_TWINWICKS", ""),
+        }.items()
+        if email
+    })
     
     def __init__(self):
         self.smtp_host = os.getenv("SMTP_HOST", "smtp.gmail.com")
@@ -30,6 +161,53 @@ class EmailService:
         self.smtp_password = os.getenv("SMTP_PASSWORD", "")
         self.from_email = os.getenv("SMTP_FROM_EMAIL", self.smtp_user)
         self.from_name = os.getenv("SMTP_FROM_NAME", "EPI Assistant")
+        # Formatted once; RFC 2047-encodes non-ASCII display names
+        self._from_header = formataddr((self.from_name, self.from_email))
+        
+        # Checked once: a missing config is reported here, not on every send
+        self._configured = bool(self.smtp_user and self.smtp_password)
+        if not self._configured:
+            logger.warning("SMTP credentials not configured - emails will not be sent")
+        
+        self._pool = SMTPPool(
+            self._connect,
+            pool_size=SMTP_POOL_SIZE,
+            max_messages_per_connection=SMTP_MAX_MESSAGES_PER_CONNECTION
+        )
+    
+    def _connect(self) -> smtplib.SMTP:
+        """Open a new SMTP connection, upgrade it to TLS and log in"""
+        server = smtplib.SMTP(self.smtp_host, self.smtp_port, timeout=30)
+        try:
+            server.starttls()
+            server.login(self.smtp_user, self.smtp_password)
+        except Exception:
+            server.close()
+            raise
+        return server
+    
+    def _send_message(self, msg: EmailMessage) -> None:
+        """Send msg over a pooled connection, reconnecting once if the server dropped it"""
+        for attempt in range(2):
+            conn = self._pool.acquire()
+            healthy = False
+            try:
+                conn.send_message(msg)
+                healthy = True
+                return
+            except smtplib.SMTPServerDisconnected:
+                if attempt:
+                    raise
+            except smtplib.SMTPRecipientsRefused:
+                # smtplib resets the transaction, so the session is still usable
+                healthy = True
+                raise
+            finally:
+                self._pool.release(conn, discard=not healthy)
+    
+    def close(self) -> None:
+        """Close the pooled SMTP connections (call on app shutdown)"""
+        self._pool.close()
     
     def get_team_member_email(self, name: str) -> Optional[str]:
         """
@@ -41,13 +219,12 @@ class EmailService:
         Returns:
             Email address if found, None otherwise
         """
-        normalized_name = name.lower().strip()
-        email = self.TEAM_MEMBERS.get(normalized_name)
+        email = self.TEAM_MEMBERS.get(name.lower().strip())
         
         if email:
-            logger.info(f"Found team member email for '{name}': {email}")
+            logger.debug("Found team member email for '%s': %s", name, email)
         else:
-            logger.warning(f"No email mapping found for team member: {name}")
+            logger.warning("No email mapping found for team member: %s", name)
         
         return email
     
@@ -90,6 +267,47 @@ class EmailService:
             body=full_message
         )
     
+    async def send_internal_message_async(
+        self,
+        recipient_name: str,
+        subject: str,
+        message: str,
+        sender_context: Optional[str] = None
+    ) -> Dict[str, any]:
+        """send_internal_message without blocking the event loop"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            _smtp_executor,
+            self.send_internal_message,
+            recipient_name,
+            subject,
+            message,
+            sender_context
+        )
+    
+    async def send_email_async(
+        self,
+        to_email: str,
+        subject: str,
+        body: str,
+        html_body: Optional[str] = None
+    ) -> Dict[str, any]:
+        """
+        send_email without blocking the event loop
+        
+        The SMTP round-trip runs on a worker thread, so the event loop keeps
+        serving other requests while the message is delivered.
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            _smtp_executor,
+            self.send_email,
+            to_email,
+            subject,
+            body,
+            html_body
+        )
+    
     def send_email(
         self,
         to_email: str,
@@ -110,35 +328,25 @@ class EmailService:
             Dict with success status and details
         """
         try:
-            # Validate SMTP configuration
-            if not self.smtp_user or not self.smtp_password:
-                logger.warning("SMTP credentials not configured - email not sent")
-                return {
-                    "success": False,
-                    "error": "SMTP not configured",
-                    "note": "Set SMTP_USER and SMTP_PASSWORD environment variables"
-                }
+            # SMTP configuration was validated in __init__
+            if not self._configured:
+                return dict(_NOT_CONFIGURED_RESULT)
             
-            # Create message
-            msg = MIMEMultipart('alternative')
+            # Create message (plain text only unless an HTML alternative is given)
+            msg = EmailMessage()
             msg['Subject'] = subject
-            msg['From'] = f"{self.from_name} <{self.from_email}>"
+            msg['From'] = self._from_header
             msg['To'] = to_email
-            
-            # Attach plain text body
-            msg.attach(MIMEText(body, 'plain'))
+            msg.set_content(body)
             
             # Attach HTML body if provided
             if html_body:
-                msg.attach(MIMEText(html_body, 'html'))
+                msg.add_alternative(html_body, subtype='html')
             
-            # Send email
-            with smtplib.SMTP(self.smtp_host, self.smtp_port) as server:
-                server.starttls()
-                server.login(self.smtp_user, self.smtp_password)
-                server.send_message(msg)
+            # Send email over the reused connection
+            self._send_message(msg)
             
-            logger.info(f"Email sent successfully to {to_email}: {subject}")
+            logger.info("Email sent successfully to %s: %s", to_email, subject)
             
             return {
                 "success": True,
@@ -148,9 +356,70 @@ class EmailService:
             }
         
         except Exception as e:
-            logger.error(f"Failed to send email to {to_email}: {str(e)}")
+            logger.error("Failed to send email to %s: %s", to_email, e)
             return {
                 "success": False,
                 "error": str(e),
                 "recipient": to_email
             }
+    
+    def send_many(self, messages: List[Dict[str, any]]) -> List[Dict[str, any]]:
+        """
+        Send several emails over the same SMTP connection
+        
+        Args:
+            messages: send_email keyword arguments per email
+                (to_email, subject, body and optionally html_body)
+        
+        Returns:
+            One send_email result dict per message, in order
+        """
+        results = []
+        failures = 0
+        abort_after = None
+        if len(messages) >= SMTP_BATCH_ABORT_MIN_MESSAGES:
+            abort_after = len(messages) * SMTP_BATCH_ABORT_FAILURE_RATIO
+        
+        for index, message in enumerate(messages):
+            result = self.send_email(**message)
+            results.append(result)
+            if result["success"]:
+                continue
+            
+            failures += 1
+            if abort_after is not None and failures > abort_after:
+                logger.error(
+                    "Aborting email batch after %d failures (%d/%d attempted)",
+                    failures, index + 1, len(messages)
+                )
+                for skipped in messages[index + 1:]:
+                    results.append({
+                        "success": False,
+                        "error": "Batch aborted after too many failures",
+                        "recipient": skipped.get("to_email")
+                    })
+                break
+        
+        return results
+
+
+_email_service: Optional[EmailService] = None
+
+
+def get_email_service() -> EmailService:
+    """
+    Get the process-wide EmailService
+    
+    Shares one pool of authenticated SMTP connections across requests.
+    """
+    global _email_service
+    
+    if _email_service is None:
+        _email_service = EmailService()
+    return _email_service
+
+
+def close_email_service() -> None:
+    """Close the shared SMTP connections (call on app shutdown)"""
+    if _email_service is not None:
+        _email_service.close()
@@ -2,22 +2,161 @@
 Exposure Hierarchy Service for CBT (Cognitive Behavioral Therapy)
 Tracks gradual exposure to feared situations to reduce anxiety
 """
-from typing import List, Optional, Dict, Any
-from datetime import datetime
+from contextlib import contextmanager
+from types import MappingProxyType
+from typing import Any, Callable, Dict, Hashable, Iterator, List, Optional, Set, TypeVar
 from datetime import datetime, timedelta
 import uuid
-from sqlalchemy.orm import Session
+from sqlalchemy import and_, case, func, select
+from sqlalchemy.orm import Query, Session, load_only, raiseload, selectinload
+from app.config import settings
+from app.core.cache import TTLCache
 from app.models.exposure_hierarchy import ExposureHierarchy, ExposureStatus
 import logging
 
 logger = logging.getLogger(__name__)
 
+T = TypeVar("T")
+
+# Dashboards fan out to the same reports several times per render; keep them briefly.
+# One entry per user holding that user's reports, dropped whenever they write a step.
+REPORT_CACHE_TTL_SECONDS = 5
+_report_cache = TTLCache(REPORT_CACHE_TTL_SECONDS, maxsize=1024)
+
+
+# Next-step guidance per difficulty category (see ExposureHierarchy.difficulty_category)
+_GUIDANCE = MappingProxyType({
+    "easy": "This is an easy step. Great place to start building confidence!",
+    "moderate": "This is a moderate challenge. Take your time and remember your coping strategies.",
+    "challenging": "This is challenging. Consider having support available and prepare coping techniques.",
+    "difficult": "This is a difficult step. Make sure you're well-prepared and have support if needed."
+})
+
+
+def invalidate_exposure_reports(user_id: uuid.UUID) -> None:
+    """Drop the cached reports after the user's exposure steps change"""
+    _report_cache.pop(str(user_id))
+
 
 class ExposureHierarchyService:
     """Service for managing exposure hierarchies and gradual exposure therapy"""
     
     def __init__(self, db: Session):
         self.db = db
+        # Set inside unit_of_work(): writes flush and the block commits once
+        self._in_unit_of_work = False
+        self._touched_users: Set[uuid.UUID] = set()
+    
+    @contextmanager
+    def unit_of_work(self) -> Iterator[None]:
+        """
+        Group several writes into a single transaction
+        
+        Inside the block, the write methods flush instead of committing; the
+        block commits once on exit, or rolls everything back if it raises.
+        
+        Usage:
+            with service.unit_of_work():
+                service.complete_exposure(step_id, user_id, anxiety_after=3)
+                service.create_exposure_step(user_id, group, situation, 60, 7)
+        """
+        if self._in_unit_of_work:
+            yield
+            return
+        
+        self._in_unit_of_work = True
+        try:
+            yield
+            self.db.commit()
+        except Exception:
+            self.db.rollback()
+            raise
+        finally:
+            self._in_unit_of_work = False
+            for user_id in self._touched_users:
+                invalidate_exposure_reports(user_id)
+            self._touched_users.clear()
+    
+    def _commit(self, user_id: uuid.UUID) -> None:
+        """Commit a write, or just flush it when inside unit_of_work()"""
+        if self._in_unit_of_work:
+            self.db.flush()
+            self._touched_users.add(user_id)
+        else:
+            self.db.commit()
+        invalidate_exposure_reports(user_id)
+    
+    def _cached_report(self, user_id: uuid.UUID, key: Hashable, compute: Callable[[], T]) -> T:
+        """Return the user's cached report for key, computing and storing it on a miss"""
+        # Inside unit_of_work() the session sees flushed, uncommitted writes;
+        # keep those out of the shared cache and don't serve committed-only data
+        if self._in_unit_of_work:
+            return compute()
+        
+        reports = _report_cache.get(str(user_id), None)
+        if reports is None:
+            reports = {}
+            _report_cache.set(str(user_id), reports)
+        if key not in reports:
+            reports[key] = compute()
+        return reports[key]
+    
+    @staticmethod
+    def _reduction_columns() -> tuple:
+        """
+        SQL (reduction, has_reduction) pair mirroring ExposureHierarchy.anxiety_reduction
+        
+        The property is only set (and truthy) when both levels are non-zero and differ.
+        """
+        reduction = ExposureHierarchy.anxiety_before - ExposureHierarchy.anxiety_after
+        has_reduction = and_(
+            ExposureHierarchy.anxiety_before != 0,
+            ExposureHierarchy.anxiety_after != 0,
+            reduction != 0
+        )
+        return reduction, has_reduction
+    
+    @staticmethod
+    def _progress_columns(since_date: datetime) -> tuple:
+        """
+        Aggregate columns behind a progress report, over steps created since since_date
+        
+        The date window is applied inside the aggregates rather than in WHERE,
+        so grouping by hierarchy_group still yields groups with no recent steps.
+        """
+        recent = ExposureHierarchy.created_at >= since_date
+        completed = ExposureHierarchy.status == ExposureStatus.COMPLETED
+        
+        def count_where(*conditions):
+            return func.coalesce(func.sum(case((and_(recent, *conditions), 1), else_=0)), 0)
+        
+        reduction, has_reduction = ExposureHierarchyService._reduction_columns()
+        
+        return (
+            count_where().label("total"),
+            count_where(completed).label("completed"),
+            count_where(ExposureHierarchy.status == ExposureStatus.AVOIDED).label("avoided"),
+            count_where(ExposureHierarchy.status == ExposureStatus.IN_PROGRESS).label("in_progress"),
+            func.avg(case((and_(recent, completed, has_reduction), reduction))).label("avg_reduction")
+        )
+    
+    @staticmethod
+    def _progress_report(hierarchy_group: str, row: Any, days: int) -> Dict[str, Any]:
+        """Build a progress report dict from a row of _progress_columns"""
+        total = int(row.total)
+        completed = int(row.completed)
+        avg_reduction = float(row.avg_reduction) if row.avg_reduction is not None else None
+        
+        return {
+            "hierarchy_group": hierarchy_group,
+            "total_exposures": total,
+            "completed": completed,
+            "avoided": int(row.avoided),
+            "in_progress": int(row.in_progress),
+            "completion_rate": round(completed / total * 100, 1) if total else 0,
+            "avg_anxiety_reduction": round(avg_reduction, 2) if avg_reduction else None,
+            "period_days": days
+        }
     
     def create_exposure_step(
         self,
@@ -60,52 +199,160 @@ class ExposureHierarchyService:
             )
             
             self.db.add(exposure_step)
-            self.db.commit()
-            self.db.refresh(exposure_step)
+            self._commit(user_id)
             
-            logger.info(f"Created exposure step {exposure_step.id} for user {user_id}")
+            logger.info("Created exposure step %s for user %s", exposure_step.id, user_id)
             return exposure_step
             
         except Exception as e:
             self.db.rollback()
-            logger.error(f"Error creating exposure step: {e}")
+            logger.error("Error creating exposure step: %s", e)
+            raise
+    
+    def bulk_create_exposure_steps(
+        self,
+        user_id: uuid.UUID,
+        steps: List[Dict[str, Any]]
+    ) -> List[ExposureHierarchy]:
+        """
+        Create several exposure steps in one transaction (e.g. importing a hierarchy)
+        
+        Args:
+            user_id: User ID
+            steps: create_exposure_step keyword arguments per step (hierarchy_group,
+                feared_situation, difficulty_level, anxiety_before and optionally
+                conversation_id, scheduled_for, notes)
+        
+        Returns:
+            Created exposure steps, in input order
+        """
+        try:
+            exposure_steps = [
+                ExposureHierarchy(
+                    user_id=user_id,
+                    conversation_id=step.get("conversation_id"),
+                    hierarchy_group=step["hierarchy_group"],
+                    feared_situation=step["feared_situation"],
+                    difficulty_level=step["difficulty_level"],
+                    anxiety_before=step["anxiety_before"],
+                    status=ExposureStatus.NOT_STARTED,
+                    scheduled_for=step.get("scheduled_for"),
+                    notes=step.get("notes")
+                )
+                for step in steps
+            ]
+            if not exposure_steps:
+                return []
+            
+            # Ids are generated client-side, so the flush batches every row
+            # into one multi-row INSERT and a single commit
+            self.db.add_all(exposure_steps)
+            self._commit(user_id)
+            
+            logger.info("Created %d exposure steps for user %s", len(exposure_steps), user_id)
+            return exposure_steps
+            
+        except Exception as e:
+            self.db.rollback()
+            logger.error("Error creating exposure steps: %s", e)
             raise
     
     def get_exposure_step(self, step_id: uuid.UUID, user_id: uuid.UUID) -> Optional[ExposureHierarchy]:
         """Get a specific exposure step by ID"""
-        return self.db.query(ExposureHierarchy).filter(
-            ExposureHierarchy.id == step_id,
-            ExposureHierarchy.user_id == user_id
-        ).first()
+        # Session.get answers from the identity map when the step is already
+        # loaded (e.g. an endpoint checked ownership first), skipping the SELECT
+        exposure = self.db.get(ExposureHierarchy, step_id)
+        if exposure is None or str(exposure.user_id) != str(user_id):
+            return None
+        return exposure
     
-    def get_user_exposure_steps(
+    def _user_steps_query(
         self,
         user_id: uuid.UUID,
         hierarchy_group: Optional[str] = None,
-        status: Optional[ExposureStatus] = None,
-        limit: int = 50,
-        offset: int = 0
-    ) -> List[ExposureHierarchy]:
-        """Get exposure steps for a user, optionally filtered"""
+        status: Optional[ExposureStatus] = None
+    ) -> Query:
+        """
+        Query for a user's exposure steps, optionally filtered by group and status
+        
+        With RAISE_ON_LAZY_LOAD set, lazy-loading a relationship off a listed
+        step raises instead of silently issuing one query per step; list
+        callers that need the conversation must ask for it (see
+        get_user_exposure_steps).
+        """
         query = self.db.query(ExposureHierarchy).filter(
             ExposureHierarchy.user_id == user_id
         )
         
+        if settings.RAISE_ON_LAZY_LOAD:
+            query = query.options(raiseload("*"))
+        
         if hierarchy_group:
             query = query.filter(ExposureHierarchy.hierarchy_group == hierarchy_group)
         
         if status:
             query = query.filter(ExposureHierarchy.status == status)
         
+        return query
+    
+    def get_user_exposure_steps(
+        self,
+        user_id: uuid.UUID,
+        hierarchy_group: Optional[str] = None,
+        status: Optional[ExposureStatus] = None,
+        limit: int = 50,
+        offset: int = 0,
+        include_conversation: bool = False
+    ) -> List[ExposureHierarchy]:
+        """
+        Get exposure steps for a user, optionally filtered
+        
+        Pass include_conversation=True when the caller reads step.conversation:
+        the conversations are then fetched in one extra IN query for the whole
+        page (selectinload, which unlike joinedload doesn't repeat the
+        conversation columns on every step row or interfere with LIMIT).
+        """
+        query = self._user_steps_query(user_id, hierarchy_group, status)
+        if include_conversation:
+            query = query.options(selectinload(ExposureHierarchy.conversation))
+        return query.order_by(ExposureHierarchy.difficulty_level.asc()).limit(limit).offset(offset).all()
+    
+    def get_user_exposure_steps_lite(
+        self,
+        user_id: uuid.UUID,
+        hierarchy_group: Optional[str] = None,
+        status: Optional[ExposureStatus] = None,
+        limit: int = 50,
+        offset: int = 0
+    ) -> List[ExposureHierarchy]:
+        """
+        Get exposure steps for list views, loading only the columns a list shows
+        
+        Same filters as get_user_exposure_steps. Other attributes (notes,
+        anxiety levels, timestamps) load lazily with an extra query per step,
+        so use get_user_exposure_steps when serializing full steps.
+        """
+        query = self._user_steps_query(user_id, hierarchy_group, status).options(
+            load_only(
+                ExposureHierarchy.hierarchy_group,
+                ExposureHierarchy.feared_situation,
+                ExposureHierarchy.difficulty_level,
+                ExposureHierarchy.status
+            )
+        )
         return query.order_by(ExposureHierarchy.difficulty_level.asc()).limit(limit).offset(offset).all()
     
     def get_hierarchy_groups(self, user_id: uuid.UUID) -> List[str]:
         """Get all hierarchy groups for a user"""
-        groups = self.db.query(ExposureHierarchy.hierarchy_group).filter(
+        query = select(ExposureHierarchy.hierarchy_group).where(
             ExposureHierarchy.user_id == user_id
-        ).distinct().all()
-        
-        return [g[0] for g in groups]
+        ).distinct()
+        groups = self._cached_report(
+            user_id,
+            ("groups",),
+            lambda: list(self.db.execute(query).scalars())
+        )
+        return list(groups)
     
     def start_exposure(
         self,
@@ -121,15 +368,14 @@ class ExposureHierarchyService:
         try:
             exposure.status = ExposureStatus.IN_PROGRESS
             exposure.scheduled_for = datetime.utcnow()
-            self.db.commit()
-            self.db.refresh(exposure)
+            self._commit(user_id)
             
-            logger.info(f"Started exposure {step_id} for user {user_id}")
+            logger.info("Started exposure %s for user %s", step_id, user_id)
             return exposure
             
         except Exception as e:
             self.db.rollback()
-            logger.error(f"Error starting exposure: {e}")
+            logger.error("Error starting exposure: %s", e)
             raise
     
     def complete_exposure(
@@ -170,15 +416,14 @@ class ExposureHierarchyService:
             if notes:
                 exposure.notes = notes
             
-            self.db.commit()
-            self.db.refresh(exposure)
+            self._commit(user_id)
             
-            logger.info(f"Completed exposure {step_id} for user {user_id}")
+            logger.info("Completed exposure %s for user %s", step_id, user_id)
             return exposure
             
         except Exception as e:
             self.db.rollback()
-            logger.error(f"Error completing exposure: {e}")
+            logger.error("Error completing exposure: %s", e)
             raise
     
     def avoid_exposure(
@@ -199,15 +444,14 @@ class ExposureHierarchyService:
             if notes:
                 exposure.notes = notes
             
-            self.db.commit()
-            self.db.refresh(exposure)
+            self._commit(user_id)
             
-            logger.info(f"Avoided exposure {step_id} for user {user_id}")
+            logger.info("Avoided exposure %s for user %s", step_id, user_id)
             return exposure
             
         except Exception as e:
             self.db.rollback()
-            logger.error(f"Error avoiding exposure: {e}")
+            logger.error("Error avoiding exposure: %s", e)
             raise
     
     def update_exposure_step(
@@ -228,33 +472,35 @@ class ExposureHierarchyService:
                     setattr(exposure, key, value)
             
             exposure.updated_at = datetime.utcnow()
-            self.db.commit()
-            self.db.refresh(exposure)
+            self._commit(user_id)
             
-            logger.info(f"Updated exposure step {step_id}")
+            logger.info("Updated exposure step %s", step_id)
             return exposure
             
         except Exception as e:
             self.db.rollback()
-            logger.error(f"Error updating exposure step: {e}")
+            logger.error("Error updating exposure step: %s", e)
             raise
     
     def delete_exposure_step(self, step_id: uuid.UUID, user_id: uuid.UUID) -> bool:
         """Delete an exposure step"""
-        exposure = self.get_exposure_step(step_id, user_id)
-        
-        if not exposure:
-            return False
-        
         try:
-            self.db.delete(exposure)
-            self.db.commit()
-            logger.info(f"Deleted exposure step {step_id}")
+            # One DELETE instead of loading the row first
+            deleted = self.db.query(ExposureHierarchy).filter(
+                ExposureHierarchy.id == step_id,
+                ExposureHierarchy.user_id == user_id
+            ).delete()
+            
+            if not deleted:
+                return False
+            
+            self._commit(user_id)
+            logger.info("Deleted exposure step %s", step_id)
             return True
             
         except Exception as e:
             self.db.rollback()
-            logger.error(f"Error deleting exposure step: {e}")
+            logger.error("Error deleting exposure step: %s", e)
             raise
     
     def get_exposure_progress(
@@ -274,38 +520,49 @@ class ExposureHierarchyService:
         Returns:
             Dictionary with progress report
         """
+        return dict(self._cached_report(
+            user_id,
+            ("progress", hierarchy_group, days),
+            lambda: self._exposure_progress(user_id, hierarchy_group, days)
+        ))
+    
+    def _exposure_progress(
+        self,
+        user_id: uuid.UUID,
+        hierarchy_group: str,
+        days: int
+    ) -> Dict[str, Any]:
+        """Compute get_exposure_progress (uncached)"""
         since_date = datetime.utcnow() - timedelta(days=days)
         
-        exposures = self.db.query(ExposureHierarchy).filter(
+        # Counted in the database: one summary row instead of every step
+        row = self.db.query(*self._progress_columns(since_date)).filter(
             ExposureHierarchy.user_id == user_id,
             ExposureHierarchy.hierarchy_group == hierarchy_group,
             ExposureHierarchy.created_at >= since_date
-        ).all()
-        
-        completed = [e for e in exposures if e.status == ExposureStatus.COMPLETED]
-        avoided = [e for e in exposures if e.status == ExposureStatus.AVOIDED]
-        in_progress = [e for e in exposures if e.status == ExposureStatus.IN_PROGRESS]
+        ).one()
         
-        # Calculate average anxiety reduction
-        avg_reduction = None
-        if completed:
-            reductions = [e.anxiety_reduction for e in completed if e.anxiety_reduction]
-            if reductions:
-                avg_reduction = sum(reductions) / len(reductions)
+        return self._progress_report(hierarchy_group, row, days)
+    
+    def _completion_rate(
+        self,
+        user_id: uuid.UUID,
+        hierarchy_group: str,
+        days: int = 30
+    ) -> float:
+        """Percentage of a group's recent steps that were completed (same as in get_exposure_progress)"""
+        since_date = datetime.utcnow() - timedelta(days=days)
         
-        # Calculate completion rate
-        completion_rate = round(len(completed) / len(exposures) * 100, 1) if exposures else 0
+        total, completed = self.db.query(
+            func.count(),
+            func.coalesce(func.sum(case((ExposureHierarchy.status == ExposureStatus.COMPLETED, 1), else_=0)), 0)
+        ).filter(
+            ExposureHierarchy.user_id == user_id,
+            ExposureHierarchy.hierarchy_group == hierarchy_group,
+            ExposureHierarchy.created_at >= since_date
+        ).one()
         
-        return {
-            "hierarchy_group": hierarchy_group,
-            "total_exposures": len(exposures),
-            "completed": len(completed),
-            "avoided": len(avoided),
-            "in_progress": len(in_progress),
-            "completion_rate": completion_rate,
-            "avg_anxiety_reduction": round(avg_reduction, 2) if avg_reduction else None,
-            "period_days": days
-        }
+        return round(int(completed) / total * 100, 1) if total else 0
     
     def get_next_exposure_step(
         self,
@@ -347,6 +604,19 @@ class ExposureHierarchyService:
         Returns:
             Dictionary with anxiety trends
         """
+        return dict(self._cached_report(
+            user_id,
+            ("trends", hierarchy_group, days),
+            lambda: self._anxiety_trends(user_id, hierarchy_group, days)
+        ))
+    
+    def _anxiety_trends(
+        self,
+        user_id: uuid.UUID,
+        hierarchy_group: Optional[str],
+        days: int
+    ) -> Dict[str, Any]:
+        """Compute get_anxiety_trends (uncached)"""
         since_date = datetime.utcnow() - timedelta(days=days)
         
         query = self.db.query(ExposureHierarchy).filter(
@@ -358,9 +628,15 @@ class ExposureHierarchyService:
         if hierarchy_group:
             query = query.filter(ExposureHierarchy.hierarchy_group == hierarchy_group)
         
-        exposures = query.all()
+        reduction, has_reduction = self._reduction_columns()
+        avg_before, avg_after, reduction_sum, total = query.with_entities(
+            func.avg(ExposureHierarchy.anxiety_before),
+            func.avg(ExposureHierarchy.anxiety_after),
+            func.sum(case((has_reduction, reduction), else_=0)),
+            func.count()
+        ).one()
         
-        if not exposures:
+        if not total:
             return {
                 "avg_anxiety_before": None,
                 "avg_anxiety_after": None,
@@ -368,15 +644,12 @@ class ExposureHierarchyService:
                 "total_exposures": 0
             }
         
-        avg_before = sum(e.anxiety_before for e in exposures) / len(exposures)
-        avg_after = sum(e.anxiety_after for e in exposures) / len(exposures)
-        avg_reduction = sum(e.anxiety_reduction for e in exposures if e.anxiety_reduction) / len(exposures)
-        
+        # Steps without a recorded reduction count as zero, as in the per-row average
         return {
-            "avg_anxiety_before": round(avg_before, 2),
-            "avg_anxiety_after": round(avg_after, 2),
-            "avg_reduction": round(avg_reduction, 2),
-            "total_exposures": len(exposures)
+            "avg_anxiety_before": round(float(avg_before), 2),
+            "avg_anxiety_after": round(float(avg_after), 2),
+            "avg_reduction": round(float(reduction_sum) / total, 2),
+            "total_exposures": total
         }
     
     def suggest_next_step(
@@ -400,34 +673,27 @@ class ExposureHierarchyService:
         if not next_step:
             return None
         
-        # Get progress for context
-        progress = self.get_exposure_progress(user_id, hierarchy_group, days=30)
+        # Only the completion rate is needed for context, not a full progress report
+        completion_rate = self._completion_rate(user_id, hierarchy_group, days=30)
         
         # Generate guidance based on difficulty
         difficulty = next_step.difficulty_category
         
+        guidance_text = _GUIDANCE.get(difficulty, _GUIDANCE["difficult"])
+        
+        # Add context from progress
+        if completion_rate > 70:
+            guidance_text = f"{guidance_text} You've completed {completion_rate}% of exposures - you're making great progress!"
+        
         guidance = {
             "step_id": next_step.id,
             "feared_situation": next_step.feared_situation,
             "difficulty_level": next_step.difficulty_level,
             "difficulty_category": difficulty,
             "anxiety_before": next_step.anxiety_before,
-            "guidance": ""
+            "guidance": guidance_text
         }
         
-        if difficulty == "easy":
-            guidance["guidance"] = "This is an easy step. Great place to start building confidence!"
-        elif difficulty == "moderate":
-            guidance["guidance"] = "This is a moderate challenge. Take your time and remember your coping strategies."
-        elif difficulty == "challenging":
-            guidance["guidance"] = "This is challenging. Consider having support available and prepare coping techniques."
-        else:
-            guidance["guidance"] = "This is a difficult step. Make sure you're well-prepared and have support if needed."
-        
-        # Add context from progress
-        if progress["completion_rate"] > 70:
-            guidance["guidance"] += f" You've completed {progress['completion_rate']}% of exposures - you're making great progress!"
-        
         return guidance
     
     def get_hierarchy_summary(
@@ -443,11 +709,20 @@ class ExposureHierarchyService:
         Returns:
             List of hierarchy group summaries
         """
-        groups = self.get_hierarchy_groups(user_id)
+        summaries = self._cached_report(user_id, ("summary",), lambda: self._hierarchy_summary(user_id))
+        return [dict(summary) for summary in summaries]
+    
+    def _hierarchy_summary(self, user_id: uuid.UUID) -> List[Dict[str, Any]]:
+        """Compute get_hierarchy_summary (uncached)"""
+        days = 30
+        since_date = datetime.utcnow() - timedelta(days=days)
         
-        summaries = []
-        for group in groups:
-            progress = self.get_exposure_progress(user_id, group, days=30)
-            summaries.append(progress)
+        # One grouped aggregate instead of a progress query per group
+        rows = self.db.query(
+            ExposureHierarchy.hierarchy_group,
+            *self._progress_columns(since_date)
+        ).filter(
+            ExposureHierarchy.user_id == user_id
+        ).group_by(ExposureHierarchy.hierarchy_group).all()
         
-        return summaries
\ No newline at end of file
+        return [self._progress_report(row.hierarchy_group, row, days) for row in rows]
\ No newline at end of file
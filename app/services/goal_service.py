@@ -5,10 +5,11 @@ Handles CRUD operations, progress tracking, and streak calculation for user goal
 """
 
 import logging
+import uuid
 from typing import List, Optional, Dict, Any
 from datetime import datetime, timedelta, date
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_, desc, func
+from sqlalchemy import Float, and_, or_, case, cast, desc, extract, func, insert, literal
 
 from app.models.goal import Goal, CheckIn, Milestone, GoalStatus, GoalCategory
 from app.models.user import User
@@ -33,13 +34,12 @@ GOAL_STATUS_TRANSITIONS = {
     'completed': []  # No transitions from completed
 }
 
-# Default check-in intervals (in days)
-CHECK_IN_INTERVALS = {
-    'daily': 1,
-    'weekly': 7,
-    'biweekly': 14,
-    'monthly': 30,
-}
+
+def _invalidate_pending_check_ins(user_id: str) -> None:
+    """Drop the user's cached pending check-ins after a goal or check-in write"""
+    # check_in_service imports this module, so import it on first use
+    from app.services.check_in_service import invalidate_pending_check_ins
+    invalidate_pending_check_ins(user_id)
 
 
 class GoalService:
@@ -99,6 +99,7 @@ class GoalService:
         try:
             self.db.add(goal)
             self.db.commit()
+            _invalidate_pending_check_ins(user_id)
             self.db.refresh(goal)
             logger.info(f"Created goal '{title}' for user {user_id}")
             return goal
@@ -193,6 +194,7 @@ class GoalService:
         
         try:
             self.db.commit()
+            _invalidate_pending_check_ins(user_id)
             self.db.refresh(goal)
             logger.info(f"Updated goal {goal_id}")
             return goal
@@ -220,6 +222,7 @@ class GoalService:
         try:
             self.db.delete(goal)
             self.db.commit()
+            _invalidate_pending_check_ins(user_id)
             logger.info(f"Deleted goal {goal_id}")
             return True
         except Exception as e:
@@ -267,13 +270,13 @@ class GoalService:
                 goal.status = 'completed'
                 goal.completed_at = datetime.utcnow()
         
-        # Update streak
-        self._update_streak(goal)
+        # Streak and check-in count from one query; the new row counts towards the total
+        goal.total_check_ins = self._update_streak(goal) + 1
         
         check_in = CheckIn(
-            goal_id=goal_id,
+            goal_id=goal.id,
             user_id=user_id,
-            progress_notes=progress_notes,
+            notes=progress_notes,
             mood=mood,
             energy_level=energy_level
         )
@@ -281,7 +284,7 @@ class GoalService:
         try:
             self.db.add(check_in)
             self.db.commit()
-            self.db.refresh(check_in)
+            _invalidate_pending_check_ins(user_id)
             logger.info(f"Created check-in for goal {goal_id}")
             return check_in
         except Exception as e:
@@ -289,11 +292,71 @@ class GoalService:
             logger.error(f"Error creating check-in: {e}")
             raise
     
+    def bulk_create_check_ins(
+        self,
+        user_id: str,
+        items: List[Dict[str, Any]]
+    ) -> int:
+        """
+        Create many check-ins at once (e.g. a client syncing offline check-ins)
+        
+        Rows go out as one executemany INSERT, and streaks and counts are
+        recomputed once per affected goal rather than once per row.
+        
+        Args:
+            user_id: The user's ID (for authorization)
+            items: One dict per check-in with goal_id and optionally notes,
+                mood, energy_level and created_at
+            
+        Returns:
+            Number of check-ins created
+        """
+        if not items:
+            return 0
+        
+        goal_ids = {uuid.UUID(str(item['goal_id'])) for item in items}
+        goals = self.db.query(Goal).filter(
+            and_(
+                Goal.id.in_(goal_ids),
+                Goal.user_id == user_id
+            )
+        ).all()
+        
+        if len(goals) != len(goal_ids):
+            raise ValueError("Goal not found")
+        
+        now = datetime.utcnow()
+        rows = [
+            {
+                'goal_id': uuid.UUID(str(item['goal_id'])),
+                'user_id': user_id,
+                'notes': item.get('notes'),
+                'mood': item.get('mood'),
+                'energy_level': item.get('energy_level'),
+                'created_at': item.get('created_at') or now
+            }
+            for item in items
+        ]
+        
+        try:
+            self.db.execute(insert(CheckIn), rows)
+            for goal in goals:
+                goal.total_check_ins = self._update_streak(goal)
+            self.db.commit()
+            _invalidate_pending_check_ins(user_id)
+            logger.info(f"Created {len(rows)} check-ins across {len(goals)} goals for user {user_id}")
+            return len(rows)
+        except Exception as e:
+            self.db.rollback()
+            logger.error(f"Error creating check-ins: {e}")
+            raise
+    
     def get_check_ins(
         self,
         goal_id: str,
         user_id: str,
-        limit: int = 20
+        limit: int = 20,
+        goal: Optional[Goal] = None
     ) -> List[CheckIn]:
         """
         Get all check-ins for a goal
@@ -302,17 +365,20 @@ class GoalService:
             goal_id: The goal's ID
             user_id: The user's ID (for authorization)
             limit: Maximum number of check-ins to return
+            goal: The goal if the caller already loaded it for this user
+                (skips the ownership lookup)
             
         Returns:
             List of CheckIn objects
         """
         # Verify goal belongs to user
-        goal = self.get_goal(goal_id, user_id)
+        if goal is None:
+            goal = self.get_goal(goal_id, user_id)
         if not goal:
             return []
         
         return self.db.query(CheckIn).filter(
-            CheckIn.goal_id == goal_id
+            CheckIn.goal_id == goal.id
         ).order_by(desc(CheckIn.created_at)).limit(limit).all()
     
     def get_goal_progress(self, goal_id: str, user_id: str) -> Dict[str, Any]:
@@ -331,19 +397,14 @@ class GoalService:
         if not goal:
             return {}
         
-        check_ins = self.get_check_ins(goal_id, user_id)
+        # Reuse the loaded goal so the check-ins are the only other query
+        check_ins = self.get_check_ins(goal_id, user_id, goal=goal)
         
         # Calculate statistics
         total_check_ins = len(check_ins)
         
         # Calculate completion rate (check-ins due vs completed)
-        if goal.created_at:
-            days_active = (datetime.utcnow() - goal.created_at).days
-            # Default to weekly check-ins (7 days) since check_in_frequency doesn't exist in model
-            expected_check_ins = max(1, days_active // 7)
-            completion_rate = (total_check_ins / expected_check_ins) * 100 if expected_check_ins > 0 else 0
-        else:
-            completion_rate = 0.0
+        completion_rate = self._calculate_completion_rate(goal, total_check_ins)
         
         # Average energy level
         energy_levels = [ci.energy_level for ci in check_ins if ci.energy_level]
@@ -454,24 +515,32 @@ class GoalService:
             logger.error(f"Error completing milestone: {e}")
             return None
     
-    def get_milestones(self, goal_id: str, user_id: str) -> List[Milestone]:
+    def get_milestones(
+        self,
+        goal_id: str,
+        user_id: str,
+        goal: Optional[Goal] = None
+    ) -> List[Milestone]:
         """
         Get all milestones for a goal
         
         Args:
             goal_id: The goal's ID
             user_id: The user's ID (for authorization)
+            goal: The goal if the caller already loaded it for this user
+                (skips the ownership lookup)
             
         Returns:
             List of Milestone objects
         """
         # Verify goal belongs to user
-        goal = self.get_goal(goal_id, user_id)
+        if goal is None:
+            goal = self.get_goal(goal_id, user_id)
         if not goal:
             return []
         
         return self.db.query(Milestone).filter(
-            Milestone.goal_id == goal_id
+            Milestone.goal_id == goal.id
         ).order_by(Milestone.created_at).all()
     
     # Helper methods
@@ -495,44 +564,57 @@ class GoalService:
         else:
             goal.status = 'in_progress'
     
-    def _update_streak(self, goal: Goal):
-        """Update streak calculation for a goal"""
-        # Get recent check-ins
-        recent_check_ins = self.db.query(CheckIn).filter(
-            CheckIn.goal_id == goal.id
-        ).order_by(desc(CheckIn.created_at)).limit(30).all()
+    def _update_streak(self, goal: Goal) -> int:
+        """
+        Update streak calculation for a goal
         
-        if not recent_check_ins:
-            goal.current_streak_days = 0
-            return
+        The streak and the total check-in count come back from one query:
+        LAG() gives each check-in's gap to the next newer one (or to now),
+        and a running count of gaps longer than the interval marks where
+        the streak breaks. Only the two integers leave the database.
         
+        Returns:
+            Total number of stored check-ins for the goal
+        """
         # Calculate streak based on default weekly interval (7 days)
         interval_days = 7
+        now_epoch = (datetime.utcnow() - datetime(1970, 1, 1)).total_seconds()
+        
+        created_epoch = cast(extract('epoch', CheckIn.created_at), Float)
+        gaps = self.db.query(
+            created_epoch.label('created_epoch'),
+            func.lag(created_epoch, 1, literal(now_epoch, Float)).over(
+                order_by=desc(CheckIn.created_at)
+            ).label('newer_epoch')
+        ).filter(
+            CheckIn.goal_id == goal.id
+        ).subquery()
         
-        current_date = datetime.utcnow()
-        streak = 0
-        
-        for check_in in recent_check_ins:
-            days_diff = (current_date - check_in.created_at).days
-            
-            if days_diff <= interval_days:
-                streak += 1
-                current_date = check_in.created_at
-            else:
-                break
+        # A gap counts as broken once it reaches interval_days + 1 whole days
+        is_break = case(
+            (gaps.c.newer_epoch - gaps.c.created_epoch >= (interval_days + 1) * 86400, 1),
+            else_=0
+        )
+        breaks = self.db.query(
+            func.sum(is_break).over(
+                order_by=desc(gaps.c.created_epoch),
+                rows=(None, 0)
+            ).label('breaks_so_far')
+        ).subquery()
+        
+        streak, total = self.db.query(
+            func.coalesce(func.sum(case((breaks.c.breaks_so_far == 0, 1), else_=0)), 0),
+            func.count()
+        ).select_from(breaks).one()
         
         goal.current_streak_days = streak
-        goal.completion_rate = self._calculate_completion_rate(goal)
+        return total
     
-    def _calculate_completion_rate(self, goal: Goal) -> float:
-        """Calculate overall completion rate for a goal"""
+    def _calculate_completion_rate(self, goal: Goal, total_check_ins: int) -> float:
+        """Calculate overall completion rate for a goal from its check-in count"""
         if not goal.created_at:
             return 0.0
         
-        total_check_ins = self.db.query(CheckIn).filter(
-            CheckIn.goal_id == goal.id
-        ).count()
-        
         days_active = (datetime.utcnow() - goal.created_at).days
         expected_check_ins = max(1, days_active // 7)  # Default to weekly interval
         
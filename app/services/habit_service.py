@@ -11,6 +11,7 @@ from sqlalchemy.orm import Session
 from sqlalchemy import and_, or_, desc, func
 
 from app.models.habit import Habit, HabitCompletion, HabitStatus
+from app.services.check_in_service import invalidate_pending_check_ins
 
 logger = logging.getLogger(__name__)
 
@@ -97,6 +98,7 @@ class HabitService:
         try:
             self.db.add(habit)
             self.db.commit()
+            invalidate_pending_check_ins(user_id)
             self.db.refresh(habit)
             logger.info(f"Created habit '{name}' for user {user_id}")
             return habit
@@ -183,6 +185,7 @@ class HabitService:
         
         try:
             self.db.commit()
+            invalidate_pending_check_ins(user_id)
             self.db.refresh(habit)
             logger.info(f"Updated habit {habit_id}")
             return habit
@@ -210,6 +213,7 @@ class HabitService:
         try:
             self.db.delete(habit)
             self.db.commit()
+            invalidate_pending_check_ins(user_id)
             logger.info(f"Deleted habit {habit_id}")
             return True
         except Exception as e:
@@ -273,6 +277,7 @@ class HabitService:
                 self.db.add(completion)
             
             self.db.commit()
+            invalidate_pending_check_ins(user_id)
             self.db.refresh(completion)
             logger.info(f"Recorded completion for habit {habit_id}")
             return completion
@@ -19,6 +19,13 @@ import logging
 logger = logging.getLogger(__name__)
 
 
+def _invalidate_completion_status(user_id: str) -> None:
+    """Drop the user's cached core-variable completion status after a global memory write"""
+    # core_variable_collector imports this module, so import it on first use
+    from app.services.core_variable_collector import invalidate_completion_status
+    invalidate_completion_status(user_id)
+
+
 class MemoryService:
     """Manages structured memory for users and conversations"""
     
@@ -93,6 +100,49 @@ class MemoryService:
         flag_modified(user, "global_memory")
         
         self.db.commit()
+        _invalidate_completion_status(user_id)
+        logger.info(f"Updated global memory for user {user_id}: {memory}")
+        return memory
+    
+    async def bulk_update_global_memory(
+        self,
+        user_id: str,
+        updates: Dict[str, Dict[str, Any]]
+    ) -> Dict[str, Any]:
+        """
+        Update several global memory fields with a single write
+        
+        Same semantics as update_global_memory, applied for every
+        category/key pair before one commit.
+        
+        Example:
+            bulk_update_global_memory(
+                user_id="123",
+                updates={"user_profile": {"name": "Sam", "timezone": "EST"}}
+            )
+        """
+        user = self.db.query(User).filter(User.id == user_id).first()
+        if not user:
+            raise ValueError(f"User {user_id} not found")
+        
+        memory = await self.get_global_memory(user_id)
+        if not memory:
+            memory = self._get_default_global_memory()
+        
+        for category, fields in updates.items():
+            memory.setdefault(category, {}).update(fields)
+        
+        # Update metadata
+        if "metadata" not in memory:
+            memory["metadata"] = {}
+        memory["metadata"]["last_updated"] = datetime.utcnow().isoformat()
+        
+        user.global_memory = memory
+        from sqlalchemy.orm.attributes import flag_modified
+        flag_modified(user, "global_memory")
+        
+        self.db.commit()
+        _invalidate_completion_status(user_id)
         logger.info(f"Updated global memory for user {user_id}: {memory}")
         return memory
     
@@ -139,6 +189,7 @@ class MemoryService:
         flag_modified(user, "global_memory")
         
         self.db.commit()
+        _invalidate_completion_status(user_id)
         return memory
     
     async def get_personality_context(
@@ -34,57 +34,45 @@ class ResponseParser:
             Dictionary with extracted information
         """
         extracted = {}
+        # Collected per category so everything found is saved in one write
+        updates: Dict[str, Dict[str, Any]] = {}
         
         logger.debug(f"Parsing message for user {user_id}: {user_message[:100]}...")
         
         # Extract name
         name = self._extract_name(user_message)
         if name:
-            await self.memory_service.update_global_memory(
-                user_id=user_id,
-                category="user_profile",
-                key="name",
-                value=name
-            )
+            updates.setdefault("user_profile", {})["name"] = name
             extracted["name"] = name
             logger.info(f"Extracted name: {name} for user {user_id}")
         
         # Extract location
         location = self._extract_location(user_message)
         if location:
-            await self.memory_service.update_global_memory(
-                user_id=user_id,
-                category="user_profile",
-                key="location",
-                value=location
-            )
+            updates.setdefault("user_profile", {})["location"] = location
             extracted["location"] = location
             logger.info(f"Extracted location: {location} for user {user_id}")
         
         # Extract timezone
         timezone = self._extract_timezone(user_message)
         if timezone:
-            await self.memory_service.update_global_memory(
-                user_id=user_id,
-                category="user_profile",
-                key="timezone",
-                value=timezone
-            )
+            updates.setdefault("user_profile", {})["timezone"] = timezone
             extracted["timezone"] = timezone
             logger.info(f"Extracted timezone: {timezone} for user {user_id}")
         
         # Extract communication preferences
         tone = self._extract_preferred_tone(user_message)
         if tone:
-            await self.memory_service.update_global_memory(
-                user_id=user_id,
-                category="communication_preferences",
-                key="preferred_tone",
-                value=tone
-            )
+            updates.setdefault("communication_preferences", {})["preferred_tone"] = tone
             extracted["preferred_tone"] = tone
             logger.info(f"Extracted tone preference: {tone} for user {user_id}")
         
+        if updates:
+            await self.memory_service.bulk_update_global_memory(
+                user_id=user_id,
+                updates=updates
+            )
+        
         if extracted:
             logger.info(f"Total extracted for user {user_id}: {extracted}")
         else:
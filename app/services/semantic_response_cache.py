@@ -0,0 +1,151 @@
+"""
+Semantic Response Cache
+
+Serves stored AI responses for near-duplicate user messages
+("what's 2+2" vs "what is two plus two") so they skip the model round-trip.
+"""
+
+import logging
+import math
+import time
+from collections import deque
+from operator import mul
+from typing import Deque, Dict, List, Optional, Tuple
+
+import openai
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# (expires_at, unit-length embedding, response content)
+_Entry = Tuple[float, List[float], str]
+
+
+class SemanticResponseCache:
+    """
+    In-process cache keyed on (mode, silo_id) and message embedding
+
+    Lookups compare the message embedding against stored ones by cosine
+    similarity and return the best match at or above the threshold.
+    Each worker keeps its own buckets; in production, use Redis/pgvector
+    to share entries across processes.
+    """
+
+    def __init__(
+        self,
+        openai_client,
+        threshold: float = 0.92,
+        ttl_seconds: int = 3600,
+        max_entries: int = 256
+    ):
+        """
+        Initialize the cache
+
+        Args:
+            openai_client: Async OpenAI client used for embeddings
+            threshold: Minimum cosine similarity for a hit
+            ttl_seconds: How long a stored response stays valid
+            max_entries: Maximum entries kept per (mode, silo_id) bucket
+        """
+        self.openai_client = openai_client
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._buckets: Dict[Tuple[str, Optional[str]], Deque[_Entry]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    async def lookup(
+        self,
+        mode: str,
+        silo_id: Optional[str],
+        message: str
+    ) -> Tuple[Optional[str], Optional[List[float]]]:
+        """
+        Find a cached response for a semantically similar message
+
+        Returns:
+            Tuple of (cached content or None, message embedding or None).
+            Pass the embedding back to store() on a miss to avoid re-embedding.
+        """
+        embedding = await self._embed(message)
+        if embedding is None:
+            return None, None
+
+        bucket = self._buckets.get((mode, silo_id))
+        best_score = 0.0
+        best_content = None
+        if bucket:
+            now = time.monotonic()
+            # Entries are appended in expiry order, so expired ones are at the left
+            while bucket and bucket[0][0] <= now:
+                bucket.popleft()
+            for _, cached_embedding, content in bucket:
+                score = sum(map(mul, embedding, cached_embedding))
+                if score > best_score:
+                    best_score, best_content = score, content
+
+        if best_content is not None and best_score >= self.threshold:
+            self.hits += 1
+            logger.info(
+                f"Semantic cache hit - Mode: {mode}, Similarity: {best_score:.3f}, "
+                f"Hits: {self.hits}, Misses: {self.misses}"
+            )
+            return best_content, embedding
+
+        self.misses += 1
+        return None, embedding
+
+    def store(
+        self,
+        mode: str,
+        silo_id: Optional[str],
+        embedding: List[float],
+        content: str
+    ) -> None:
+        """Store a response under the embedding of the message that produced it"""
+        bucket = self._buckets.setdefault((mode, silo_id), deque(maxlen=self.max_entries))
+        bucket.append((time.monotonic() + self.ttl_seconds, embedding, content))
+
+    async def _embed(self, text: str) -> Optional[List[float]]:
+        """Embed text and normalize to unit length so dot product is cosine"""
+        try:
+            response = await self.openai_client.embeddings.create(
+                model=settings.SEMANTIC_MEMORY_MODEL,
+                input=text
+            )
+        except Exception as e:
+            logger.error(f"Error generating embedding for response cache: {e}")
+            return None
+
+        vector = response.data[0].embedding
+        norm = math.sqrt(sum(map(mul, vector, vector)))
+        if not norm:
+            return None
+        return [v / norm for v in vector]
+
+
+_response_cache: Optional[SemanticResponseCache] = None
+
+
+def get_response_cache() -> Optional[SemanticResponseCache]:
+    """
+    Get the process-wide response cache
+
+    Returns:
+        Shared SemanticResponseCache, or None when disabled or no OpenAI key
+    """
+    global _response_cache
+
+    if not settings.CLAUDE_RESPONSE_CACHE_ENABLED or not settings.OPENAI_API_KEY:
+        return None
+
+    if _response_cache is None:
+        _response_cache = SemanticResponseCache(
+            openai.AsyncOpenAI(api_key=settings.OPENAI_API_KEY),
+            threshold=settings.CLAUDE_RESPONSE_CACHE_THRESHOLD,
+            ttl_seconds=settings.CLAUDE_RESPONSE_CACHE_TTL_SECONDS,
+            max_entries=settings.CLAUDE_RESPONSE_CACHE_MAX_ENTRIES
+        )
+    return _response_cache
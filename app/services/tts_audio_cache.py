@@ -0,0 +1,107 @@
+"""
+TTS Audio Cache
+
+Stores synthesized audio in Redis keyed by (voice, model, format, style, text)
+so canned lines ("What's your name?", greetings) are synthesized once instead
+of costing ElevenLabs quota and a ~1s round-trip every time.
+"""
+
+import hashlib
+import logging
+from typing import Optional
+
+import redis.asyncio as redis
+
+from app.config import settings
+from app.core.redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "tts:audio:"
+
+
+class TTSAudioCache:
+    """
+    Redis-backed audio cache shared by every worker
+
+    Redis errors are logged and treated as misses so an unavailable cache
+    never blocks speech generation.
+    """
+
+    def __init__(self, client: "redis.Redis", ttl_seconds: int, max_chars: int):
+        """
+        Initialize the cache
+
+        Args:
+            client: Async Redis client
+            ttl_seconds: How long stored audio stays valid
+            max_chars: Longest text worth caching (longer texts are one-off replies)
+        """
+        self.client = client
+        self.ttl_seconds = ttl_seconds
+        self.max_chars = max_chars
+        self.hits = 0
+        self.misses = 0
+
+    def make_key(
+        self,
+        text: str,
+        voice: str,
+        model: str,
+        output_format: str,
+        instructions: Optional[str] = None
+    ) -> Optional[str]:
+        """Cache key for a synthesis request, or None if the text is too long to cache"""
+        text = text.strip()
+        if len(text) > self.max_chars:
+            return None
+        raw = f"{voice}|{model}|{output_format}|{instructions or ''}|{text}"
+        return KEY_PREFIX + hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    async def get(self, key: str) -> Optional[bytes]:
+        """Return cached audio for key, or None on a miss"""
+        try:
+            audio = await self.client.get(key)
+        except Exception as e:
+            logger.warning(f"TTS cache read failed: {e}")
+            return None
+
+        if audio is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        logger.info(f"TTS cache hit - Hits: {self.hits}, Misses: {self.misses}")
+        return audio
+
+    async def set(self, key: str, audio: bytes) -> None:
+        """Store audio under key for the cache TTL"""
+        try:
+            await self.client.setex(key, self.ttl_seconds, audio)
+        except Exception as e:
+            logger.warning(f"TTS cache write failed: {e}")
+
+
+_tts_audio_cache: Optional[TTSAudioCache] = None
+
+
+def get_tts_audio_cache() -> Optional[TTSAudioCache]:
+    """
+    Get the process-wide TTS audio cache
+
+    Returns:
+        Shared TTSAudioCache, or None when disabled
+    """
+    global _tts_audio_cache
+
+    if not settings.VOICE_TTS_CACHE_ENABLED:
+        return None
+
+    if _tts_audio_cache is None:
+        _tts_audio_cache = TTSAudioCache(
+            get_redis(),
+            ttl_seconds=settings.VOICE_TTS_CACHE_TTL_SECONDS,
+            max_chars=settings.VOICE_TTS_CACHE_MAX_CHARS
+        )
+    return _tts_audio_cache
+
@@ -0,0 +1,107 @@
+"""
+TTS Character Quota
+
+Counts characters sent to ElevenLabs in a shared Redis counter per calendar
+month so requests past the plan quota are refused locally, without a network
+round-trip that ElevenLabs would only answer with a 429.
+"""
+
+import logging
+from datetime import datetime
+from typing import Optional
+
+import redis.asyncio as redis
+
+from app.config import settings
+from app.core.exceptions import TTSQuotaExhausted
+from app.core.redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "tts:chars:"
+
+# Counters outlive their month by a few days, then expire on their own
+COUNTER_TTL_SECONDS = 40 * 24 * 3600
+
+
+class TTSCharacterQuota:
+    """
+    Monthly character budget shared by every worker
+
+    Characters are reserved before a request goes out and released again if
+    it is refused or fails. Redis errors are logged and the request is let
+    through, so an unavailable Redis never blocks speech generation.
+    """
+
+    def __init__(self, client: "redis.Redis", monthly_limit: int):
+        """
+        Initialize the quota
+
+        Args:
+            client: Async Redis client
+            monthly_limit: Characters allowed per calendar month (UTC)
+        """
+        self.client = client
+        self.monthly_limit = monthly_limit
+
+    @staticmethod
+    def current_key() -> str:
+        """Counter key for the current month, e.g. tts:chars:202610"""
+        return KEY_PREFIX + datetime.utcnow().strftime("%Y%m")
+
+    async def reserve(self, chars: int) -> Optional[str]:
+        """
+        Reserve chars from this month's budget
+
+        Returns:
+            Counter key to pass to release(), or None if nothing was reserved
+
+        Raises:
+            TTSQuotaExhausted: If the reservation would exceed the monthly limit
+        """
+        key = self.current_key()
+        try:
+            used = await self.client.incrby(key, chars)
+            if used == chars:
+                await self.client.expire(key, COUNTER_TTL_SECONDS)
+        except Exception as e:
+            logger.warning(f"TTS quota check failed, allowing request: {e}")
+            return None
+
+        if used > self.monthly_limit:
+            await self.release(key, chars)
+            logger.warning(
+                f"TTS monthly quota exhausted: {used - chars} + {chars} > {self.monthly_limit} chars"
+            )
+            raise TTSQuotaExhausted()
+
+        return key
+
+    async def release(self, key: Optional[str], chars: int) -> None:
+        """Give back chars reserved under key (no-op if key is None)"""
+        if key is None:
+            return
+        try:
+            await self.client.decrby(key, chars)
+        except Exception as e:
+            logger.warning(f"TTS quota release failed: {e}")
+
+
+_tts_quota: Optional[TTSCharacterQuota] = None
+
+
+def get_tts_quota() -> Optional[TTSCharacterQuota]:
+    """
+    Get the process-wide TTS character quota
+
+    Returns:
+        Shared TTSCharacterQuota, or None when no monthly limit is configured
+    """
+    global _tts_quota
+
+    if settings.VOICE_TTS_MONTHLY_CHAR_LIMIT <= 0:
+        return None
+
+    if _tts_quota is None:
+        _tts_quota = TTSCharacterQuota(get_redis(), settings.VOICE_TTS_MONTHLY_CHAR_LIMIT)
+    return _tts_quota
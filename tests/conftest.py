@@ -0,0 +1,63 @@
+"""
+Shared fixtures for service tests that run against an in-memory database
+"""
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+import app.models  # noqa: F401 - registers every table on Base.metadata
+from app.database import Base
+from app.models.user import User
+
+
+@pytest.fixture
+def engine():
+    """Fresh in-memory SQLite database per test"""
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool
+    )
+    Base.metadata.create_all(bind=engine)
+    try:
+        yield engine
+    finally:
+        engine.dispose()
+
+
+@pytest.fixture
+def session_factory(engine):
+    """Session factory configured like app.database.SessionLocal"""
+    return sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False, bind=engine)
+
+
+@pytest.fixture
+def db(session_factory):
+    """Session on the test database"""
+    session = session_factory()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+def _make_user(db, email: str) -> User:
+    user = User(email=email, password_hash="hashed_password")
+    db.add(user)
+    db.commit()
+    db.refresh(user)
+    return user
+
+
+@pytest.fixture
+def user(db):
+    """Test user"""
+    return _make_user(db, "user@example.com")
+
+
+@pytest.fixture
+def other_user(db):
+    """Second user, for ownership checks"""
+    return _make_user(db, "other@example.com")
@@ -0,0 +1,66 @@
+"""
+Unit tests for the check-in scheduler service
+"""
+
+import pytest
+from datetime import datetime, timedelta
+
+from app.models.goal import Goal, GoalCategory, GoalStatus
+from app.services.check_in_service import CheckInService, invalidate_pending_check_ins
+from app.services.goal_service import GoalService
+
+
+@pytest.fixture
+def goal(db, user):
+    """In-progress goal that has never been checked in on"""
+    goal = Goal(
+        user_id=user.id,
+        title="Read every evening",
+        category=GoalCategory.PERSONAL_GROWTH,
+        status=GoalStatus.IN_PROGRESS,
+        created_by_mode="personal_friend",
+        created_at=datetime.utcnow() - timedelta(days=3)
+    )
+    db.add(goal)
+    db.commit()
+    yield goal
+    invalidate_pending_check_ins(user.id)
+
+
+class TestPendingCheckIns:
+    """Test the cached pending check-ins"""
+
+    def test_cache_hit_uses_own_session(self, db, session_factory, user, goal):
+        """Should reload cached items in the caller's session, ignoring another session's unsaved edits"""
+        CheckInService(db).get_pending_check_ins(user.id)
+        goal.title = "Unsaved edit"
+
+        other_db = session_factory()
+        try:
+            pending = CheckInService(other_db).get_pending_check_ins(user.id)
+
+            assert pending['total_due'] == 1
+            due_goal = pending['due_goals'][0]
+            assert due_goal in other_db
+            assert due_goal is not goal
+            assert due_goal.title == "Read every evening"
+        finally:
+            other_db.close()
+
+    def test_goal_check_in_clears_cache(self, db, user, goal):
+        """Should stop listing a goal once it has been checked in on"""
+        service = CheckInService(db)
+        assert service.get_pending_check_ins(user.id)['total_due'] == 1
+
+        GoalService(db).create_check_in(goal.id, user.id, "Read two chapters")
+
+        assert service.get_pending_check_ins(user.id)['total_due'] == 0
+
+    def test_goal_delete_clears_cache(self, db, user, goal):
+        """Should stop listing a goal once it has been deleted"""
+        service = CheckInService(db)
+        assert service.get_pending_check_ins(user.id)['total_due'] == 1
+
+        GoalService(db).delete_goal(goal.id, user.id)
+
+        assert service.get_pending_check_ins(user.id)['due_goals'] == []
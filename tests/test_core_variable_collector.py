@@ -0,0 +1,37 @@
+"""
+Unit tests for the core variable collector
+"""
+
+import asyncio
+import pytest
+
+from app.services.core_variable_collector import CoreVariableCollector, invalidate_completion_status
+from app.services.memory_service import MemoryService
+
+
+@pytest.fixture
+def memory_service(db):
+    return MemoryService(db)
+
+
+@pytest.fixture
+def collector(memory_service, user):
+    yield CoreVariableCollector(memory_service)
+    invalidate_completion_status(user.id)
+
+
+class TestCompletionStatus:
+    """Test the cached completion status"""
+
+    def test_memory_write_refreshes_status(self, collector, memory_service, user):
+        """Should see a name saved through MemoryService straight away"""
+        async def run():
+            before = await collector.assess_completion_status(user.id)
+            await memory_service.update_global_memory(user.id, "user_profile", "name", "Sam")
+            after = await collector.assess_completion_status(user.id)
+            return before, after
+
+        before, after = asyncio.run(run())
+
+        assert "user_profile.name" in before["missing_variables_set"]
+        assert "user_profile.name" not in after["missing_variables_set"]
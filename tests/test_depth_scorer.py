@@ -2,8 +2,10 @@
 Unit tests for depth scorer
 """
 
+import asyncio
+import gc
 import pytest
-from app.services.depth_scorer import DepthScorer
+from app.services.depth_scorer import DepthScorer, _ScoringBatcher
 
 
 @pytest.fixture
@@ -106,4 +108,27 @@ class TestScoreWeighting:
         
         for heuristic, llm in test_cases:
             final = 0.6 * heuristic + 0.4 * llm
-            assert 0.0 <= final <= 1.0
\ No newline at end of file
+            assert 0.0 <= final <= 1.0
+
+
+class TestScoringBatcher:
+    """Test batching of concurrent LLM scoring calls"""
+    
+    @pytest.mark.asyncio
+    async def test_batch_survives_garbage_collection(self):
+        """In-flight batches are kept alive until every caller has its score"""
+        release = asyncio.Event()
+        
+        async def score_batch(messages, user_tier):
+            await release.wait()
+            return [0.5 for _ in messages]
+        
+        batcher = _ScoringBatcher(score_batch, max_batch=2)
+        results = asyncio.gather(batcher.submit("first"), batcher.submit("second"))
+        await asyncio.sleep(0)
+        gc.collect()
+        release.set()
+        
+        assert await asyncio.wait_for(results, timeout=1) == [0.5, 0.5]
+        await asyncio.sleep(0)
+        assert not batcher._tasks
\ No newline at end of file
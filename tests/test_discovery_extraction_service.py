@@ -0,0 +1,67 @@
+"""
+Unit tests for the discovery extraction service
+"""
+
+import asyncio
+import pytest
+from types import SimpleNamespace
+
+from app.services.discovery_extraction_service import DiscoveryExtractionService
+
+
+class FailingCompletions:
+    """Groq completions stub that fails after a short delay"""
+
+    def __init__(self):
+        self.calls = 0
+
+    async def create(self, **kwargs):
+        self.calls += 1
+        await asyncio.sleep(0.01)
+        raise RuntimeError("Groq unavailable")
+
+
+@pytest.fixture
+def completions():
+    return FailingCompletions()
+
+
+@pytest.fixture
+def service(monkeypatch, completions):
+    client = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+    monkeypatch.setattr(DiscoveryExtractionService, "client", property(lambda self: client))
+    return DiscoveryExtractionService(groq_api_key="test-key")
+
+
+class TestSharedRequestFailure:
+    """Test concurrent callers sharing a failed Groq request"""
+
+    def test_engagement_waiters_fall_back_on_their_input(self, service, completions):
+        """Should assess every caller's own input when the shared request raises"""
+        async def run():
+            return await asyncio.gather(
+                service.assess_engagement_quality("I keep putting things off", 2),
+                service.assess_engagement_quality("I keep putting things off", 2)
+            )
+
+        results = asyncio.run(run())
+
+        assert completions.calls == 1
+        for result in results:
+            assert result["is_engaged"] is True
+            assert result["strike_weight"] == 1
+
+    def test_name_waiters_keep_previous_name(self, service, completions):
+        """Should pass the previous name to every caller's fallback"""
+        async def run():
+            return await asyncio.gather(
+                service.validate_and_extract_name("Sam", previous_name="Sammy"),
+                service.validate_and_extract_name("Sam", previous_name="Sammy")
+            )
+
+        results = asyncio.run(run())
+
+        assert completions.calls == 1
+        for result in results:
+            assert result["name_value"] == "Sam"
+            assert result["is_correction"] is True
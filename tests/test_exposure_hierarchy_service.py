@@ -0,0 +1,278 @@
+"""
+Unit tests for the exposure hierarchy service
+"""
+
+import pytest
+from datetime import datetime, timedelta
+from sqlalchemy import event
+from sqlalchemy.exc import InvalidRequestError
+
+from app.config import settings
+from app.models.conversation import Conversation
+from app.services.exposure_hierarchy_service import ExposureHierarchyService, _report_cache
+
+
+@pytest.fixture
+def service(db):
+    return ExposureHierarchyService(db)
+
+
+class TestStepQueries:
+    """Test step listing queries"""
+    
+    def test_lite_listing_matches_full_listing(self, service, user):
+        """Should return the same steps in the same order as the full listing"""
+        service.create_exposure_step(user.id, "heights", "Ride a glass elevator", 80, 10)
+        service.create_exposure_step(user.id, "heights", "Look out a 2nd floor window", 20, 8)
+        service.create_exposure_step(user.id, "crowds", "Visit a quiet cafe", 25, 6)
+        
+        full = service.get_user_exposure_steps(user.id, hierarchy_group="heights")
+        lite = service.get_user_exposure_steps_lite(user.id, hierarchy_group="heights")
+        
+        assert [s.id for s in lite] == [s.id for s in full]
+        assert [s.difficulty_level for s in lite] == [20, 80]
+    
+    def test_listing_can_include_conversation(self, db, service, user):
+        """Should eager-load conversations only when asked to"""
+        conversation = Conversation(user_id=user.id, mode="psychology_expert")
+        db.add(conversation)
+        db.commit()
+        service.create_exposure_step(
+            user.id, "heights", "Stand on a balcony", 45, 9, conversation_id=conversation.id
+        )
+        db.expire_all()
+        
+        steps = service.get_user_exposure_steps(user.id, include_conversation=True)
+        
+        assert steps[0].conversation.id == conversation.id
+    
+    def test_lazy_loads_raise_only_when_opted_in(self, db, service, user, monkeypatch):
+        """Should raise on unplanned relationship loads only with RAISE_ON_LAZY_LOAD"""
+        service.create_exposure_step(user.id, "heights", "Stand on a balcony", 45, 9)
+        db.expire_all()
+        
+        assert service.get_user_exposure_steps(user.id)[0].conversation is None
+        
+        monkeypatch.setattr(settings, "RAISE_ON_LAZY_LOAD", True)
+        db.expire_all()
+        with pytest.raises(InvalidRequestError):
+            service.get_user_exposure_steps(user.id)[0].conversation
+    
+    def test_delete_only_own_step(self, service, user, other_user):
+        """Should delete the step for its owner and report a miss for anyone else"""
+        step = service.create_exposure_step(user.id, "heights", "Stand on a balcony", 45, 9)
+        
+        assert service.delete_exposure_step(step.id, other_user.id) is False
+        assert service.get_exposure_step(step.id, other_user.id) is None
+        assert service.delete_exposure_step(step.id, user.id) is True
+        assert service.get_exposure_step(step.id, user.id) is None
+        assert service.get_user_exposure_steps(user.id) == []
+    
+    def test_bulk_create(self, db, service, user):
+        """Should insert every step with a single commit"""
+        commits = []
+        event.listen(db, "after_commit", lambda session: commits.append(session))
+        
+        created = service.bulk_create_exposure_steps(user.id, [
+            {"hierarchy_group": "heights", "feared_situation": f"Floor {floor}",
+             "difficulty_level": floor * 10, "anxiety_before": floor}
+            for floor in range(1, 11)
+        ])
+        
+        assert len(commits) == 1
+        assert [s.difficulty_level for s in created] == list(range(10, 101, 10))
+        assert len(service.get_user_exposure_steps(user.id)) == 10
+    
+    def test_hierarchy_groups(self, service, user):
+        """Should list each group once"""
+        service.create_exposure_step(user.id, "heights", "Stand on a balcony", 45, 9)
+        service.create_exposure_step(user.id, "heights", "Climb a ladder", 60, 9)
+        service.create_exposure_step(user.id, "crowds", "Visit a quiet cafe", 25, 6)
+        
+        assert sorted(service.get_hierarchy_groups(user.id)) == ["crowds", "heights"]
+
+
+class TestProgressReports:
+    """Test progress and trend reports"""
+    
+    def test_progress_for_new_group(self, service, user):
+        """Should report an empty group without raising"""
+        progress = service.get_exposure_progress(user.id, "heights", days=30)
+        
+        assert progress["total_exposures"] == 0
+        assert progress["completion_rate"] == 0
+        assert progress["avg_anxiety_reduction"] is None
+    
+    def test_progress_counts_statuses(self, service, user):
+        """Should count steps per status and average completed reductions"""
+        easy = service.create_exposure_step(user.id, "heights", "Look out a 2nd floor window", 20, 8)
+        medium = service.create_exposure_step(user.id, "heights", "Stand on a balcony", 45, 9)
+        hard = service.create_exposure_step(user.id, "heights", "Ride a glass elevator", 80, 10)
+        service.create_exposure_step(user.id, "heights", "Climb a ladder", 60, 9)
+        
+        service.complete_exposure(easy.id, user.id, anxiety_after=4)
+        service.complete_exposure(medium.id, user.id, anxiety_after=7)
+        service.avoid_exposure(hard.id, user.id)
+        
+        progress = service.get_exposure_progress(user.id, "heights", days=30)
+        
+        assert progress["total_exposures"] == 4
+        assert progress["completed"] == 2
+        assert progress["avoided"] == 1
+        assert progress["in_progress"] == 0
+        assert progress["completion_rate"] == 50.0
+        assert progress["avg_anxiety_reduction"] == 3.0
+    
+    def test_progress_refreshes_after_write(self, service, user):
+        """Should not serve a cached report after the user's steps change"""
+        step = service.create_exposure_step(user.id, "heights", "Stand on a balcony", 45, 9)
+        assert service.get_exposure_progress(user.id, "heights")["completed"] == 0
+        
+        service.complete_exposure(step.id, user.id, anxiety_after=5)
+        
+        assert service.get_exposure_progress(user.id, "heights")["completed"] == 1
+    
+    def test_anxiety_trends(self, service, user):
+        """Should average anxiety levels over completed steps only"""
+        first = service.create_exposure_step(user.id, "crowds", "Visit a quiet cafe", 25, 6)
+        second = service.create_exposure_step(user.id, "crowds", "Go to a busy market", 55, 8)
+        service.create_exposure_step(user.id, "crowds", "Attend a concert", 85, 10)
+        
+        service.complete_exposure(first.id, user.id, anxiety_after=2)
+        service.complete_exposure(second.id, user.id, anxiety_after=6)
+        
+        trends = service.get_anxiety_trends(user.id, "crowds", days=30)
+        
+        assert trends["total_exposures"] == 2
+        assert trends["avg_anxiety_before"] == 7.0
+        assert trends["avg_anxiety_after"] == 4.0
+        assert trends["avg_reduction"] == 3.0
+    
+    def test_anxiety_trends_count_unrecorded_reduction_as_zero(self, service, user):
+        """Should divide the reduction total by every completed step"""
+        first = service.create_exposure_step(user.id, "crowds", "Visit a quiet cafe", 25, 6)
+        second = service.create_exposure_step(user.id, "crowds", "Go to a busy market", 55, 8)
+        
+        service.complete_exposure(first.id, user.id, anxiety_after=2)
+        service.complete_exposure(second.id, user.id)  # anxiety_after defaults to 0
+        
+        trends = service.get_anxiety_trends(user.id, days=30)
+        
+        assert trends["total_exposures"] == 2
+        assert trends["avg_anxiety_after"] == 1.0
+        assert trends["avg_reduction"] == 2.0
+    
+    def test_hierarchy_summary(self, service, user):
+        """Should summarize every group the user has"""
+        step = service.create_exposure_step(user.id, "heights", "Stand on a balcony", 45, 9)
+        service.create_exposure_step(user.id, "crowds", "Visit a quiet cafe", 25, 6)
+        service.complete_exposure(step.id, user.id, anxiety_after=5)
+        
+        summary = {s["hierarchy_group"]: s for s in service.get_hierarchy_summary(user.id)}
+        
+        assert set(summary) == {"heights", "crowds"}
+        assert summary["heights"]["completed"] == 1
+        assert summary["heights"]["avg_anxiety_reduction"] == 4.0
+        assert summary["crowds"]["total_exposures"] == 1
+        assert summary["crowds"]["completion_rate"] == 0
+    
+    def test_hierarchy_summary_is_one_query(self, db, service, user):
+        """Should cost a single round-trip however many groups the user has"""
+        for group in ("heights", "crowds", "flying", "spiders"):
+            service.create_exposure_step(user.id, group, f"First {group} step", 20, 5)
+        user_id = user.id
+        
+        statements = []
+        
+        def count_statement(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+        
+        event.listen(db.get_bind(), "before_cursor_execute", count_statement)
+        try:
+            summary = service.get_hierarchy_summary(user_id)
+        finally:
+            event.remove(db.get_bind(), "before_cursor_execute", count_statement)
+        
+        assert len(summary) == 4
+        assert len(statements) == 1
+    
+    def test_hierarchy_summary_keeps_stale_groups(self, db, service, user):
+        """Should still list a group whose steps all fall outside the 30-day window"""
+        step = service.create_exposure_step(user.id, "flying", "Watch takeoff videos", 30, 7)
+        step.created_at = datetime.utcnow() - timedelta(days=90)
+        db.commit()
+        
+        summary = service.get_hierarchy_summary(user.id)
+        
+        assert summary == [service.get_exposure_progress(user.id, "flying", days=30)]
+        assert summary[0]["total_exposures"] == 0
+
+
+class TestUnitOfWork:
+    """Test grouped writes"""
+    
+    def test_commits_once_for_several_writes(self, db, service, user):
+        """Should defer the commit to the end of the block"""
+        step = service.create_exposure_step(user.id, "heights", "Stand on a balcony", 45, 9)
+        commits = []
+        event.listen(db, "after_commit", lambda session: commits.append(session))
+        
+        with service.unit_of_work():
+            service.complete_exposure(step.id, user.id, anxiety_after=5)
+            service.create_exposure_step(user.id, "heights", "Climb a ladder", 60, 9)
+        
+        assert len(commits) == 1
+        assert service.get_exposure_progress(user.id, "heights")["completed"] == 1
+    
+    def test_rolls_back_every_write_on_error(self, service, user):
+        """Should discard all writes in the block when it raises"""
+        with pytest.raises(RuntimeError):
+            with service.unit_of_work():
+                service.create_exposure_step(user.id, "heights", "Stand on a balcony", 45, 9)
+                raise RuntimeError("abort")
+        
+        assert service.get_user_exposure_steps(user.id) == []
+    
+    def test_reports_in_block_bypass_shared_cache(self, service, user):
+        """Should not share reports built from uncommitted writes"""
+        with pytest.raises(RuntimeError):
+            with service.unit_of_work():
+                service.create_exposure_step(user.id, "heights", "Stand on a balcony", 45, 9)
+                assert service.get_exposure_progress(user.id, "heights")["total_exposures"] == 1
+                assert _report_cache.get(str(user.id), None) is None
+                raise RuntimeError("abort")
+        
+        assert service.get_exposure_progress(user.id, "heights")["total_exposures"] == 0
+
+
+class TestSuggestions:
+    """Test next-step suggestions"""
+    
+    def test_suggests_easiest_not_started_step(self, service, user):
+        """Should pick the lowest-difficulty step that hasn't been started"""
+        service.create_exposure_step(user.id, "heights", "Ride a glass elevator", 80, 10)
+        easy = service.create_exposure_step(user.id, "heights", "Look out a 2nd floor window", 20, 8)
+        
+        suggestion = service.suggest_next_step(user.id, "heights")
+        
+        assert suggestion["step_id"] == easy.id
+        assert suggestion["difficulty_category"] == "easy"
+        assert suggestion["guidance"].startswith("This is an easy step.")
+    
+    def test_suggestion_mentions_strong_progress(self, service, user):
+        """Should add encouragement once more than 70% of steps are completed"""
+        for level in (10, 20, 30, 40):
+            step = service.create_exposure_step(user.id, "heights", f"Step {level}", level, 5)
+            service.complete_exposure(step.id, user.id, anxiety_after=3)
+        service.create_exposure_step(user.id, "heights", "Ride a glass elevator", 80, 10)
+        
+        suggestion = service.suggest_next_step(user.id, "heights")
+        
+        assert suggestion["guidance"].endswith("You've completed 80.0% of exposures - you're making great progress!")
+    
+    def test_no_suggestion_when_all_started(self, service, user):
+        """Should return None once every step has been attempted"""
+        step = service.create_exposure_step(user.id, "heights", "Stand on a balcony", 45, 9)
+        service.start_exposure(step.id, user.id)
+        
+        assert service.suggest_next_step(user.id, "heights") is None
@@ -0,0 +1,133 @@
+"""
+Unit tests for the goal service
+"""
+
+import pytest
+from datetime import datetime, timedelta
+from sqlalchemy import event
+
+from app.models.goal import CheckIn, Goal, GoalCategory
+from app.services.goal_service import GoalService
+
+
+@pytest.fixture
+def service(db):
+    return GoalService(db)
+
+
+@pytest.fixture
+def goal(db, user):
+    """Test goal"""
+    goal = Goal(
+        user_id=user.id,
+        title="Run a 5k",
+        category=GoalCategory.HEALTH,
+        created_by_mode="personal_friend"
+    )
+    db.add(goal)
+    db.commit()
+    return goal
+
+
+def count_statements(db):
+    """Collect every SQL statement the session's engine runs"""
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(db.get_bind(), "before_cursor_execute", record)
+    return statements, lambda: event.remove(db.get_bind(), "before_cursor_execute", record)
+
+
+class TestCheckIns:
+    """Test goal check-ins"""
+
+    def test_check_in_updates_streak_and_count(self, db, service, user, goal):
+        """Should extend the streak over recent check-ins and count the new one"""
+        now = datetime.utcnow()
+        db.add_all([
+            CheckIn(goal_id=goal.id, user_id=user.id, created_at=now - timedelta(days=3)),
+            CheckIn(goal_id=goal.id, user_id=user.id, created_at=now - timedelta(days=8)),
+            CheckIn(goal_id=goal.id, user_id=user.id, created_at=now - timedelta(days=30))
+        ])
+        db.commit()
+
+        check_in = service.create_check_in(goal.id, user.id, "Ran 3k", mood="motivated", energy_level=8)
+
+        assert check_in.notes == "Ran 3k"
+        assert goal.current_streak_days == 2
+        assert goal.total_check_ins == 4
+
+    def test_check_in_round_trips(self, db, service, user, goal):
+        """Should load the goal, read streak and count together, then write"""
+        statements, stop = count_statements(db)
+        try:
+            service.create_check_in(goal.id, user.id, "Ran 2k")
+        finally:
+            stop()
+
+        selects = [s for s in statements if s.lstrip().upper().startswith("SELECT")]
+        assert len(selects) == 2
+
+    def test_bulk_check_ins(self, db, service, user, goal):
+        """Should insert every check-in and recompute the streak once"""
+        now = datetime.utcnow()
+        created = service.bulk_create_check_ins(user.id, [
+            {'goal_id': goal.id, 'notes': "Day one", 'created_at': now - timedelta(days=2)},
+            {'goal_id': str(goal.id), 'mood': "motivated", 'energy_level': 7, 'created_at': now - timedelta(days=1)},
+            {'goal_id': goal.id}
+        ])
+
+        assert created == 3
+        assert db.query(CheckIn).filter(CheckIn.goal_id == goal.id).count() == 3
+        assert goal.current_streak_days == 3
+        assert goal.total_check_ins == 3
+
+    def test_bulk_check_ins_reject_foreign_goal(self, db, service, goal, other_user):
+        """Should insert nothing when any goal belongs to someone else"""
+        with pytest.raises(ValueError):
+            service.bulk_create_check_ins(other_user.id, [{'goal_id': goal.id}])
+
+        assert db.query(CheckIn).count() == 0
+
+    def test_streak_stops_at_first_long_gap(self, db, service, user, goal):
+        """Should count check-ins up to the first gap of eight days or more"""
+        now = datetime.utcnow()
+        db.add_all([
+            CheckIn(goal_id=goal.id, user_id=user.id, created_at=now - timedelta(days=7, hours=12)),
+            CheckIn(goal_id=goal.id, user_id=user.id, created_at=now - timedelta(days=15)),
+            CheckIn(goal_id=goal.id, user_id=user.id, created_at=now - timedelta(days=24)),
+            CheckIn(goal_id=goal.id, user_id=user.id, created_at=now - timedelta(days=25))
+        ])
+        db.commit()
+
+        assert service._update_streak(goal) == 4
+        assert goal.current_streak_days == 2
+
+
+class TestGoalProgress:
+    """Test goal progress reporting"""
+
+    def test_progress_is_two_queries(self, db, service, user, goal):
+        """Should load the goal once and its check-ins once"""
+        db.add_all([
+            CheckIn(goal_id=goal.id, user_id=user.id, mood="good", energy_level=6),
+            CheckIn(goal_id=goal.id, user_id=user.id, mood="good", energy_level=8)
+        ])
+        db.commit()
+
+        statements, stop = count_statements(db)
+        try:
+            progress = service.get_goal_progress(goal.id, user.id)
+        finally:
+            stop()
+
+        assert len(statements) == 2
+        assert progress['total_check_ins'] == 2
+        assert progress['average_energy'] == 7
+        assert progress['mood_distribution'] == {"good": 2}
+
+    def test_progress_for_other_user_is_empty(self, service, goal, other_user):
+        """Should not report on someone else's goal"""
+        assert service.get_goal_progress(goal.id, other_user.id) == {}